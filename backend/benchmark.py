@@ -0,0 +1,358 @@
+"""
+밥토리 백엔드 부하 테스트
+실행 중인 서버에 여러 엔드포인트를 섞어서 동시에 요청하고 처리량/지연 시간을 측정
+
+Usage:
+    # 서버 실행 후
+    python benchmark.py api --concurrency 50 --duration 30 --label after
+    # 일괄 추천 처리량 (사용자/분)
+    python benchmark.py batch --users 10000 --batch-size 2000
+    # 챗봇 스트리밍 (서버를 CHAT_MODEL_PROVIDER=fake 로 실행하면 LLM 비용 없이 측정)
+    python benchmark.py chat --concurrency 100 --duration 30 --label fake
+    # 변경 전/후 결과 비교
+    python benchmark.py compare benchmark_before.json benchmark_after.json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from typing import Dict, List
+
+import httpx
+
+from loop_monitor import LoopLagMonitor
+
+DEFAULT_BASE_URL = "http://localhost:8000"
+
+# (가중치, 메서드, 경로 생성 함수) — 실제 화면 흐름 비율을 대략 반영
+API_MIX = [
+    (40, "GET", lambda user: f"/character/state?user_id={user}"),
+    (30, "GET", lambda user: f"/food/recommend?user_id={user}&lat={35.87 + random.random() / 10}&lon=128.60"),
+    (15, "GET", lambda user: f"/food/diary?user_id={user}&limit=20"),
+    (10, "POST", lambda user: f"/character/update?user_id={user}&exp_gain=1"),
+    (5, "GET", lambda user: "/weather?lat=35.8714&lon=128.6014"),
+]
+
+
+# ============================================
+# 통계
+# ============================================
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def summarize(latencies: Dict[str, List[float]], errors: Dict[str, int], elapsed: float) -> dict:
+    """엔드포인트별 / 전체 처리량 및 지연 시간 (ms)"""
+    def describe(values, error_count):
+        return {
+            "requests": len(values),
+            "errors": error_count,
+            "rps": round(len(values) / elapsed, 1) if elapsed else 0.0,
+            "p50_ms": round(percentile(values, 50) * 1000, 2),
+            "p95_ms": round(percentile(values, 95) * 1000, 2),
+            "p99_ms": round(percentile(values, 99) * 1000, 2),
+            "mean_ms": round(statistics.fmean(values) * 1000, 2) if values else 0.0,
+        }
+
+    all_values = [value for values in latencies.values() for value in values]
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "total": describe(all_values, sum(errors.values())),
+        "endpoints": {
+            name: describe(values, errors.get(name, 0)) for name, values in sorted(latencies.items())
+        },
+    }
+
+
+def print_summary(label: str, summary: dict) -> None:
+    print("=" * 72)
+    print(f"{label}  ({summary['elapsed_s']}s)")
+    print("=" * 72)
+    print(f"{'endpoint':<24}{'req':>8}{'err':>6}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}")
+    rows = [("TOTAL", summary["total"]), *summary["endpoints"].items()]
+    for name, stats in rows:
+        print(
+            f"{name:<24}{stats['requests']:>8}{stats['errors']:>6}{stats['rps']:>9}"
+            f"{stats['p50_ms']:>9}{stats['p95_ms']:>9}{stats['p99_ms']:>9}"
+        )
+    print()
+
+
+# ============================================
+# API 혼합 부하
+# ============================================
+
+async def run_api_benchmark(base_url: str, concurrency: int, duration: float, users: int) -> dict:
+    """concurrency개의 가상 사용자가 duration초 동안 API_MIX 비율로 요청"""
+    weights = [weight for weight, _, _ in API_MIX]
+    latencies: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    deadline = time.perf_counter() + duration
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+
+        async def worker():
+            while time.perf_counter() < deadline:
+                _, method, make_path = random.choices(API_MIX, weights=weights)[0]
+                path = make_path(f"bench_user_{random.randrange(users)}")
+                name = f"{method} {path.split('?')[0]}"
+
+                started = time.perf_counter()
+                try:
+                    response = await client.request(method, path)
+                    response.raise_for_status()
+                except Exception:
+                    errors[name] = errors.get(name, 0) + 1
+                    continue
+                latencies.setdefault(name, []).append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return summarize(latencies, errors, elapsed)
+
+
+# ============================================
+# 일괄 추천 처리량
+# ============================================
+
+async def run_batch_benchmark(base_url: str, users: int, batch_size: int) -> dict:
+    """users명을 batch_size씩 /food/recommend/batch로 보내고 분당 처리 사용자 수 측정"""
+    # 대구 시내 범위에 사용자를 흩어 놓음 (여러 날씨 셀에 걸치도록)
+    targets = [
+        {
+            "user_id": f"bench_user_{i}",
+            "lat": 35.80 + random.random() * 0.15,
+            "lon": 128.50 + random.random() * 0.20,
+        }
+        for i in range(users)
+    ]
+    latencies: List[float] = []
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=120.0) as client:
+        started = time.perf_counter()
+        for offset in range(0, users, batch_size):
+            batch_started = time.perf_counter()
+            response = await client.post(
+                "/food/recommend/batch",
+                json={"targets": targets[offset:offset + batch_size]},
+            )
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - batch_started)
+        elapsed = time.perf_counter() - started
+
+    return {
+        "users": users,
+        "batch_size": batch_size,
+        "elapsed_s": round(elapsed, 2),
+        "users_per_min": round(users / elapsed * 60) if elapsed else 0,
+        "batch_p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "batch_max_ms": round(max(latencies) * 1000, 2) if latencies else 0.0,
+    }
+
+
+# ============================================
+# 챗봇 스트리밍 부하
+# ============================================
+
+CHAT_MESSAGES = [
+    "오늘 뭐 먹지?",
+    "매운 거 추천해줘",
+    "비 오는 날 먹을 만한 거 있어?",
+    "가볍게 먹을 점심 추천해줘",
+    "야식으로 뭐가 좋을까?",
+]
+
+
+# 토큰 하나의 글자 수 (fake_chat_model.FAKE_CHARS_PER_TOKEN과 같은 값)
+CHAT_CHARS_PER_TOKEN = 2
+
+
+async def run_chat_benchmark(base_url: str, concurrency: int, duration: float, use_cache: bool,
+                             chars_per_token: float = CHAT_CHARS_PER_TOKEN) -> dict:
+    """
+    concurrency개의 /chat 스트림을 duration초 동안 계속 열어
+    첫 바이트까지 시간(TTFB), 스트림 속도, 서버/클라이언트 이벤트 루프 지연 측정
+
+    스트림 속도는 받은 글자 수 / chars_per_token 기준
+    (부하가 걸리면 토큰 여러 개가 한 번의 네트워크 읽기로 오므로 읽기 횟수로는 셀 수 없음)
+    """
+    ttfbs: List[float] = []
+    totals: List[float] = []
+    token_rates: List[float] = []
+    tokens_total = 0.0
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    # 클라이언트 루프가 밀리면 측정값이 부풀려지므로 함께 기록
+    client_loop = LoopLagMonitor()
+    client_loop.start()
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+
+        async def worker(worker_id: int):
+            nonlocal tokens_total, errors
+            turn = 0
+            while time.perf_counter() < deadline:
+                turn += 1
+                message = random.choice(CHAT_MESSAGES)
+                if not use_cache:
+                    # 응답 캐시를 피해 매번 모델까지 가도록
+                    message = f"{message} ({worker_id}-{turn})"
+
+                started = time.perf_counter()
+                ttfb = None
+                chars = 0
+                first_chars = 0
+                try:
+                    async with client.stream(
+                        "POST",
+                        "/chat",
+                        json={"session_id": f"bench_chat_{worker_id}_{turn}", "message": message},
+                    ) as response:
+                        response.raise_for_status()
+                        async for text in response.aiter_text():
+                            if not text:
+                                continue
+                            if ttfb is None:
+                                ttfb = time.perf_counter() - started
+                                first_chars = len(text)
+                            chars += len(text)
+                except Exception:
+                    errors += 1
+                    continue
+
+                total = time.perf_counter() - started
+                if ttfb is None:
+                    errors += 1
+                    continue
+                ttfbs.append(ttfb)
+                totals.append(total)
+                tokens_total += chars / chars_per_token
+                # 첫 읽기 이후에 받은 토큰 / 첫 바이트 이후 시간
+                if total > ttfb and chars > first_chars:
+                    token_rates.append((chars - first_chars) / chars_per_token / (total - ttfb))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+        try:
+            server_loop = (await client.get("/stats")).json().get("event_loop")
+        except Exception:
+            server_loop = None
+
+    await client_loop.stop()
+
+    def ms(values, p):
+        return round(percentile(values, p) * 1000, 2)
+
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "concurrency": concurrency,
+        "use_cache": use_cache,
+        "streams": len(totals),
+        "errors": errors,
+        "streams_per_sec": round(len(totals) / elapsed, 2) if elapsed else 0.0,
+        "ttfb_p50_ms": ms(ttfbs, 50),
+        "ttfb_p95_ms": ms(ttfbs, 95),
+        "ttfb_p99_ms": ms(ttfbs, 99),
+        "total_p50_ms": ms(totals, 50),
+        "total_p95_ms": ms(totals, 95),
+        "chars_per_token": chars_per_token,
+        "stream_tokens_per_sec": round(statistics.fmean(token_rates), 1) if token_rates else 0.0,
+        "aggregate_tokens_per_sec": round(tokens_total / elapsed, 1) if elapsed else 0.0,
+        "server_event_loop": server_loop,
+        "client_event_loop": client_loop.stats(),
+    }
+
+
+def compare(before_path: str, after_path: str) -> None:
+    """두 결과 파일의 처리량/지연 시간 비교"""
+    with open(before_path, encoding="utf-8") as f:
+        before = json.load(f)
+    with open(after_path, encoding="utf-8") as f:
+        after = json.load(f)
+
+    print(f"{'endpoint':<24}{'rps before':>12}{'rps after':>12}{'p99 before':>12}{'p99 after':>12}")
+    names = ["TOTAL", *sorted(set(before["endpoints"]) | set(after["endpoints"]))]
+    for name in names:
+        b = before["total"] if name == "TOTAL" else before["endpoints"].get(name, {})
+        a = after["total"] if name == "TOTAL" else after["endpoints"].get(name, {})
+        print(
+            f"{name:<24}{b.get('rps', '-'):>12}{a.get('rps', '-'):>12}"
+            f"{b.get('p99_ms', '-'):>12}{a.get('p99_ms', '-'):>12}"
+        )
+
+
+# ============================================
+# 실행
+# ============================================
+
+def main():
+    parser = argparse.ArgumentParser(description="밥토리 백엔드 부하 테스트")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    api = sub.add_parser("api", help="여러 API를 섞어서 부하")
+    api.add_argument("--base-url", default=DEFAULT_BASE_URL)
+    api.add_argument("--concurrency", type=int, default=50)
+    api.add_argument("--duration", type=float, default=30)
+    api.add_argument("--users", type=int, default=200, help="가상 사용자 수 (user_id 종류)")
+    api.add_argument("--label", default="result", help="결과 파일 이름: benchmark_<label>.json")
+
+    batch = sub.add_parser("batch", help="일괄 추천 처리량 (사용자/분)")
+    batch.add_argument("--base-url", default=DEFAULT_BASE_URL)
+    batch.add_argument("--users", type=int, default=10000)
+    batch.add_argument("--batch-size", type=int, default=2000)
+
+    chat = sub.add_parser("chat", help="챗봇 스트리밍 동시 부하")
+    chat.add_argument("--base-url", default=DEFAULT_BASE_URL)
+    chat.add_argument("--concurrency", type=int, default=50)
+    chat.add_argument("--duration", type=float, default=30)
+    chat.add_argument("--use-cache", action="store_true", help="같은 질문을 반복해 응답 캐시도 사용")
+    chat.add_argument("--chars-per-token", type=float, default=CHAT_CHARS_PER_TOKEN,
+                      help="토큰 하나의 글자 수 (가짜 모델은 2)")
+    chat.add_argument("--label", default="chat", help="결과 파일 이름: benchmark_<label>.json")
+
+    cmp = sub.add_parser("compare", help="두 결과 파일 비교")
+    cmp.add_argument("before")
+    cmp.add_argument("after")
+
+    args = parser.parse_args()
+
+    if args.command == "api":
+        summary = asyncio.run(run_api_benchmark(args.base_url, args.concurrency, args.duration, args.users))
+        print_summary(f"API 혼합 부하: {args.label}", summary)
+        output = f"benchmark_{args.label}.json"
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print(f"결과 저장: {output}")
+    elif args.command == "batch":
+        result = asyncio.run(run_batch_benchmark(args.base_url, args.users, args.batch_size))
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    elif args.command == "chat":
+        result = asyncio.run(run_chat_benchmark(
+            args.base_url, args.concurrency, args.duration, args.use_cache, args.chars_per_token
+        ))
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        output = f"benchmark_{args.label}.json"
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"결과 저장: {output}")
+    elif args.command == "compare":
+        compare(args.before, args.after)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+음식 카탈로그 레코드 / 불변 스냅샷 (DB 없이 사용 가능)
+- CSV 음식 데이터(foods_data)와 DB 카탈로그(food_catalog)가 함께 사용
+- 재료 → 음식 id, 카테고리 → 음식 id 역색인을 미리 계산
+"""
+
+import random
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+
+def split_ingredients(ingredients: Optional[str]) -> Tuple[str, ...]:
+    """"고기,국물,밥" → ("고기", "국물", "밥")"""
+    if not ingredients:
+        return ()
+    return tuple(tag.strip() for tag in ingredients.split(",") if tag.strip())
+
+
+# ============================================
+# 카탈로그 레코드
+# ============================================
+
+class CatalogFood:
+    """카탈로그 음식 한 개 (읽기 전용)"""
+
+    __slots__ = ("id", "name", "category", "ingredients", "image_url", "description", "ingredient_tags")
+
+    def __init__(self, id, name, category, ingredients, image_url, description, ingredient_tags=None):
+        self.id = id
+        self.name = name
+        self.category = category
+        self.ingredients = ingredients
+        self.image_url = image_url
+        self.description = description
+        self.ingredient_tags = (
+            tuple(ingredient_tags) if ingredient_tags is not None else split_ingredients(ingredients)
+        )
+
+    def __repr__(self):
+        return f"<CatalogFood(name='{self.name}', category='{self.category}')>"
+
+    def to_recommendation(self, reason: str, type: str) -> dict:
+        """추천 응답 형식으로 변환"""
+        return {
+            "name": self.name,
+            "category": self.category,
+            "ingredients": self.ingredients,
+            "imageUrl": self.image_url,
+            "description": reason,
+            "reason": reason,
+            "type": type
+        }
+
+
+# ============================================
+# 카탈로그 스냅샷
+# ============================================
+
+class CatalogSnapshot:
+    """
+    불변 카탈로그 스냅샷
+
+    생성 후에는 수정하지 않으므로 여러 요청에서 락 없이 읽을 수 있습니다.
+    """
+
+    def __init__(self, foods: Iterable[CatalogFood], version: int = 0):
+        self.version = version
+        # 카탈로그에서 파생된 사전 계산 데이터 (교체 전에 리스너가 채움)
+        self.derived: Dict[str, object] = {}
+        self.foods: Tuple[CatalogFood, ...] = tuple(foods)
+        self.by_id: Dict[int, CatalogFood] = {food.id: food for food in self.foods}
+        self.by_name: Dict[str, CatalogFood] = {food.name: food for food in self.foods}
+        self.all_ids: Tuple[int, ...] = tuple(self.by_id)
+
+        ingredient_index: Dict[str, List[int]] = {}
+        category_index: Dict[str, List[int]] = {}
+        for food in self.foods:
+            for tag in food.ingredient_tags:
+                ingredient_index.setdefault(tag, []).append(food.id)
+            if food.category:
+                category_index.setdefault(food.category, []).append(food.id)
+
+        self.ingredient_index: Dict[str, Tuple[int, ...]] = {
+            tag: tuple(ids) for tag, ids in ingredient_index.items()
+        }
+        self.category_index: Dict[str, Tuple[int, ...]] = {
+            category: tuple(ids) for category, ids in category_index.items()
+        }
+
+    def __len__(self):
+        return len(self.foods)
+
+    def ids_by_ingredient(self, ingredient: str) -> Tuple[int, ...]:
+        return self.ingredient_index.get(ingredient, ())
+
+    def ids_by_category(self, category: str) -> Tuple[int, ...]:
+        return self.category_index.get(category, ())
+
+    def sample(self, ids: Sequence[int], k: int, exclude: Set[int] = frozenset()) -> List[CatalogFood]:
+        """
+        id 목록에서 exclude를 제외하고 최대 k개 무작위 추출
+
+        전체 목록을 복사하지 않고 k + len(exclude)개만 뽑은 뒤 걸러내므로
+        제외 대상이 적은 추천 흐름에서는 O(k)입니다.
+        """
+        if k <= 0 or not ids:
+            return []
+
+        picked = random.sample(ids, min(len(ids), k + len(exclude)))
+        return [self.by_id[food_id] for food_id in picked if food_id not in exclude][:k]
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "foods": len(self.foods),
+            "ingredients": len(self.ingredient_index),
+            "categories": len(self.category_index),
+        }
@@ -0,0 +1,258 @@
+"""
+캐릭터 상태 서비스
+- 포만감 감소는 저장하지 않고 조회 시점에 계산 (lazy decay)
+  (저장된 포만감, 마지막 갱신 시각, 현재 시각)만으로 결정되는 순수 함수
+- 다른 변경(식사, 상태 수정)이 있을 때만 감소분을 DB에 반영
+- 모든 변경은 SELECT ... FOR UPDATE로 행을 잠근 뒤 한 번에 적용
+  (같은 사용자의 동시 요청에서도 보상이 유실되지 않음)
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from leveling import apply_exp
+from models import CharacterState
+
+# 1시간당 포만감 감소량 (%)
+SATIETY_DECAY_PER_HOUR = 10
+
+
+# ============================================
+# 포만감 감소 (순수 함수)
+# ============================================
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _as_utc(value: datetime) -> datetime:
+    """tz 정보가 없는 값은 서버 로컬 시간으로 보고 UTC로 변환"""
+    return value.astimezone(timezone.utc)
+
+
+def decayed_satiety(satiety: int, last_update_time: Optional[datetime], now: Optional[datetime] = None) -> int:
+    """
+    시간 경과를 반영한 현재 포만감
+
+    매번 저장된 값과 마지막 갱신 시각에서 새로 계산하므로
+    자주 조회해도 감소분이 잘려 나가지 않습니다.
+
+    Args:
+        satiety: 저장된 포만감
+        last_update_time: 포만감이 마지막으로 저장된 시각
+        now: 기준 시각 (기본값: 현재)
+    """
+    satiety = satiety or 0
+    if last_update_time is None:
+        return satiety
+
+    now = now or utc_now()
+    hours_passed = (_as_utc(now) - _as_utc(last_update_time)).total_seconds() / 3600
+    if hours_passed <= 0:
+        return satiety
+
+    return max(0, satiety - int(hours_passed * SATIETY_DECAY_PER_HOUR))
+
+
+def current_satiety(character: CharacterState, now: Optional[datetime] = None) -> int:
+    """캐릭터의 현재 포만감 (DB에 쓰지 않음)"""
+    return decayed_satiety(character.satiety, character.last_update_time, now)
+
+
+def apply_decay(character: CharacterState, now: Optional[datetime] = None) -> None:
+    """
+    현재까지의 감소분을 저장 값에 반영 (변경 작업 직전에 호출)
+
+    마지막 갱신 시각은 실제로 깎인 포만감만큼의 시간만 앞으로 옮기므로
+    (1 미만으로 잘린 감소분은 다음 계산으로 넘어감) 자주 변경해도 결과가 달라지지 않습니다.
+    포만감이 0이 되면 더 깎일 것이 없으므로 now로 옮깁니다.
+    """
+    now = now or utc_now()
+    stored = character.satiety or 0
+    last_update_time = character.last_update_time
+    satiety = decayed_satiety(stored, last_update_time, now)
+    character.satiety = satiety
+
+    if last_update_time is None or satiety == 0:
+        character.last_update_time = now
+    else:
+        decrease = stored - satiety
+        character.last_update_time = last_update_time + timedelta(hours=decrease / SATIETY_DECAY_PER_HOUR)
+
+
+def character_to_dict(character: CharacterState, now: Optional[datetime] = None) -> dict:
+    """포만감 감소를 반영한 캐릭터 응답"""
+    data = character.to_dict()
+    data["satiety"] = current_satiety(character, now)
+    return data
+
+
+# ============================================
+# 캐릭터 조회 / 변경
+# ============================================
+
+def _select_character(user_id: str):
+    return select(CharacterState).where(CharacterState.user_id == user_id)
+
+
+async def get_or_create_character(db: AsyncSession, user_id: str) -> CharacterState:
+    """캐릭터 조회 (없으면 생성, 동시 생성돼도 한 행만 남음)"""
+    character = (await db.execute(_select_character(user_id))).scalars().first()
+    if character:
+        return character
+
+    await db.execute(
+        pg_insert(CharacterState)
+        .values(user_id=user_id)
+        .on_conflict_do_nothing(index_elements=["user_id"])
+    )
+    await db.commit()
+    return (await db.execute(_select_character(user_id))).scalars().one()
+
+
+async def get_or_create_characters(db: AsyncSession, user_ids: Iterable[str]) -> Dict[str, CharacterState]:
+    """
+    여러 사용자의 캐릭터를 한 번에 조회 (없는 캐릭터는 한 번의 INSERT로 생성)
+
+    사용자마다 조회하지 않고 user_id IN (...) 한 번으로 가져옵니다.
+
+    Returns:
+        dict: {user_id: 캐릭터}
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    if not user_ids:
+        return {}
+
+    query = select(CharacterState).where(CharacterState.user_id.in_(user_ids))
+    characters = {c.user_id: c for c in (await db.execute(query)).scalars()}
+
+    missing = [user_id for user_id in user_ids if user_id not in characters]
+    if missing:
+        await db.execute(
+            pg_insert(CharacterState)
+            .values([{"user_id": user_id} for user_id in missing])
+            .on_conflict_do_nothing(index_elements=["user_id"])
+        )
+        await db.commit()
+        query = select(CharacterState).where(CharacterState.user_id.in_(missing))
+        characters.update((c.user_id, c) for c in (await db.execute(query)).scalars())
+
+    return characters
+
+
+async def lock_character(db: AsyncSession, user_id: str, create: bool = True) -> Optional[CharacterState]:
+    """
+    캐릭터 행을 SELECT ... FOR UPDATE로 잠그고 반환
+
+    잠금은 호출한 쪽에서 commit/rollback 할 때까지 유지됩니다.
+    """
+    if create:
+        await get_or_create_character(db, user_id)
+
+    result = await db.execute(
+        _select_character(user_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().first()
+
+
+def _gain_exp(character: CharacterState, exp_gain: int) -> bool:
+    """경험치 반영 후 레벨업 여부 반환"""
+    if exp_gain <= 0:
+        return False
+    old_level = character.level
+    character.level, character.exp = apply_exp(character.level, character.exp, exp_gain)
+    return character.level > old_level
+
+
+async def apply_meal_reward(
+    db: AsyncSession,
+    user_id: str,
+    satiety_gain: int,
+    friendship_gain: int,
+    exp_gain: int,
+    now: Optional[datetime] = None,
+) -> Tuple[CharacterState, bool]:
+    """
+    식사 보상 적용 (행 잠금 후 한 번에 계산, commit은 호출한 쪽에서)
+
+    Returns:
+        (캐릭터, 레벨업 여부)
+    """
+    now = now or utc_now()
+    character = await lock_character(db, user_id)
+
+    apply_decay(character, now)
+    character.satiety = min(100, character.satiety + satiety_gain)
+    character.friendship = min(100, character.friendship + friendship_gain)
+    character.last_meal_time = now
+    character.diary_count = (character.diary_count or 0) + 1
+    level_up = _gain_exp(character, exp_gain)
+
+    return character, level_up
+
+
+async def update_character(
+    db: AsyncSession,
+    user_id: str,
+    satiety: Optional[int] = None,
+    friendship: Optional[int] = None,
+    exp_gain: int = 0,
+) -> Tuple[Optional[CharacterState], bool]:
+    """
+    캐릭터 상태 직접 수정 (행 잠금 후 한 번에 계산, commit은 호출한 쪽에서)
+
+    Returns:
+        (캐릭터, 레벨업 여부), 캐릭터가 없으면 (None, False)
+    """
+    character = await lock_character(db, user_id, create=False)
+    if character is None:
+        return None, False
+
+    if satiety is not None:
+        # 새 포만감부터 다시 감소 시작
+        character.satiety = max(0, min(100, satiety))
+        character.last_update_time = utc_now()
+    if friendship is not None:
+        character.friendship = max(0, min(100, friendship))
+    level_up = _gain_exp(character, exp_gain)
+
+    return character, level_up
+
+
+async def grant_exp_bulk(db: AsyncSession, grants: Dict[str, int]) -> List[Tuple[str, int, int]]:
+    """
+    여러 사용자에게 경험치 일괄 지급 (이벤트 보상 등, commit은 호출한 쪽에서)
+
+    대상 행을 한 번의 SELECT ... FOR UPDATE로 id 순서대로 잠가
+    동시에 실행되는 다른 일괄 작업과 교착 상태가 생기지 않게 합니다.
+
+    Args:
+        grants: {user_id: 획득 경험치}
+
+    Returns:
+        list: (user_id, 새 레벨, 레벨업 횟수), 캐릭터가 없는 사용자는 제외
+    """
+    if not grants:
+        return []
+
+    result = await db.execute(
+        select(CharacterState)
+        .where(CharacterState.user_id.in_(list(grants)))
+        .order_by(CharacterState.id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    characters = result.scalars().all()
+
+    results = []
+    for character in characters:
+        old_level = character.level
+        character.level, character.exp = apply_exp(character.level, character.exp, grants[character.user_id])
+        results.append((character.user_id, character.level, character.level - old_level))
+    return results
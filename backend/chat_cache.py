@@ -0,0 +1,261 @@
+"""
+챗봇 응답 캐시
+- 첫 질문(이전 대화가 없는 세션)의 답변만 캐시 (대화 맥락이 있으면 답이 달라지므로)
+- 1단계: 정규화한 문장 완전 일치 ("오늘 뭐 먹지?" = "오늘 뭐먹지")
+- 2단계: 글자 n-gram 해싱 벡터의 코사인 유사도 (임베딩 모델 없이 로컬 계산)
+- 부정 표현("안 매운", "고기 말고")이 다르면 비슷해 보여도 같은 질문으로 보지 않음
+- 두 문장에서 달라진 부분에 날씨 / 음식 / 때를 나타내는 말("비" ↔ "눈", "점심" ↔ "저녁")이
+  걸려 있으면 유사도가 높아도 같은 질문으로 보지 않음
+- 캐시된 답변은 LLM 스트림과 같은 조각 단위로 다시 흘려보냄
+"""
+
+import difflib
+import os
+import re
+import time
+import unicodedata
+import zlib
+from collections import OrderedDict
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CHAT_CACHE_ENABLED = os.getenv("CHAT_CACHE_ENABLED", "true").lower() == "true"
+CHAT_CACHE_MAX_SIZE = int(os.getenv("CHAT_CACHE_MAX_SIZE", "1000"))
+CHAT_CACHE_TTL = float(os.getenv("CHAT_CACHE_TTL", "3600"))  # 초
+# 이 값 이상이면 같은 질문으로 봄 (0 ~ 1)
+CHAT_CACHE_SIMILARITY = float(os.getenv("CHAT_CACHE_SIMILARITY", "0.9"))
+# 해싱 벡터 차원
+CHAT_CACHE_DIM = int(os.getenv("CHAT_CACHE_DIM", "1024"))
+
+# 뜻을 뒤집는 표현 (포함 여부가 다르면 유사도 매칭 안 함)
+NEGATIONS = ("안", "않", "못", "말고", "빼고", "없는", "싫")
+
+# 답을 바꾸는 내용어 (두 문장의 달라진 부분에 걸려 있으면 유사도 매칭 안 함)
+CONTENT_WORDS = (
+    # 날씨 / 계절 / 때
+    "비", "눈", "더운", "덥", "더위", "추운", "춥", "추위", "쌀쌀", "맑", "흐린", "흐리", "바람",
+    "장마", "습한", "여름", "겨울", "봄", "가을", "아침", "점심", "저녁", "야식", "해장",
+    # 음식 종류 / 재료 / 맛
+    "한식", "중식", "일식", "양식", "분식", "패스트푸드", "고기", "국물", "면", "밥", "해산물",
+    "야채", "닭", "튀김", "국", "찌개", "탕", "죽", "빵", "떡", "회", "초밥", "피자", "치킨",
+    "라면", "김치", "디저트", "매운", "맵", "달달", "단", "짠", "싱거운", "느끼",
+    "다이어트", "채식", "비건",
+)
+
+_IGNORED = re.compile(r"[\s\W_]+", re.UNICODE)
+# ㅋㅋ, ㅎㅎ, ㅠㅠ 같은 자모만 있는 표현 (NFKC 후에는 조합형 자모로 바뀜)
+_JAMO = re.compile(r"[\u1100-\u11ff\u3131-\u318e]+")
+# 뜻이 같은 말끝 (문장 끝에서만 치환)
+_ENDINGS = (
+    ("해주세요", "해줘"),
+    ("해주라", "해줘"),
+    ("해줄래", "해줘"),
+    ("해줘요", "해줘"),
+    ("좀", ""),
+)
+
+
+# ============================================
+# 문장 → 키 / 벡터
+# ============================================
+
+def normalize(message: str) -> str:
+    """완전 일치용 키 (유니코드 정규화, 소문자, 공백/문장부호/자모 제거, 말끝 통일)"""
+    key = _IGNORED.sub("", unicodedata.normalize("NFKC", message).lower())
+    key = _JAMO.sub("", key)
+    for old, new in _ENDINGS:
+        if key.endswith(old):
+            key = key[:-len(old)] + new
+    return key
+
+
+def negations(key: str) -> FrozenSet[str]:
+    return frozenset(word for word in NEGATIONS if word in key)
+
+
+def _touches_content(key: str, start: int, end: int) -> bool:
+    """key[start:end] 구간과 겹치는 내용어가 있는지"""
+    if start >= end:
+        return False
+    for word in CONTENT_WORDS:
+        pos = key.find(word)
+        while pos != -1:
+            if pos < end and start < pos + len(word):
+                return True
+            pos = key.find(word, pos + 1)
+    return False
+
+
+def content_changed(a: str, b: str) -> bool:
+    """
+    정규화 키 a, b에서 달라진 부분에 내용어가 걸려 있는지
+
+    "비오는날먹을음식추천해줘" / "눈오는날먹을음식추천해줘"처럼 한 글자만 달라
+    n-gram 유사도는 높지만 답이 달라지는 질문을 거릅니다.
+    """
+    matcher = difflib.SequenceMatcher(None, a, b, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != "equal" and (_touches_content(a, i1, i2) or _touches_content(b, j1, j2)):
+            return True
+    return False
+
+
+def vectorize(key: str, dim: int = CHAT_CACHE_DIM) -> np.ndarray:
+    """
+    글자 1~3-gram 해싱 벡터 (L2 정규화)
+
+    한국어는 띄어쓰기가 들쭉날쭉하므로 단어가 아니라 글자 n-gram을 사용합니다.
+    crc32 해시라 프로세스가 달라도 같은 벡터가 나옵니다.
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    for n, weight in ((1, 0.5), (2, 1.0), (3, 1.0)):
+        for i in range(len(key) - n + 1):
+            h = zlib.crc32(key[i:i + n].encode("utf-8"))
+            vector[h % dim] += weight if (h >> 31) & 1 else -weight
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+# ============================================
+# 캐시
+# ============================================
+
+class ChatResponseCache:
+    """
+    정규화 키 → 답변 조각 (TTL + LRU)
+
+    벡터는 (최대 크기, 차원) 행렬의 고정 슬롯에 보관해
+    유사 질문 검색이 행렬-벡터 곱 한 번으로 끝납니다.
+    """
+
+    def __init__(
+        self,
+        max_size: int = CHAT_CACHE_MAX_SIZE,
+        ttl: float = CHAT_CACHE_TTL,
+        similarity: float = CHAT_CACHE_SIMILARITY,
+        dim: int = CHAT_CACHE_DIM,
+        enabled: bool = CHAT_CACHE_ENABLED,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.similarity = similarity
+        self.dim = dim
+        self.enabled = enabled
+
+        self._vectors = np.zeros((max_size, dim), dtype=np.float32)
+        # key → (만료 시각, 슬롯, 답변 조각)
+        self._entries: "OrderedDict[str, Tuple[float, int, Tuple[str, ...]]]" = OrderedDict()
+        self._slot_keys: Dict[int, str] = {}
+        self._free_slots: List[int] = list(range(max_size - 1, -1, -1))
+
+        # 통계
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.skipped = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key: str) -> None:
+        _, slot, _ = self._entries.pop(key)
+        del self._slot_keys[slot]
+        self._vectors[slot] = 0.0
+        self._free_slots.append(slot)
+
+    def _get_entry(self, key: str, now: float) -> Optional[Tuple[str, ...]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= now:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[2]
+
+    def lookup(self, message: str) -> Optional[Tuple[str, ...]]:
+        """캐시된 답변 조각 (없으면 None)"""
+        if not self.enabled:
+            return None
+        key = normalize(message)
+        if not key:
+            return None
+
+        now = time.monotonic()
+        chunks = self._get_entry(key, now)
+        if chunks is not None:
+            self.exact_hits += 1
+            return chunks
+
+        if self._entries:
+            scores = self._vectors @ vectorize(key, self.dim)
+            slot = int(np.argmax(scores))
+            match = self._slot_keys.get(slot)
+            if (
+                match is not None
+                and scores[slot] >= self.similarity
+                and negations(match) == negations(key)
+                and not content_changed(match, key)
+            ):
+                chunks = self._get_entry(match, now)
+                if chunks is not None:
+                    self.semantic_hits += 1
+                    return chunks
+
+        self.misses += 1
+        return None
+
+    def skip(self) -> None:
+        """캐시 대상이 아닌 요청 (이전 대화가 있는 세션)"""
+        self.skipped += 1
+
+    def store(self, message: str, chunks: Sequence[str]) -> None:
+        """완료된 답변 저장 (가장 오래 사용하지 않은 항목부터 밀려남)"""
+        if not self.enabled:
+            return
+        key = normalize(message)
+        if not key or not any(chunks):
+            return
+
+        if key in self._entries:
+            self._remove(key)
+        while not self._free_slots:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+        slot = self._free_slots.pop()
+        self._vectors[slot] = vectorize(key, self.dim)
+        self._slot_keys[slot] = key
+        self._entries[key] = (time.monotonic() + self.ttl, slot, tuple(chunks))
+        self.stores += 1
+
+    def clear(self) -> None:
+        for key in list(self._entries):
+            self._remove(key)
+
+    def stats(self) -> dict:
+        hits = self.exact_hits + self.semantic_hits
+        lookups = hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "similarity": self.similarity,
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "skipped": self.skipped,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+chat_cache = ChatResponseCache()
@@ -0,0 +1,451 @@
+"""
+챗봇 대화 세션 저장소
+- 세션 수 제한(LRU) + 마지막 사용 후 만료(TTL)로 메모리 사용량 제한
+- 세션마다 최근 메시지만 LLM에 보냄 (최대 메시지 수 / 최대 토큰 수 창)
+- 창 밖으로 밀려난 대화는 선택적으로 요약해 시스템 메시지로 유지
+- 선택적 영구 저장소 (SQLite / Postgres 등 SQLAlchemy URL)
+- 세션 수, 메시지 수, 토큰/바이트 사용량 통계
+
+Usage:
+    session_store = ChatSessionStore()
+    history = session_store.get(session_id)   # RunnableWithMessageHistory용
+"""
+
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, List, Optional, Sequence
+
+from dotenv import load_dotenv
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import BaseMessage, SystemMessage, messages_from_dict, messages_to_dict
+from sqlalchemy import Column, DateTime, MetaData, String, Table, Text, create_engine, delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+load_dotenv()
+
+# 메모리에 유지할 최대 세션 수 (초과 시 가장 오래 사용하지 않은 세션부터 제거)
+CHAT_MAX_SESSIONS = int(os.getenv("CHAT_MAX_SESSIONS", "1000"))
+# 마지막 대화 후 세션 유지 시간 (초)
+CHAT_SESSION_TTL = float(os.getenv("CHAT_SESSION_TTL", "1800"))
+# 세션당 LLM에 보낼 최대 메시지 수 / 최대 토큰 수
+CHAT_MAX_MESSAGES = int(os.getenv("CHAT_MAX_MESSAGES", "20"))
+CHAT_MAX_TOKENS = int(os.getenv("CHAT_MAX_TOKENS", "2000"))
+# 창 밖으로 밀려난 대화 요약 여부 (요약에도 LLM 호출 비용이 듦)
+CHAT_SUMMARY_ENABLED = os.getenv("CHAT_SUMMARY_ENABLED", "false").lower() == "true"
+# 밀려난 메시지가 이만큼 모이면 한 번에 요약 (턴마다 요약 호출하지 않도록)
+CHAT_SUMMARY_MIN_MESSAGES = int(os.getenv("CHAT_SUMMARY_MIN_MESSAGES", "6"))
+# 토큰 계산용 인코딩
+CHAT_TOKEN_ENCODING = os.getenv("CHAT_TOKEN_ENCODING", "o200k_base")
+# 설정 시 세션을 영구 저장 (예: sqlite:///chat_sessions.db, DATABASE_URL)
+CHAT_SESSION_DB_URL = os.getenv("CHAT_SESSION_DB_URL")
+
+# (기존 요약, 밀려난 메시지) → 새 요약
+Summarizer = Callable[[str, Sequence[BaseMessage]], Awaitable[str]]
+
+
+# ============================================
+# 토큰 계산
+# ============================================
+
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """
+    토큰 수 계산 (tiktoken)
+
+    인코딩 파일을 받을 수 없는 환경에서는 UTF-8 4바이트 ≈ 1토큰으로 추정합니다.
+    """
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding(CHAT_TOKEN_ENCODING)
+        except Exception as e:
+            print(f"[chat_sessions] tiktoken 사용 불가, 토큰 수를 추정합니다: {e}")
+            _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text))
+    return max(1, len(text.encode("utf-8")) // 4)
+
+
+def _text(message: BaseMessage) -> str:
+    content = message.content
+    return content if isinstance(content, str) else json.dumps(content, ensure_ascii=False)
+
+
+# ============================================
+# 세션 대화 기록
+# ============================================
+
+class WindowedChatHistory(BaseChatMessageHistory):
+    """
+    최근 메시지 창만 유지하는 대화 기록
+
+    messages는 [요약 시스템 메시지] + 창 안의 메시지이며 LLM에는 이것만 전달됩니다.
+    창은 항상 사용자 메시지로 시작하도록 (질문/답변 쌍 단위로) 잘라냅니다.
+    """
+
+    def __init__(
+        self,
+        max_messages: int = CHAT_MAX_MESSAGES,
+        max_tokens: int = CHAT_MAX_TOKENS,
+        summarizer: Optional[Summarizer] = None,
+        on_trim: Optional[Callable[[int], None]] = None,
+        on_summary: Optional[Callable[[bool], None]] = None,
+    ):
+        self.max_messages = max_messages
+        self.max_tokens = max_tokens
+        self.summarizer = summarizer
+        self.on_trim = on_trim
+        self.on_summary = on_summary
+
+        self.summary = ""
+        self.window: List[BaseMessage] = []
+        self._tokens: List[int] = []  # window와 같은 순서의 메시지별 토큰 수
+        self._pending: List[BaseMessage] = []  # 아직 요약하지 않은 밀려난 메시지
+        self._summary_task: Optional[asyncio.Task] = None
+
+    # ----- BaseChatMessageHistory -----
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        if self.summary:
+            return [SystemMessage(content=f"이전 대화 요약: {self.summary}"), *self.window]
+        return list(self.window)
+
+    async def aget_messages(self) -> List[BaseMessage]:
+        # 메모리만 읽으므로 스레드 풀을 거치지 않음
+        return self.messages
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        for message in messages:
+            self.window.append(message)
+            self._tokens.append(count_tokens(_text(message)))
+        self._trim()
+
+    async def aadd_messages(self, messages: Sequence[BaseMessage]) -> None:
+        self.add_messages(messages)
+
+    def clear(self) -> None:
+        self.summary = ""
+        self.window.clear()
+        self._tokens.clear()
+        self._pending.clear()
+
+    # ----- 창 관리 -----
+
+    @property
+    def token_count(self) -> int:
+        return sum(self._tokens)
+
+    @property
+    def byte_count(self) -> int:
+        return len(self.summary.encode("utf-8")) + sum(len(_text(m).encode("utf-8")) for m in self.window)
+
+    def _trim(self) -> None:
+        trimmed = 0
+        # 마지막 메시지는 항상 남김
+        while len(self.window) > 1 and (len(self.window) > self.max_messages or self.token_count > self.max_tokens):
+            self._evict_one()
+            trimmed += 1
+            # 답변만 남지 않도록 사용자 메시지가 나올 때까지 함께 제거
+            while len(self.window) > 1 and self.window[0].type != "human":
+                self._evict_one()
+                trimmed += 1
+
+        if trimmed:
+            if self.on_trim:
+                self.on_trim(trimmed)
+            self._schedule_summary()
+
+    def _evict_one(self) -> None:
+        message = self.window.pop(0)
+        self._tokens.pop(0)
+        if self.summarizer:
+            self._pending.append(message)
+            # 요약이 계속 실패해도 밀려난 메시지가 쌓이지 않게 제한
+            del self._pending[:-self.max_messages]
+
+    def _schedule_summary(self) -> None:
+        """밀려난 메시지 요약 (이벤트 루프가 있을 때만, 세션당 하나씩 백그라운드로)"""
+        if not self.summarizer or len(self._pending) < min(CHAT_SUMMARY_MIN_MESSAGES, self.max_messages):
+            return
+        if self._summary_task is not None and not self._summary_task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # 동기 실행 중이면 다음 비동기 대화 때 요약
+        self._summary_task = loop.create_task(self._summarize())
+
+    async def _summarize(self) -> None:
+        pending, self._pending = self._pending, []
+        try:
+            self.summary = await self.summarizer(self.summary, pending)
+            ok = True
+        except Exception as e:
+            ok = False
+            print(f"[chat_sessions] 대화 요약 실패: {e}")
+        if self.on_summary:
+            self.on_summary(ok)
+
+    # ----- 직렬화 -----
+
+    def to_dict(self) -> dict:
+        return {"summary": self.summary, "messages": messages_to_dict(self.window)}
+
+    def load_dict(self, data: dict) -> None:
+        self.clear()
+        self.summary = data.get("summary") or ""
+        self.add_messages(messages_from_dict(data.get("messages") or []))
+
+
+# ============================================
+# 영구 저장소
+# ============================================
+
+class SQLChatSessionBackend:
+    """
+    SQLAlchemy URL로 지정한 DB에 세션 저장 (SQLite, Postgres 등)
+
+    동기 드라이버를 사용하므로 비동기 코드에서는 asyncio.to_thread로 호출합니다.
+    """
+
+    def __init__(self, url: str):
+        self.engine = create_engine(url, pool_pre_ping=True)
+        metadata = MetaData()
+        self.table = Table(
+            "chat_sessions",
+            metadata,
+            Column("session_id", String(100), primary_key=True),
+            Column("summary", Text, nullable=False, default=""),
+            Column("messages", Text, nullable=False),  # messages_to_dict JSON
+            Column("updated_at", DateTime(timezone=True), server_default=func.now(), onupdate=func.now()),
+        )
+        metadata.create_all(self.engine)
+        self._dialect_insert = {
+            "postgresql": postgresql.insert,
+            "sqlite": sqlite.insert,
+        }.get(self.engine.dialect.name)
+
+    def load(self, session_id: str) -> Optional[dict]:
+        with self.engine.connect() as conn:
+            row = conn.execute(
+                select(self.table.c.summary, self.table.c.messages).where(self.table.c.session_id == session_id)
+            ).first()
+        if row is None:
+            return None
+        return {"summary": row.summary, "messages": json.loads(row.messages)}
+
+    def save(self, session_id: str, data: dict) -> None:
+        values = {
+            "session_id": session_id,
+            "summary": data["summary"],
+            "messages": json.dumps(data["messages"], ensure_ascii=False),
+        }
+        with self.engine.begin() as conn:
+            if self._dialect_insert is not None:
+                stmt = self._dialect_insert(self.table).values(**values)
+                conn.execute(stmt.on_conflict_do_update(
+                    index_elements=[self.table.c.session_id],
+                    set_={"summary": stmt.excluded.summary, "messages": stmt.excluded.messages},
+                ))
+            else:
+                conn.execute(delete(self.table).where(self.table.c.session_id == session_id))
+                conn.execute(self.table.insert().values(**values))
+
+    def delete(self, session_id: str) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(delete(self.table).where(self.table.c.session_id == session_id))
+
+    def close(self) -> None:
+        self.engine.dispose()
+
+
+# ============================================
+# 세션 저장소
+# ============================================
+
+class ChatSessionStore:
+    """session_id → WindowedChatHistory (LRU + TTL, 선택적 영구 저장소)"""
+
+    def __init__(
+        self,
+        max_sessions: int = CHAT_MAX_SESSIONS,
+        ttl: float = CHAT_SESSION_TTL,
+        backend: Optional[SQLChatSessionBackend] = None,
+        summarizer: Optional[Summarizer] = None,
+    ):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.backend = backend
+        self.summarizer = summarizer
+        self._sessions: "OrderedDict[str, tuple]" = OrderedDict()  # session_id → (만료 시각, 기록)
+
+        # 통계
+        self.created = 0
+        self.loaded = 0
+        self.saved = 0
+        self.backend_errors = 0
+        self.lru_evictions = 0
+        self.ttl_evictions = 0
+        self.trimmed_messages = 0
+        self.summaries = 0
+        self.summary_errors = 0
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def _new_history(self) -> WindowedChatHistory:
+        return WindowedChatHistory(
+            summarizer=self.summarizer,
+            on_trim=self._count_trim,
+            on_summary=self._count_summary,
+        )
+
+    def _count_trim(self, count: int) -> None:
+        self.trimmed_messages += count
+
+    def _count_summary(self, ok: bool) -> None:
+        if ok:
+            self.summaries += 1
+        else:
+            self.summary_errors += 1
+
+    def _expire(self, now: float) -> None:
+        """만료된 세션 제거 (사용 순서대로 정렬돼 있으므로 앞에서부터 확인)"""
+        while self._sessions:
+            session_id, (expires_at, _) = next(iter(self._sessions.items()))
+            if expires_at > now:
+                break
+            del self._sessions[session_id]
+            self.ttl_evictions += 1
+
+    def _put(self, session_id: str, history: WindowedChatHistory, now: float) -> None:
+        self._sessions[session_id] = (now + self.ttl, history)
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.lru_evictions += 1
+
+    def _load_history(self, data: Optional[dict]) -> WindowedChatHistory:
+        history = self._new_history()
+        if data:
+            history.load_dict(data)
+            self.loaded += 1
+        else:
+            self.created += 1
+        return history
+
+    def get(self, session_id: str) -> WindowedChatHistory:
+        """
+        세션 기록 조회 (없으면 영구 저장소에서 읽거나 새로 생성)
+
+        비동기 코드에서는 먼저 await prepare(session_id)로 읽어 두면
+        여기서는 메모리만 조회합니다.
+        """
+        now = time.monotonic()
+        self._expire(now)
+
+        entry = self._sessions.get(session_id)
+        if entry is not None:
+            history = entry[1]
+        else:
+            data = None
+            if self.backend is not None:
+                try:
+                    data = self.backend.load(session_id)
+                except Exception as e:
+                    self.backend_errors += 1
+                    print(f"[chat_sessions] 세션 불러오기 실패: {e}")
+            history = self._load_history(data)
+
+        self._put(session_id, history, now)
+        return history
+
+    async def prepare(self, session_id: str) -> WindowedChatHistory:
+        """영구 저장소 조회를 스레드에서 실행한 뒤 세션 기록 반환 (이벤트 루프를 막지 않음)"""
+        now = time.monotonic()
+        self._expire(now)
+        if session_id in self._sessions or self.backend is None:
+            return self.get(session_id)
+
+        try:
+            data = await asyncio.to_thread(self.backend.load, session_id)
+        except Exception as e:
+            self.backend_errors += 1
+            print(f"[chat_sessions] 세션 불러오기 실패: {e}")
+            data = None
+
+        # 읽는 동안 다른 요청이 같은 세션을 만들었으면 그쪽을 사용
+        if session_id in self._sessions:
+            return self.get(session_id)
+        history = self._load_history(data)
+        self._put(session_id, history, time.monotonic())
+        return history
+
+    async def persist(self, session_id: str) -> None:
+        """대화 한 턴이 끝난 뒤 영구 저장소에 기록"""
+        entry = self._sessions.get(session_id)
+        if self.backend is None or entry is None:
+            return
+        data = entry[1].to_dict()  # 이벤트 루프에서 복사한 뒤 스레드에서 저장
+        try:
+            await asyncio.to_thread(self.backend.save, session_id, data)
+            self.saved += 1
+        except Exception as e:
+            self.backend_errors += 1
+            print(f"[chat_sessions] 세션 저장 실패: {e}")
+
+    def remove(self, session_id: str) -> None:
+        self._sessions.pop(session_id, None)
+        if self.backend is not None:
+            self.backend.delete(session_id)
+
+    def close(self) -> None:
+        self._sessions.clear()
+        if self.backend is not None:
+            self.backend.close()
+
+    def stats(self) -> dict:
+        self._expire(time.monotonic())
+        histories = [history for _, history in self._sessions.values()]
+        messages = sum(len(history.window) for history in histories)
+        return {
+            "sessions": len(histories),
+            "max_sessions": self.max_sessions,
+            "ttl": self.ttl,
+            "messages": messages,
+            "avg_messages": round(messages / len(histories), 2) if histories else 0.0,
+            "tokens": sum(history.token_count for history in histories),
+            "bytes": sum(history.byte_count for history in histories),
+            "max_messages": CHAT_MAX_MESSAGES,
+            "max_tokens": CHAT_MAX_TOKENS,
+            "created": self.created,
+            "loaded": self.loaded,
+            "saved": self.saved,
+            "lru_evictions": self.lru_evictions,
+            "ttl_evictions": self.ttl_evictions,
+            "trimmed_messages": self.trimmed_messages,
+            "summary_enabled": self.summarizer is not None,
+            "summaries": self.summaries,
+            "summary_errors": self.summary_errors,
+            "backend": self.backend.engine.dialect.name if self.backend is not None else "memory",
+            "backend_errors": self.backend_errors,
+        }
+
+
+def create_session_store(summarizer: Optional[Summarizer] = None) -> ChatSessionStore:
+    """환경변수 설정으로 세션 저장소 생성"""
+    backend = SQLChatSessionBackend(CHAT_SESSION_DB_URL) if CHAT_SESSION_DB_URL else None
+    return ChatSessionStore(
+        backend=backend,
+        summarizer=summarizer if CHAT_SUMMARY_ENABLED else None,
+    )
@@ -1,26 +1,63 @@
 import os
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, SystemMessage
-from langchain_core.chat_history import InMemoryChatMessageHistory
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
 from langchain_core.runnables.history import RunnableWithMessageHistory
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from chat_sessions import WindowedChatHistory, create_session_store
+from chat_cache import chat_cache
 
 load_dotenv()
 
-model = ChatOpenAI(
-    model=os.getenv("DEPLOYMENT_NAME"),
-    api_key=os.getenv("OPENAI_API_KEY"),
-    base_url=os.getenv("ENDPOINT_URL").rstrip("/") + "/openai/v1/",
-    temperature=0.7,
-)
+# 사용할 챗 모델: openai (기본) / fake (로컬 가짜 모델, 부하 테스트용)
+CHAT_MODEL_PROVIDER = os.getenv("CHAT_MODEL_PROVIDER", "openai").lower()
+
+
+def create_chat_model(provider: str = CHAT_MODEL_PROVIDER):
+    """
+    설정에 맞는 챗 모델 생성
+
+    fake는 API 키/엔드포인트 없이 동작하며 FAKE_LLM_TOKENS_PER_SEC, FAKE_LLM_TTFT_MS로
+    스트리밍 속도를 조절합니다.
+    """
+    if provider == "fake":
+        from fake_chat_model import FakeStreamingChatModel
+        return FakeStreamingChatModel(
+            tokens_per_sec=float(os.getenv("FAKE_LLM_TOKENS_PER_SEC", "50")),
+            ttft=float(os.getenv("FAKE_LLM_TTFT_MS", "300")) / 1000,
+        )
+    if provider == "openai":
+        from langchain_openai import ChatOpenAI
+        return ChatOpenAI(
+            model=os.getenv("DEPLOYMENT_NAME"),
+            api_key=os.getenv("OPENAI_API_KEY"),
+            base_url=os.getenv("ENDPOINT_URL").rstrip("/") + "/openai/v1/",
+            temperature=0.7,
+        )
+    raise ValueError(f"알 수 없는 CHAT_MODEL_PROVIDER 입니다: {provider}")
+
+
+model = create_chat_model()
+
+async def summarize_history(summary: str, messages) -> str:
+    """대화 창 밖으로 밀려난 메시지를 기존 요약과 합쳐 짧게 요약"""
+    transcript = "\n".join(
+        f"{'사용자' if message.type == 'human' else '밥토리'}: {message.content}" for message in messages
+    )
+    response = await model.ainvoke([
+        SystemMessage(content=(
+            "다음 대화를 음식 추천에 필요한 정보(취향, 싫어하는 음식, 이미 추천한 메뉴) 위주로 "
+            "세 문장 이내로 요약해줘."
+        )),
+        HumanMessage(content=f"기존 요약: {summary or '없음'}\n\n대화:\n{transcript}"),
+    ])
+    return response.content
 
-store = {}
 
-def get_session_history(session_id: str) -> InMemoryChatMessageHistory:
-    if session_id not in store:
-        store[session_id] = InMemoryChatMessageHistory()
-    return store[session_id]
+# 세션별 대화 기록 (LRU + TTL, 최근 메시지 창만 LLM에 전달)
+session_store = create_session_store(summarizer=summarize_history)
+
+def get_session_history(session_id: str) -> WindowedChatHistory:
+    return session_store.get(session_id)
 
 prompt = ChatPromptTemplate.from_messages([
     (
@@ -43,6 +80,38 @@ with_message_history = RunnableWithMessageHistory(
     history_messages_key="history",
 )
 
+
+async def stream_chat(session_id: str, message: str):
+    """
+    대화 한 턴 스트리밍 (응답 캐시 → LLM)
+
+    이전 대화가 없는 첫 질문은 응답 캐시를 먼저 확인하고,
+    캐시된 답변도 같은 조각 단위로 흘려보낸 뒤 대화 기록에 남깁니다.
+    """
+    history = session_store.get(session_id)
+    first_turn = not history.messages
+    cached = chat_cache.lookup(message) if first_turn else None
+    if not first_turn:
+        chat_cache.skip()
+
+    if cached is not None:
+        for chunk in cached:
+            yield chunk
+        await history.aadd_messages([HumanMessage(content=message), AIMessage(content="".join(cached))])
+    else:
+        chunks = []
+        config = {"configurable": {"session_id": session_id}}
+        async for chunk in with_message_history.astream({"message": message}, config=config):
+            chunks.append(chunk.content)
+            yield chunk.content
+        # 끝까지 받은 첫 질문 답변만 캐시
+        if first_turn:
+            chat_cache.store(message, chunks)
+
+    # 한 턴이 끝나면 세션 저장 (영구 저장소 사용 시)
+    await session_store.persist(session_id)
+
+
 if __name__ == "__main__":
     print("밥토리: 안녕! 오늘 어떤 음식이 먹고싶어?")
     
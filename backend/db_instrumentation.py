@@ -0,0 +1,232 @@
+"""
+SQL 쿼리 계측
+- SQLAlchemy 이벤트 훅으로 쿼리별 실행 시간, 행 수, 호출한 엔드포인트 수집
+  (행 수를 알 수 없는 쿼리(rowcount -1, 서버 측 커서 등)는 따로 집계)
+- 엔드포인트는 순수 ASGI 미들웨어에서 contextvar로 기록 (응답 본문을 감싸지 않음)
+- 느린 쿼리는 항상, 나머지는 샘플링해서 로그로 기록
+- 로그는 큐를 거쳐 별도 스레드에서 출력하므로 요청 처리 경로를 막지 않음
+- 설정은 환경변수로 (echo=True 하드코딩 대체)
+"""
+
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+load_dotenv()
+
+# 개발 시 SQLAlchemy 기본 SQL 출력 (운영에서는 false)
+SQL_ECHO = os.getenv("SQL_ECHO", "false").lower() == "true"
+# 구조화 쿼리 로그 사용 여부
+SQL_LOG_ENABLED = os.getenv("SQL_LOG_ENABLED", "true").lower() == "true"
+# 일반 쿼리 로그 샘플링 비율 (0.0 ~ 1.0)
+SQL_LOG_SAMPLE_RATE = float(os.getenv("SQL_LOG_SAMPLE_RATE", "0.01"))
+# 이 시간(ms) 이상 걸린 쿼리는 샘플링과 상관없이 기록
+SQL_SLOW_QUERY_MS = float(os.getenv("SQL_SLOW_QUERY_MS", "200"))
+# 로그에 남길 SQL 최대 길이
+SQL_LOG_MAX_STATEMENT = int(os.getenv("SQL_LOG_MAX_STATEMENT", "500"))
+
+# 현재 요청의 엔드포인트 (EndpointContextMiddleware에서 설정)
+current_endpoint: ContextVar[str] = ContextVar("current_endpoint", default="-")
+
+logger = logging.getLogger("babtori.sql")
+logger.propagate = False
+
+_log_queue: "queue.Queue" = queue.Queue(maxsize=10000)
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """큐가 가득 차면 기다리지 않고 버림"""
+
+    dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _DroppingQueueHandler.dropped += 1
+
+
+# ============================================
+# 집계 통계
+# ============================================
+
+class QueryStats:
+    """엔드포인트별 쿼리 수 / 누적 시간 / 행 수"""
+
+    def __init__(self):
+        self.queries = 0
+        self.slow_queries = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.rows_unknown = 0
+        self.by_endpoint: Dict[str, Dict[str, float]] = {}
+
+    def record(self, endpoint: str, elapsed_ms: float, slow: bool, rows: Optional[int] = None) -> None:
+        """rows가 None이면 행 수를 알 수 없는 쿼리로 집계"""
+        self.queries += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        if slow:
+            self.slow_queries += 1
+        if rows is None:
+            self.rows_unknown += 1
+        else:
+            self.rows += rows
+
+        stats = self.by_endpoint.setdefault(
+            endpoint, {"queries": 0, "total_ms": 0.0, "slow": 0, "rows": 0, "rows_unknown": 0}
+        )
+        stats["queries"] += 1
+        stats["total_ms"] += elapsed_ms
+        if slow:
+            stats["slow"] += 1
+        if rows is None:
+            stats["rows_unknown"] += 1
+        else:
+            stats["rows"] += rows
+
+    def to_dict(self) -> dict:
+        return {
+            "queries": self.queries,
+            "slow_queries": self.slow_queries,
+            "avg_ms": round(self.total_ms / self.queries, 3) if self.queries else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "rows": self.rows,
+            # 행 수를 알 수 없는 쿼리 수 (asyncpg 서버 측 커서 등 rowcount = -1)
+            "rows_unknown": self.rows_unknown,
+            "slow_query_ms": SQL_SLOW_QUERY_MS,
+            "sample_rate": SQL_LOG_SAMPLE_RATE,
+            "dropped_logs": _DroppingQueueHandler.dropped,
+            "endpoints": {
+                endpoint: {
+                    "queries": int(stats["queries"]),
+                    "avg_ms": round(stats["total_ms"] / stats["queries"], 3),
+                    "slow": int(stats["slow"]),
+                    "rows": int(stats["rows"]),
+                    "rows_unknown": int(stats["rows_unknown"]),
+                }
+                for endpoint, stats in self.by_endpoint.items()
+            },
+        }
+
+
+query_stats = QueryStats()
+
+
+# ============================================
+# 이벤트 훅
+# ============================================
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+
+    endpoint = current_endpoint.get()
+    slow = elapsed_ms >= SQL_SLOW_QUERY_MS
+    # 드라이버가 행 수를 모르면 -1 (서버 측 커서로 읽는 SELECT 등)
+    rowcount = getattr(cursor, "rowcount", -1)
+    rows = rowcount if rowcount is not None and rowcount >= 0 else None
+    query_stats.record(endpoint, elapsed_ms, slow, rows)
+
+    if not SQL_LOG_ENABLED:
+        return
+    if not slow and random.random() >= SQL_LOG_SAMPLE_RATE:
+        return
+
+    logger.log(
+        logging.WARNING if slow else logging.INFO,
+        json.dumps({
+            "event": "slow_query" if slow else "query",
+            "endpoint": endpoint,
+            "elapsed_ms": round(elapsed_ms, 3),
+            "rows": rows,
+            "executemany": executemany,
+            "statement": " ".join(statement.split())[:SQL_LOG_MAX_STATEMENT],
+        }, ensure_ascii=False),
+    )
+
+
+# ============================================
+# 엔드포인트 기록 미들웨어
+# ============================================
+
+class EndpointContextMiddleware:
+    """
+    요청 경로를 current_endpoint에 기록하는 순수 ASGI 미들웨어
+
+    @app.middleware("http")(BaseHTTPMiddleware)와 달리 요청마다 태스크를 더 만들거나
+    스트리밍 응답 본문을 감싸지 않습니다. 스트리밍 응답도 같은 태스크에서 보내므로
+    본문을 만드는 동안의 쿼리도 같은 엔드포인트로 집계됩니다.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = current_endpoint.set(f"{scope['method']} {scope['path']}")
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_endpoint.reset(token)
+
+
+def _start_listener() -> None:
+    global _listener
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+    logger.addHandler(_DroppingQueueHandler(_log_queue))
+    logger.setLevel(logging.INFO)
+
+    _listener = logging.handlers.QueueListener(_log_queue, stream_handler)
+    _listener.start()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    엔진에 쿼리 계측 훅 등록
+
+    비동기 엔진은 async_engine.sync_engine을 넘깁니다.
+    """
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    if SQL_LOG_ENABLED:
+        _start_listener()
+
+
+def stop_query_log() -> None:
+    """남은 로그를 출력하고 로그 스레드 종료 (앱 종료 시)"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def get_query_stats() -> dict:
+    return query_stats.to_dict()
@@ -0,0 +1,250 @@
+"""
+음식 일기 조회 서비스
+- (created_at, id) 기준 커서(keyset) 페이지네이션
+- fields= 로 필요한 컬럼만 조회 (예: 달력 화면은 날짜 + 이름만)
+- 전체 일기 스트리밍 내보내기 (NDJSON / CSV)
+"""
+
+import base64
+import csv
+import io
+import json
+import re
+import unicodedata
+from datetime import datetime
+from typing import AsyncIterator, Optional, Tuple
+from urllib.parse import quote
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import AsyncSessionLocal
+from models import CharacterState, FoodRecord
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# 내보내기 시 DB 서버 커서에서 한 번에 가져오는 행 수
+EXPORT_BATCH_SIZE = 500
+EXPORT_FORMATS = ("ndjson", "csv")
+
+# fields= 로 요청할 수 있는 컬럼 (FoodRecord.to_dict()와 동일)
+DIARY_FIELDS = (
+    "id", "user_id", "food_name", "category", "ingredients", "is_recommended",
+    "satiety_gain", "friendship_gain", "exp_gain", "photo_url",
+    "weather_condition", "temperature", "created_at",
+)
+
+# 커서를 만들기 위해 항상 조회하는 컬럼
+CURSOR_FIELDS = ("created_at", "id")
+
+
+# ============================================
+# 커서 인코딩
+# ============================================
+
+def encode_cursor(created_at: datetime, record_id: int) -> str:
+    """(created_at, id) → URL에 넣을 수 있는 불투명 문자열"""
+    raw = json.dumps([created_at.isoformat(), record_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    encode_cursor()의 역변환
+
+    Raises:
+        ValueError: 잘못된 커서
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, record_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(record_id)
+    except Exception as e:
+        raise ValueError(f"잘못된 커서입니다: {cursor}") from e
+
+
+def parse_fields(fields: Optional[str]) -> Tuple[str, ...]:
+    """
+    "food_name,created_at" → 조회할 컬럼 목록
+
+    Raises:
+        ValueError: 알 수 없는 필드
+    """
+    if not fields:
+        return DIARY_FIELDS
+
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in DIARY_FIELDS]
+    if unknown:
+        raise ValueError(f"알 수 없는 필드: {', '.join(unknown)}")
+
+    # 커서용 컬럼은 항상 포함
+    return tuple(dict.fromkeys([*CURSOR_FIELDS, *requested]))
+
+
+def serialize_row(row, field_names: Tuple[str, ...]) -> dict:
+    """조회 결과 한 행 → 응답 dict"""
+    record = {}
+    for name in field_names:
+        value = getattr(row, name)
+        record[name] = value.isoformat() if isinstance(value, datetime) else value
+    return record
+
+
+# ============================================
+# 일기 조회
+# ============================================
+
+async def get_diary_page(
+    db: AsyncSession,
+    user_id: str,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+) -> dict:
+    """
+    최신순 일기 한 페이지 조회
+
+    (user_id, created_at DESC, id DESC) 인덱스를 그대로 따라 읽으므로
+    페이지 위치와 상관없이 limit개만 읽습니다.
+
+    Raises:
+        ValueError: 잘못된 cursor 또는 fields
+    """
+    field_names = parse_fields(fields)
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    columns = [getattr(FoodRecord, name) for name in field_names]
+    query = (
+        select(*columns)
+        .where(FoodRecord.user_id == user_id)
+        .order_by(FoodRecord.created_at.desc(), FoodRecord.id.desc())
+    )
+    if cursor:
+        created_at, record_id = decode_cursor(cursor)
+        query = query.where(
+            tuple_(FoodRecord.created_at, FoodRecord.id) < tuple_(created_at, record_id)
+        )
+
+    # 다음 페이지 존재 여부 확인을 위해 1개 더 조회
+    rows = (await db.execute(query.limit(limit + 1))).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+
+    return {
+        "user_id": user_id,
+        "total_count": await get_diary_count(db, user_id),
+        "records": [serialize_row(row, field_names) for row in rows],
+        "next_cursor": next_cursor,
+        "has_more": has_more,
+    }
+
+
+async def get_diary_count(db: AsyncSession, user_id: str) -> int:
+    """
+    일기 전체 개수
+
+    기록 저장 시 함께 증가시키는 CharacterState.diary_count를 읽으므로
+    기록 수와 상관없이 한 행만 조회합니다.
+    """
+    count = await db.scalar(
+        select(CharacterState.diary_count).where(CharacterState.user_id == user_id)
+    )
+    return count or 0
+
+
+# ============================================
+# 일기 내보내기 (스트리밍)
+# ============================================
+
+def iter_diary_export(
+    user_id: str,
+    format: str = "ndjson",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+) -> AsyncIterator[str]:
+    """
+    오래된 순으로 일기 전체를 한 줄씩 생성
+
+    서버 측 커서(AsyncSession.stream + yield_per)로 EXPORT_BATCH_SIZE개씩만 읽으므로
+    기록 수와 상관없이 메모리 사용량이 일정합니다.
+    각 행의 cursor 값을 다음 요청의 cursor로 넘기면 그 다음 행부터 이어서 받습니다.
+
+    StreamingResponse가 응답을 보내는 동안 사용하므로 요청 세션과 별개의
+    세션을 직접 열고 닫습니다.
+
+    Args:
+        user_id: 사용자 ID
+        format: "ndjson" 또는 "csv"
+        start: 이 시각 이후 기록만 (포함)
+        end: 이 시각 이전 기록만 (미포함)
+        cursor: 이전 내보내기의 마지막 cursor
+    
+    Raises:
+        ValueError: 잘못된 format 또는 cursor (첫 next() 호출 전에 검사)
+    """
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"지원하지 않는 형식입니다: {format}")
+    after = decode_cursor(cursor) if cursor else None
+
+    return _export_rows(user_id, format, start, end, after)
+
+
+def export_content_disposition(user_id: str, format: str) -> str:
+    """
+    내보내기 파일의 Content-Disposition 헤더 값
+
+    헤더는 latin-1로만 보낼 수 있으므로 filename은 ASCII로 바꾸고(그 외 문자는 _),
+    원래 이름은 filename*(UTF-8 퍼센트 인코딩)로 함께 보냅니다. 제어 문자(CR/LF 등)는 제거합니다.
+    """
+    name = "".join(ch for ch in f"food_diary_{user_id}.{format}" if not unicodedata.category(ch).startswith("C"))
+    ascii_name = re.sub(r"[^A-Za-z0-9._-]", "_", name)
+    return f"attachment; filename=\"{ascii_name}\"; filename*=UTF-8''{quote(name, safe='')}"
+
+
+async def _export_rows(user_id, format, start, end, after) -> AsyncIterator[str]:
+    columns = [getattr(FoodRecord, name) for name in DIARY_FIELDS]
+    query = (
+        select(*columns)
+        .where(FoodRecord.user_id == user_id)
+        .order_by(FoodRecord.created_at.asc(), FoodRecord.id.asc())
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    if start:
+        query = query.where(FoodRecord.created_at >= start)
+    if end:
+        query = query.where(FoodRecord.created_at < end)
+    if after:
+        query = query.where(tuple_(FoodRecord.created_at, FoodRecord.id) > tuple_(*after))
+
+    async with AsyncSessionLocal() as db:
+        # AsyncSession.stream()은 서버 측 커서를 사용
+        rows = await db.stream(query)
+
+        if format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            header = [*DIARY_FIELDS, "cursor"]
+
+            writer.writerow(header)
+            async for row in rows:
+                record = serialize_row(row, DIARY_FIELDS)
+                record["cursor"] = encode_cursor(row.created_at, row.id)
+                writer.writerow([record[name] for name in header])
+
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            yield buffer.getvalue()
+        else:
+            async for row in rows:
+                record = serialize_row(row, DIARY_FIELDS)
+                record["cursor"] = encode_cursor(row.created_at, row.id)
+                yield json.dumps(record, ensure_ascii=False) + "\n"
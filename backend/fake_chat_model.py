@@ -0,0 +1,114 @@
+"""
+로컬 가짜 챗 모델 (부하 테스트 / 개발용)
+- 외부 LLM 호출 없이 같은 질문에는 항상 같은 답변
+- 첫 토큰까지 지연(TTFT)과 초당 토큰 수를 설정해 실제 스트리밍과 비슷한 부하 재현
+- LangChain BaseChatModel이므로 프롬프트/대화 기록 체인에 그대로 연결
+
+Usage:
+    CHAT_MODEL_PROVIDER=fake FAKE_LLM_TOKENS_PER_SEC=40 FAKE_LLM_TTFT_MS=400 python main.py
+"""
+
+import asyncio
+import time
+import zlib
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+# 토큰 하나의 글자 수 (benchmark.py chat은 받은 글자 수 / 이 값으로 토큰 수를 셈)
+FAKE_CHARS_PER_TOKEN = 2
+
+# 질문 내용에 따라 고정으로 고르는 답변
+FAKE_REPLIES = (
+    "오늘 같은 날엔 얼큰한 김치찌개 어때? 밥 한 공기 뚝딱이야!",
+    "매콤달콤한 떡볶이 추천할게! 스트레스가 확 풀릴 거야.",
+    "든든하게 돈까스 먹자! 바삭한 튀김옷에 소스 듬뿍 찍어서.",
+    "시원한 냉면 한 그릇 어때? 새콤한 육수가 입맛을 살려줄 거야.",
+    "따끈한 쌀국수 추천! 국물이 깔끔해서 부담 없이 먹기 좋아.",
+)
+
+
+class FakeStreamingChatModel(BaseChatModel):
+    """마지막 사용자 메시지로 답변을 고르고 설정한 속도로 흘려보내는 모델"""
+
+    tokens_per_sec: float = 50.0
+    ttft: float = 0.3  # 첫 토큰까지 지연 (초)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-streaming"
+
+    def _reply(self, messages: List[BaseMessage]) -> str:
+        last = next((m for m in reversed(messages) if m.type == "human"), None)
+        text = last.content if last is not None and isinstance(last.content, str) else ""
+        return FAKE_REPLIES[zlib.crc32(text.encode("utf-8")) % len(FAKE_REPLIES)]
+
+    @staticmethod
+    def _tokens(text: str) -> List[str]:
+        """대략 실제 토크나이저처럼 FAKE_CHARS_PER_TOKEN글자씩 자름"""
+        size = FAKE_CHARS_PER_TOKEN
+        return [text[i:i + size] for i in range(0, len(text), size)]
+
+    def _delay(self) -> float:
+        return 1.0 / self.tokens_per_sec if self.tokens_per_sec > 0 else 0.0
+
+    # ----- 한 번에 생성 -----
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        text = self._reply(messages)
+        time.sleep(self.ttft + self._delay() * len(self._tokens(text)))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        text = self._reply(messages)
+        await asyncio.sleep(self.ttft + self._delay() * len(self._tokens(text)))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    # ----- 스트리밍 -----
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.ttft)
+        for i, token in enumerate(self._tokens(self._reply(messages))):
+            if i:
+                time.sleep(self._delay())
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.ttft)
+        for i, token in enumerate(self._tokens(self._reply(messages))):
+            if i:
+                await asyncio.sleep(self._delay())
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
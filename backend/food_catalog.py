@@ -0,0 +1,94 @@
+"""
+음식 카탈로그 스냅샷
+- foods 테이블을 한 번 읽어 프로세스 메모리에 불변 스냅샷으로 보관
+- 재료 → 음식 id, 카테고리 → 음식 id 역색인을 미리 계산 (CatalogSnapshot, catalog_snapshot.py)
+- 카탈로그가 바뀌면 새 스냅샷을 만들어 참조만 교체 (원자적 교체)
+"""
+
+import asyncio
+from typing import Callable, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from catalog_snapshot import CatalogFood, CatalogSnapshot
+from models import Food
+
+
+# ============================================
+# 프로세스 전역 스냅샷 관리
+# ============================================
+
+_snapshot: Optional[CatalogSnapshot] = None
+_reload_lock = asyncio.Lock()
+_listeners: List[Callable[[CatalogSnapshot], None]] = []
+
+
+def register_catalog_listener(listener: Callable[[CatalogSnapshot], None]) -> None:
+    """
+    새 스냅샷이 공개되기 직전에 호출할 함수 등록
+
+    추천 후보군처럼 카탈로그에서 파생되는 데이터를 snapshot.derived에 미리 계산해 두면
+    스냅샷과 함께 원자적으로 교체됩니다.
+    """
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+async def build_catalog(db: AsyncSession, version: int = 0) -> CatalogSnapshot:
+    """foods 테이블 전체를 읽어 새 스냅샷 생성"""
+    result = await db.execute(
+        select(
+            Food.id, Food.name, Food.category, Food.ingredients, Food.image_url, Food.description,
+            Food.ingredient_tags
+        )
+    )
+    return CatalogSnapshot((CatalogFood(*row) for row in result.all()), version=version)
+
+
+async def _reload_locked(db: AsyncSession) -> CatalogSnapshot:
+    """스냅샷 교체 (_reload_lock을 잡은 상태에서만 호출)"""
+    global _snapshot
+    version = _snapshot.version + 1 if _snapshot else 1
+    snapshot = await build_catalog(db, version=version)
+    for listener in _listeners:
+        listener(snapshot)
+    # 참조 교체는 원자적이므로 읽는 쪽은 이전 또는 새 스냅샷 중 하나만 봄
+    _snapshot = snapshot
+    return snapshot
+
+
+async def reload_catalog(db: AsyncSession) -> CatalogSnapshot:
+    """DB에서 카탈로그를 다시 읽어 전역 스냅샷을 교체"""
+    async with _reload_lock:
+        return await _reload_locked(db)
+
+
+def get_catalog() -> CatalogSnapshot:
+    """
+    현재 카탈로그 스냅샷 반환
+
+    Raises:
+        RuntimeError: 아직 로드되지 않은 경우 (ensure_catalog 사용)
+    """
+    snapshot = _snapshot
+    if snapshot is None:
+        raise RuntimeError("음식 카탈로그가 아직 로드되지 않았습니다.")
+    return snapshot
+
+
+async def ensure_catalog(db: AsyncSession) -> CatalogSnapshot:
+    """
+    현재 카탈로그 스냅샷 반환
+
+    앱 시작 시 로드되지 않았다면 db로 처음 한 번 로드합니다.
+    동시에 들어온 요청은 락을 기다린 뒤 먼저 로드된 스냅샷을 그대로 사용합니다.
+    """
+    snapshot = _snapshot
+    if snapshot is not None:
+        return snapshot
+
+    async with _reload_lock:
+        if _snapshot is not None:
+            return _snapshot
+        return await _reload_locked(db)
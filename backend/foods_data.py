@@ -1,18 +1,62 @@
+"""
+CSV 음식 데이터
+- 앱 시작 시 한 번 읽어 __slots__ 레코드(CatalogFood)와 이름/카테고리/재료 색인으로 보관
+- 다른 모듈은 전역 변수 대신 접근 함수로 조회 (다시 로드해도 항상 최신 데이터)
+"""
+
 import csv
-from typing import List, Dict
+from typing import Optional, Tuple
+
+from catalog_snapshot import CatalogFood, CatalogSnapshot
+
+DEFAULT_CSV_PATH = "foods_database.csv"
+
+_catalog: CatalogSnapshot = CatalogSnapshot(())
 
-FOOD_DATABASE: List[Dict] = []
 
-def load_foods_from_csv(csv_path: str = "foods/foods.csv") -> None:
-    """CSV에서 음식 데이터 로드해서 FOOD_DATABASE에 채우기"""
-    global FOOD_DATABASE
-    if FOOD_DATABASE:
-        return  # 이미 로드된 경우
+def load_foods_from_csv(csv_path: str = DEFAULT_CSV_PATH, force: bool = False) -> CatalogSnapshot:
+    """CSV에서 음식 데이터를 읽어 색인된 카탈로그로 보관"""
+    global _catalog
+    if len(_catalog) and not force:
+        return _catalog  # 이미 로드된 경우
 
     try:
         with open(csv_path, "r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            FOOD_DATABASE = [row for row in reader]
+            foods = [
+                CatalogFood(
+                    id=index,
+                    name=row["name"],
+                    category=row.get("category") or None,
+                    ingredients=row.get("ingredients") or None,
+                    image_url=row.get("image_url") or None,
+                    description=row.get("description") or None,
+                )
+                for index, row in enumerate(csv.DictReader(f), start=1)
+            ]
     except FileNotFoundError:
         print(f"[foods_data] CSV 파일을 찾을 수 없습니다: {csv_path}")
-        FOOD_DATABASE = []
\ No newline at end of file
+        foods = []
+
+    _catalog = CatalogSnapshot(foods, version=_catalog.version + 1)
+    return _catalog
+
+
+# ============================================
+# 조회 함수
+# ============================================
+
+def get_food(name: str) -> Optional[CatalogFood]:
+    """이름으로 음식 조회 (O(1))"""
+    return _catalog.by_name.get(name)
+
+
+def get_all_foods() -> Tuple[CatalogFood, ...]:
+    return _catalog.foods
+
+
+def get_foods_by_category(category: str) -> Tuple[CatalogFood, ...]:
+    return tuple(_catalog.by_id[food_id] for food_id in _catalog.ids_by_category(category))
+
+
+def get_foods_by_ingredient(ingredient: str) -> Tuple[CatalogFood, ...]:
+    return tuple(_catalog.by_id[food_id] for food_id in _catalog.ids_by_ingredient(ingredient))
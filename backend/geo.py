@@ -0,0 +1,84 @@
+"""
+위치 계산 공용 함수
+- 두 좌표 사이 거리 (haversine, 미터)
+- geohash 인코딩 / 셀 범위 (캐시 키, 공간 색인용)
+"""
+
+import math
+from typing import Tuple
+
+EARTH_RADIUS_M = 6371008.8
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_DECODE = {c: i for i, c in enumerate(_BASE32)}
+
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """두 좌표 사이의 대원 거리 (미터)"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def geohash_encode(lat: float, lon: float, precision: int = 6) -> str:
+    """
+    geohash 문자열 (precision 6 ≈ 1.2km × 0.6km 셀)
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        rng, coord = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if coord >= mid:
+            value = (value << 1) | 1
+            rng[0] = mid
+        else:
+            value <<= 1
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+def geohash_bounds(geohash: str) -> Tuple[float, float, float, float]:
+    """geohash 셀 범위 (min_lat, min_lon, max_lat, max_lon)"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        value = _DECODE[char]
+        for shift in range(4, -1, -1):
+            rng = lon_range if even else lat_range
+            mid = (rng[0] + rng[1]) / 2
+            if (value >> shift) & 1:
+                rng[0] = mid
+            else:
+                rng[1] = mid
+            even = not even
+    return lat_range[0], lon_range[0], lat_range[1], lon_range[1]
+
+
+def geohash_center(geohash: str) -> Tuple[float, float]:
+    """geohash 셀 중심 좌표 (lat, lon)"""
+    min_lat, min_lon, max_lat, max_lon = geohash_bounds(geohash)
+    return (min_lat + max_lat) / 2, (min_lon + max_lon) / 2
+
+
+def geohash_half_diagonal_m(geohash: str) -> float:
+    """셀 중심에서 꼭짓점까지 거리 (셀 안 어느 점이든 중심에서 이 거리 이내)"""
+    min_lat, min_lon, max_lat, max_lon = geohash_bounds(geohash)
+    center_lat, center_lon = geohash_center(geohash)
+    # 적도에서 먼 쪽 꼭짓점이 경도 방향으로 더 짧으므로 적도 쪽 꼭짓점 기준
+    corner_lat = min_lat if abs(min_lat) < abs(max_lat) else max_lat
+    return haversine_m(center_lat, center_lon, corner_lat, max_lon)
@@ -0,0 +1,241 @@
+"""
+외부 API 공용 HTTP 클라이언트
+- 앱 전체에서 하나의 httpx.AsyncClient(커넥션 풀)를 공유
+- FastAPI 시작 시 생성, 종료 시 정리
+- 업스트림(날씨, 카카오맵)별 타임아웃 및 풀 사용량 통계
+- GET 요청은 업스트림별 장애 대응 정책(서킷 브레이커, 재시도, 헤지) 적용 (resilience.py)
+"""
+
+import os
+import time
+from typing import Dict, Optional
+
+import httpx
+from dotenv import load_dotenv
+
+from resilience import UpstreamPolicy
+
+load_dotenv()
+
+# 커넥션 풀 설정
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))  # 초
+HTTP_POOL_TIMEOUT = float(os.getenv("HTTP_POOL_TIMEOUT", "2"))  # 풀 대기 최대 시간 (초)
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "true").lower() == "true"
+
+# HTTP/2는 h2 패키지가 설치된 경우에만 사용
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+# ============================================
+# 업스트림별 설정
+# ============================================
+
+UPSTREAM_TIMEOUTS: Dict[str, httpx.Timeout] = {
+    "openweathermap": httpx.Timeout(
+        float(os.getenv("WEATHER_API_TIMEOUT", "3")),
+        connect=float(os.getenv("WEATHER_API_CONNECT_TIMEOUT", "1")),
+        pool=HTTP_POOL_TIMEOUT,
+    ),
+    "kakao": httpx.Timeout(
+        float(os.getenv("KAKAO_API_TIMEOUT", "3")),
+        connect=float(os.getenv("KAKAO_API_CONNECT_TIMEOUT", "1")),
+        pool=HTTP_POOL_TIMEOUT,
+    ),
+}
+
+DEFAULT_TIMEOUT = httpx.Timeout(10.0, pool=HTTP_POOL_TIMEOUT)
+
+# 장애 대응 정책 (서킷 브레이커 / 재시도 / 헤지)
+RESILIENCE_ENABLED = os.getenv("RESILIENCE_ENABLED", "true").lower() == "true"
+# 재시도 / 헤지해도 안전한 메서드
+IDEMPOTENT_METHODS = {"GET", "HEAD"}
+
+# 이 시간(초) 안에 응답이 없으면 같은 요청을 하나 더 보냄 (0이면 헤지 안 함, 평소 p95 응답 시간 정도)
+UPSTREAM_HEDGE_DELAYS: Dict[str, float] = {
+    "openweathermap": float(os.getenv("WEATHER_API_HEDGE_DELAY", "1")),
+    "kakao": float(os.getenv("KAKAO_API_HEDGE_DELAY", "0.5")),
+}
+
+
+class UpstreamStats:
+    """업스트림별 요청 통계"""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.pool_timeouts = 0
+        self.total_time = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "requests": self.requests,
+            "errors": self.errors,
+            "pool_timeouts": self.pool_timeouts,
+            "avg_latency_ms": round(self.total_time / self.requests * 1000, 2) if self.requests else 0.0,
+        }
+
+
+_client: Optional[httpx.AsyncClient] = None
+_stats: Dict[str, UpstreamStats] = {}
+_policies: Dict[str, UpstreamPolicy] = {}
+
+
+# ============================================
+# 생명주기 관리
+# ============================================
+
+def _create_client(transport: Optional[httpx.AsyncBaseTransport] = None) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        transport=transport,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+        timeout=DEFAULT_TIMEOUT,
+        http2=HTTP2_ENABLED and HTTP2_AVAILABLE,
+    )
+
+
+async def startup_http_client(transport: Optional[httpx.AsyncBaseTransport] = None) -> None:
+    """
+    FastAPI 시작 시 공용 클라이언트 생성
+
+    Args:
+        transport: 테스트용 가짜 업스트림 (httpx.MockTransport 등)
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _create_client(transport)
+
+
+async def shutdown_http_client() -> None:
+    """FastAPI 종료 시 커넥션 풀 정리"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    공용 클라이언트 반환
+
+    앱 lifespan 밖(스크립트 직접 실행 등)에서 호출되면 필요할 때 생성합니다.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _create_client()
+    return _client
+
+
+# ============================================
+# 요청
+# ============================================
+
+def get_upstream_policy(upstream: str) -> UpstreamPolicy:
+    """업스트림별 장애 대응 정책 (처음 쓸 때 생성)"""
+    policy = _policies.get(upstream)
+    if policy is None:
+        policy = _policies[upstream] = UpstreamPolicy(
+            upstream, hedge_delay=UPSTREAM_HEDGE_DELAYS.get(upstream, 0.0)
+        )
+    return policy
+
+
+async def request(upstream: str, method: str, url: str, **kwargs) -> httpx.Response:
+    """
+    공용 클라이언트로 업스트림 요청 (업스트림별 타임아웃 + 장애 대응 + 통계)
+
+    Args:
+        upstream: 업스트림 이름 ("openweathermap", "kakao")
+        method: HTTP 메서드
+        url: 요청 URL
+        **kwargs: httpx 요청 옵션 (params, headers 등)
+
+    Returns:
+        httpx.Response: raise_for_status()가 적용된 응답
+
+    Raises:
+        resilience.CircuitOpenError: 서킷이 열려 있을 때 (요청을 보내지 않음)
+        httpx.HTTPError: 재시도 후에도 실패한 경우
+    """
+    kwargs.setdefault("timeout", UPSTREAM_TIMEOUTS.get(upstream, DEFAULT_TIMEOUT))
+
+    if RESILIENCE_ENABLED and method.upper() in IDEMPOTENT_METHODS:
+        return await get_upstream_policy(upstream).call(lambda: _send(upstream, method, url, kwargs))
+    return await _send(upstream, method, url, kwargs)
+
+
+async def _send(upstream: str, method: str, url: str, kwargs: dict) -> httpx.Response:
+    """요청 한 번 (재시도 / 헤지마다 호출)"""
+    stats = _stats.setdefault(upstream, UpstreamStats())
+
+    stats.requests += 1
+    stats.in_flight += 1
+    stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+    started = time.perf_counter()
+    try:
+        response = await get_http_client().request(method, url, **kwargs)
+        response.raise_for_status()
+        return response
+    except httpx.PoolTimeout:
+        stats.pool_timeouts += 1
+        stats.errors += 1
+        raise
+    except Exception:
+        stats.errors += 1
+        raise
+    finally:
+        stats.in_flight -= 1
+        stats.total_time += time.perf_counter() - started
+
+
+async def get(upstream: str, url: str, **kwargs) -> httpx.Response:
+    """GET 요청"""
+    return await request(upstream, "GET", url, **kwargs)
+
+
+# ============================================
+# 통계
+# ============================================
+
+def _pool_connections() -> Dict[str, int]:
+    """httpcore 커넥션 풀 상태 (내부 속성이므로 없으면 빈 값)"""
+    pool = getattr(getattr(_client, "_transport", None), "_pool", None)
+    connections = getattr(pool, "connections", None)
+    if connections is None:
+        return {}
+
+    idle = sum(1 for conn in connections if conn.is_idle())
+    return {"open": len(connections), "idle": idle, "active": len(connections) - idle}
+
+
+def get_http_stats() -> dict:
+    """커넥션 풀 포화도 및 업스트림별 통계"""
+    in_flight = sum(stats.in_flight for stats in _stats.values())
+    return {
+        "http2": HTTP2_ENABLED and HTTP2_AVAILABLE,
+        "max_connections": HTTP_MAX_CONNECTIONS,
+        "max_keepalive_connections": HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        "in_flight": in_flight,
+        "saturation": round(in_flight / HTTP_MAX_CONNECTIONS, 4) if HTTP_MAX_CONNECTIONS else 0.0,
+        "connections": _pool_connections(),
+        "upstreams": {
+            name: {
+                **(_stats[name].to_dict() if name in _stats else UpstreamStats().to_dict()),
+                "resilience": _policies[name].stats() if name in _policies else None,
+            }
+            for name in sorted(set(_stats) | set(_policies))
+        },
+    }
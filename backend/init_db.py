@@ -1,12 +1,18 @@
 import os
 import csv
-from sqlalchemy import create_engine, text
+import io
+import time
+import argparse
+from typing import Dict, Iterator, List
+from sqlalchemy import create_engine, text, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 # models 모듈을 임포트하여 Base에 테이블 메타데이터가 등록되도록 합니다.
 import models
 # FastAPI 프로젝트의 모델과 데이터베이스 설정을 가져옵니다.
 from database import Base
+from migrations import run_migrations
 
 # .env 파일에서 환경 변수 로드
 load_dotenv()
@@ -22,7 +28,157 @@ engine = create_engine(DATABASE_URL)
 # 세션 생성
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-def init_db():
+# 기본 CSV 경로 / 일괄 처리 크기
+DEFAULT_CSV_PATH = 'foods_database.csv'
+DEFAULT_BATCH_SIZE = 1000
+
+# foods 테이블에 적재하는 컬럼 (COPY 순서와 동일)
+FOOD_COLUMNS = ('name', 'category', 'ingredients', 'ingredient_tags', 'image_url', 'description')
+
+
+# ============================================
+# CSV 읽기
+# ============================================
+
+def iter_food_rows(csv_path: str) -> Iterator[Dict]:
+    """CSV를 한 줄씩 읽어 foods 행으로 변환 (파일 전체를 메모리에 올리지 않음)"""
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        for food in csv.DictReader(f):
+            # description이 없는 경우를 대비하여 기본값 설정
+            description = food.get('description') or f"{food['name']}입니다. 맛있게 드세요!"
+            yield {
+                'name': food['name'],
+                'category': food.get('category') or None,
+                'ingredients': food.get('ingredients') or None,
+                'ingredient_tags': list(models.split_ingredients(food.get('ingredients'))),
+                'image_url': food.get('image_url') or None,
+                'description': description,
+            }
+
+
+def iter_batches(rows: Iterator[Dict], batch_size: int) -> Iterator[List[Dict]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _pg_array(values: List[str]) -> str:
+    """["고기", "면"] → '{"고기","면"}' (COPY용 배열 리터럴)"""
+    escaped = ('"' + v.replace('\\', '\\\\').replace('"', '\\"') + '"' for v in values)
+    return '{' + ','.join(escaped) + '}'
+
+
+class CopyStream(io.TextIOBase):
+    """
+    행 iterator를 COPY ... FROM STDIN용 CSV 스트림으로 변환
+
+    psycopg2 copy_expert()가 read()로 조금씩 가져가므로
+    카탈로그 크기와 상관없이 메모리 사용량이 일정합니다.
+    """
+
+    def __init__(self, rows: Iterator[Dict]):
+        self.rows = rows
+        self.count = 0
+        self._buffer = ''
+        self._out = io.StringIO()
+        self._writer = csv.writer(self._out)
+
+    def readable(self):
+        return True
+
+    def _next_line(self) -> str:
+        row = next(self.rows)
+        self.count += 1
+        self._writer.writerow([
+            _pg_array(row[column]) if column == 'ingredient_tags' else row[column]
+            for column in FOOD_COLUMNS
+        ])
+        line = self._out.getvalue()
+        self._out.seek(0)
+        self._out.truncate()
+        return line
+
+    def read(self, size=-1):
+        try:
+            while size < 0 or len(self._buffer) < size:
+                self._buffer += self._next_line()
+        except StopIteration:
+            pass
+
+        if size < 0:
+            size = len(self._buffer)
+        chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
+
+
+# ============================================
+# 적재 방식
+# ============================================
+
+def copy_foods(csv_path: str) -> int:
+    """COPY로 foods 테이블에 전체 적재 (빈 테이블 대상)"""
+    raw = engine.raw_connection()
+    try:
+        stream = CopyStream(iter_food_rows(csv_path))
+        with raw.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY foods ({', '.join(FOOD_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                stream,
+            )
+        raw.commit()
+        return stream.count
+    finally:
+        raw.close()
+
+
+def upsert_foods(db, csv_path: str, batch_size: int = DEFAULT_BATCH_SIZE) -> Dict[str, int]:
+    """
+    이름 기준 upsert (INSERT ... ON CONFLICT (name) DO UPDATE)
+
+    값이 바뀐 행만 갱신하고, 사용자 데이터와 다른 음식은 건드리지 않습니다.
+    """
+    table = models.Food.__table__
+    total = changed = 0
+
+    for batch in iter_batches(iter_food_rows(csv_path), batch_size):
+        # 같은 배치 안에 같은 이름이 있으면 ON CONFLICT가 실패하므로 마지막 행만 사용
+        batch = list({row['name']: row for row in batch}.values())
+        stmt = pg_insert(table).values(batch)
+        update_columns = {column: stmt.excluded[column] for column in FOOD_COLUMNS if column != 'name'}
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.name],
+            set_=update_columns,
+            # 실제로 바뀐 값이 있을 때만 UPDATE (변경 없는 행은 쓰지 않음)
+            where=or_(*(table.c[column].is_distinct_from(value) for column, value in update_columns.items())),
+        )
+        result = db.execute(stmt)
+        db.commit()
+
+        total += len(batch)
+        changed += max(result.rowcount, 0)
+
+    return {'rows': total, 'changed': changed}
+
+
+# ============================================
+# 초기화
+# ============================================
+
+def init_db(mode: str = 'full', csv_path: str = DEFAULT_CSV_PATH, batch_size: int = DEFAULT_BATCH_SIZE):
+    """
+    음식 카탈로그 적재
+
+    Args:
+        mode: 'full' - 모든 테이블을 비우고 COPY로 다시 적재
+              'incremental' - 사용자 데이터는 유지하고 바뀐 음식만 upsert
+        csv_path: 음식 CSV 경로
+        batch_size: incremental 모드의 한 번에 upsert할 행 수
+    """
     db = SessionLocal()
     try:
         print("데이터베이스 초기화를 시작합니다...")
@@ -30,48 +186,54 @@ def init_db():
         # 0. 데이터베이스 테이블 생성 (없는 경우)
         print("데이터베이스 테이블을 확인하고, 없는 경우 생성합니다...")
         Base.metadata.create_all(bind=engine)
+        run_migrations(engine)
         print("테이블 준비 완료.")
 
-        # 1. 사용자 관련 데이터 초기화 (캐릭터 상태, 음식 기록 등)
-        print("사용자 관련 데이터를 초기화합니다 (캐릭터, 음식일기, 선호도)...")
-        db.execute(text("TRUNCATE TABLE character_states RESTART IDENTITY CASCADE"))
-        db.execute(text("TRUNCATE TABLE food_records RESTART IDENTITY CASCADE"))
-        db.execute(text("TRUNCATE TABLE user_preferences RESTART IDENTITY CASCADE"))
-        db.commit()
-        print("사용자 데이터 초기화 완료.")
+        started = time.perf_counter()
 
-        # 2. 기존 'foods' 테이블의 모든 데이터 삭제 (TRUNCATE)
-        # CASCADE를 사용하여 외래 키 제약 조건이 있는 경우에도 삭제합니다.
-        print("기존 음식 데이터를 새로고침합니다...")
-        db.execute(text("TRUNCATE TABLE foods RESTART IDENTITY CASCADE"))
-        db.commit()
-        print("기존 음식 데이터 삭제 완료.")
+        if mode == 'full':
+            # 1. 사용자 관련 데이터 초기화 (캐릭터 상태, 음식 기록 등)
+            print("사용자 관련 데이터를 초기화합니다 (캐릭터, 음식일기, 선호도)...")
+            db.execute(text("TRUNCATE TABLE character_states RESTART IDENTITY CASCADE"))
+            db.execute(text("TRUNCATE TABLE food_records RESTART IDENTITY CASCADE"))
+            db.execute(text("TRUNCATE TABLE user_preferences RESTART IDENTITY CASCADE"))
+            db.commit()
+            print("사용자 데이터 초기화 완료.")
 
-        # 3. foods_database.csv 파일 읽기
-        print("CSV 파일에서 새로운 데이터를 읽어옵니다...")
-        with open('foods_database.csv', 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            foods_to_add = list(reader)
+            # 2. 기존 'foods' 테이블의 모든 데이터 삭제 (TRUNCATE)
+            # CASCADE를 사용하여 외래 키 제약 조건이 있는 경우에도 삭제합니다.
+            print("기존 음식 데이터를 새로고침합니다...")
+            db.execute(text("TRUNCATE TABLE foods RESTART IDENTITY CASCADE"))
+            db.commit()
+            print("기존 음식 데이터 삭제 완료.")
 
-        # 3. CSV 데이터를 데이터베이스에 삽입
-        print(f"{len(foods_to_add)}개의 음식 데이터를 데이터베이스에 추가합니다...")
+            # 3. CSV 데이터를 COPY로 한 번에 적재
+            print(f"{csv_path} 파일을 COPY로 적재합니다...")
+            rows = copy_foods(csv_path)
+            changed = rows
+        elif mode == 'incremental':
+            # 사용자 데이터는 그대로 두고 바뀐 음식만 반영
+            print(f"{csv_path} 파일에서 바뀐 음식만 반영합니다 (upsert)...")
+            result = upsert_foods(db, csv_path, batch_size)
+            rows, changed = result['rows'], result['changed']
+        else:
+            raise ValueError(f"알 수 없는 모드입니다: {mode}")
 
-        for food in foods_to_add:
-            # description이 없는 경우를 대비하여 기본값 설정
-            description = food.get('description', f"{food['name']}입니다. 맛있게 드세요!")
-            
-            stmt = text("""
-                INSERT INTO foods (name, category, ingredients, image_url, description)
-                VALUES (:name, :category, :ingredients, :image_url, :description)
-            """)
-            db.execute(stmt, {**food, 'description': description})
-        
-        db.commit()
-        print("새로운 음식 데이터 추가 완료!")
+        elapsed = time.perf_counter() - started
+        rate = rows / elapsed if elapsed > 0 else float('inf')
+        print(f"음식 데이터 {rows}개 처리, {changed}개 반영 ({elapsed:.2f}초, {rate:,.0f} rows/sec)")
+        print("실행 중인 서버에는 POST /food/catalog/reload 로 새 카탈로그를 적용하세요.")
         print("데이터베이스 초기화가 성공적으로 완료되었습니다.")
 
     finally:
         db.close()
 
 if __name__ == "__main__":
-    init_db()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="음식 카탈로그 적재")
+    parser.add_argument('--mode', choices=['full', 'incremental'], default='full',
+                        help="full: 전체 초기화 후 COPY 적재 / incremental: 바뀐 음식만 upsert")
+    parser.add_argument('--csv', default=DEFAULT_CSV_PATH, help="음식 CSV 경로")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    init_db(mode=args.mode, csv_path=args.csv, batch_size=args.batch_size)
@@ -1,29 +1,265 @@
 """
 맛집 검색 API 서비스
 Kakao Map API 연동
+
+- 검색 결과는 (정규화 키워드, geohash 셀, 반경 구간) 단위로 캐시 (TTL + LRU)
+- 업스트림은 셀 중심에서 "반경 구간 + 셀 반대각선"으로 가까운 순 최대 45개(3페이지)를 검색하므로
+  셀 안 어느 지점의 요청이든 캐시 결과를 거리로 걸러 그대로 사용
+- 맛집이 많아 셀 결과가 잘린 지역은 한 자리 더 작은 셀(PLACE_CACHE_MAX_PRECISION까지)로 검색
+- 더 넓은 반경 구간이 캐시돼 있고 요청 결과가 그 범위 안에서 확정되면 재사용
+- 같은 키의 동시 요청은 하나의 API 호출을 공유
+- 로컬 맛집 저장소(place_store)로 답할 수 있으면 카카오를 호출하지 않고,
+  카카오 응답은 저장소에 쌓아 다음 검색에 사용
+- 추천 음식 여러 개는 search_places_many로 한 번에 (동시 실행 수 제한)
 """
 
-import httpx
+import asyncio
 import os
+import time
+from typing import Iterable, List
+
 from dotenv import load_dotenv
 
+import http_client
+from geo import geohash_center, geohash_encode, geohash_half_diagonal_m, haversine_m
+from place_store import from_kakao_document, normalize_keyword, place_store
+from ttl_cache import TTLCache
+
 load_dotenv()
 
 KAKAO_MAP_API_KEY = os.getenv("KAKAO_MAP_API_KEY")
 
+# 맛집 검색 캐시 설정
+PLACE_CACHE_TTL = float(os.getenv("PLACE_CACHE_TTL", "1800"))  # 초
+PLACE_CACHE_MAX_SIZE = int(os.getenv("PLACE_CACHE_MAX_SIZE", "4096"))
+# 만료 후에도 이 시간(초) 동안은 마지막 결과를 바로 주고 백그라운드에서 갱신
+PLACE_CACHE_STALE_TTL = float(os.getenv("PLACE_CACHE_STALE_TTL", "3600"))
+# geohash 자릿수 (6 ≈ 1.2km × 0.6km 셀)
+PLACE_CACHE_PRECISION = int(os.getenv("PLACE_CACHE_PRECISION", "6"))
+# 셀 결과가 잘릴 만큼 맛집이 많은 지역은 이 자릿수까지 작은 셀로 다시 검색 (7 ≈ 150m × 150m)
+PLACE_CACHE_MAX_PRECISION = int(os.getenv("PLACE_CACHE_MAX_PRECISION", "7"))
+# 요청 반경은 이 구간 중 같거나 큰 값으로 올려서 검색 (카카오 최대 반경 20km)
+PLACE_RADIUS_BUCKETS = (500, 1000, 2000, 5000, 10000, 20000)
+KAKAO_MAX_RADIUS = 20000
+KAKAO_PAGE_SIZE = 15
+# 셀 검색에서 가져올 페이지 수 (카카오는 한 검색당 최대 45개 = 3페이지)
+KAKAO_CELL_PAGES = min(3, int(os.getenv("KAKAO_CELL_PAGES", "3")))
+# 응답에 포함할 맛집 수 (기본 / 최대)
+PLACE_RESULT_LIMIT = 5
+PLACE_RESULT_MAX_LIMIT = int(os.getenv("PLACE_RESULT_MAX_LIMIT", "50"))
+# 여러 키워드를 한 번에 검색할 때 동시에 진행할 검색 수
+PLACE_SEARCH_CONCURRENCY = int(os.getenv("PLACE_SEARCH_CONCURRENCY", "4"))
+
+place_cache = TTLCache(ttl=PLACE_CACHE_TTL, max_size=PLACE_CACHE_MAX_SIZE, stale_ttl=PLACE_CACHE_STALE_TTL)
+# 더 넓은 반경 캐시 재사용 / 셀 캐시로 부족해 지점 기준 검색 / 실제 API 호출 횟수
+place_cache_counters = {"wider_hits": 0, "point_queries": 0, "upstream_calls": 0}
+
+
+def radius_bucket(radius: int) -> int:
+    """요청 반경을 캐시 반경 구간으로 올림"""
+    for bucket in PLACE_RADIUS_BUCKETS:
+        if radius <= bucket:
+            return bucket
+    return PLACE_RADIUS_BUCKETS[-1]
+
+
+class PlaceSearchResult:
+    """
+    셀 중심 기준 검색 결과 (캐시 값)
 
-async def search_places(keyword: str, lat: float, lon: float, radius: int = 1000):
+    covered_radius: 중심에서 이 거리 안의 맛집은 빠짐없이 들어있음
+    (가져온 페이지 뒤에 결과가 더 있으면 가장 먼 결과까지의 거리)
     """
-    카카오맵 API로 맛집 검색
+
+    __slots__ = ("center_lat", "center_lon", "covered_radius", "places")
+
+    def __init__(self, center_lat: float, center_lon: float, covered_radius: float, places: tuple):
+        self.center_lat = center_lat
+        self.center_lon = center_lon
+        self.covered_radius = covered_radius
+        self.places = places
+
+    def nearby(self, lat: float, lon: float, radius: float, limit: int = PLACE_RESULT_LIMIT):
+        """
+        요청 지점 기준 거리를 다시 계산해 반경 안의 가까운 순으로 반환
+
+        Returns:
+            (list, bool): 맛집 리스트, 결과가 확실한지
+            (가장 먼 반환 결과까지의 원이 검색 범위 안이면 더 가까운 맛집이 빠졌을 수 없음)
+        """
+        offset = haversine_m(self.center_lat, self.center_lon, lat, lon)
+        found = []
+        for place in self.places:
+            distance = haversine_m(lat, lon, place["latitude"], place["longitude"])
+            if distance <= radius:
+                found.append((distance, place))
+        found.sort(key=lambda item: item[0])
+        found = found[:limit]
+
+        reach = found[-1][0] if len(found) == limit else radius
+        complete = offset + reach <= self.covered_radius
+        return [dict(place, distance=int(distance)) for distance, place in found], complete
+
+
+async def search_places(keyword: str, lat: float, lon: float, radius: int = 1000,
+                        limit: int = PLACE_RESULT_LIMIT):
+    """
+    맛집 검색 (로컬 저장소 → 캐시 → 카카오맵 API)
     
     Args:
         keyword: 검색 키워드 (예: "김치찌개")
         lat: 위도
         lon: 경도
         radius: 검색 반경 (미터, 기본 1km)
+        limit: 최대 맛집 수 (기본 5개)
+    
+    Returns:
+        list: 맛집 정보 리스트 (가까운 순)
+    """
+    query = normalize_keyword(keyword)
+    cell = geohash_encode(lat, lon, PLACE_CACHE_PRECISION)
+    bucket = radius_bucket(radius)
+
+    try:
+        if place_store.enabled:
+            places, enough = place_store.search(query, lat, lon, radius, limit)
+            if enough or place_store.offline:
+                return places
+
+        # 더 넓은 반경 구간이 이미 캐시돼 있으면 거리로 걸러서 재사용
+        for wider in PLACE_RADIUS_BUCKETS:
+            if wider <= bucket:
+                continue
+            result = place_cache.get((query, cell, wider))
+            if result is None:
+                continue
+            places, complete = result.nearby(lat, lon, radius, limit)
+            if complete:
+                place_cache_counters["wider_hits"] += 1
+                return places
+
+        # 셀 검색 결과가 잘려 요청 지점 주변을 다 덮지 못하면 더 작은 셀로
+        # (잘린 큰 셀 결과도 캐시에 남으므로 다음 요청은 API 호출 없이 바로 작은 셀로 내려감)
+        for precision in range(PLACE_CACHE_PRECISION, max(PLACE_CACHE_PRECISION, PLACE_CACHE_MAX_PRECISION) + 1):
+            if precision != PLACE_CACHE_PRECISION:
+                cell = geohash_encode(lat, lon, precision)
+            result = await place_cache.get_or_load(
+                (query, cell, bucket),
+                lambda cell=cell: fetch_cell_places(query, cell, bucket),
+            )
+            places, complete = result.nearby(lat, lon, radius, limit)
+            if complete:
+                return places
+
+        # 가장 작은 셀로도 요청 지점 주변을 다 덮지 못한 경우 → 지점 기준 검색
+        place_cache_counters["point_queries"] += 1
+        point = (round(lat, 4), round(lon, 4))  # 약 10m
+        result = await place_cache.get_or_load(
+            (query, point, radius),
+            lambda: fetch_point_places(query, point[0], point[1], radius),
+        )
+        return result.nearby(lat, lon, radius, limit)[0]
+
+    except Exception as e:
+        print(f"카카오맵 API 오류: {e}")
+        return []
+
+
+async def search_places_many(keywords: Iterable[str], lat: float, lon: float, radius: int = 1000,
+                             limit: int = PLACE_RESULT_LIMIT) -> List[dict]:
+    """
+    여러 키워드 맛집 검색 (추천 음식 4개를 한 번에)
+    
+    키워드마다 search_places를 동시에 실행하고(최대 PLACE_SEARCH_CONCURRENCY개),
+    정규화했을 때 같은 키워드는 한 번만 검색합니다.
     
     Returns:
-        list: 맛집 정보 리스트
+        list: 입력 순서대로 {"keyword", "count", "places", "elapsed_ms"}
+        (elapsed_ms는 대기 시간을 뺀 검색 시간)
+    """
+    keywords = list(keywords)
+    semaphore = asyncio.Semaphore(PLACE_SEARCH_CONCURRENCY)
+    
+    async def search(keyword):
+        async with semaphore:
+            started = time.perf_counter()
+            places = await search_places(keyword, lat, lon, radius, limit)
+            return places, round((time.perf_counter() - started) * 1000, 2)
+    
+    unique = list(dict.fromkeys(normalize_keyword(keyword) for keyword in keywords))
+    found = dict(zip(unique, await asyncio.gather(*(search(keyword) for keyword in unique))))
+    
+    results = []
+    for keyword in keywords:
+        places, elapsed_ms = found[normalize_keyword(keyword)]
+        results.append({
+            "keyword": keyword,
+            "count": len(places),
+            "places": places,
+            "elapsed_ms": elapsed_ms,
+        })
+    return results
+
+
+async def fetch_cell_places(keyword: str, cell: str, bucket: int) -> PlaceSearchResult:
+    """
+    geohash 셀 중심 기준 맛집 검색 (캐시 없음)
+
+    셀 안 어느 지점에서 bucket 반경으로 검색해도 빠지는 결과가 없도록
+    셀 반대각선만큼 넓혀서 검색합니다. 맛집이 많은 지역에서도 셀 안 대부분의 지점이
+    확인 범위 안에 들도록 KAKAO_CELL_PAGES 페이지까지 가져옵니다
+    (첫 페이지가 마지막이 아니면 나머지 페이지는 동시에 요청).
+
+    Raises:
+        httpx.HTTPError: API 호출 실패 시
+    """
+    center_lat, center_lon = geohash_center(cell)
+    search_radius = min(KAKAO_MAX_RADIUS, int(bucket + geohash_half_diagonal_m(cell)) + 1)
+    places, is_end = await fetch_places_from_api(keyword, center_lat, center_lon, search_radius)
+    if not is_end and KAKAO_CELL_PAGES > 1:
+        pages = await asyncio.gather(*(
+            fetch_places_from_api(keyword, center_lat, center_lon, search_radius, page)
+            for page in range(2, KAKAO_CELL_PAGES + 1)
+        ))
+        seen = {p["id"] for p in places}
+        for page_places, page_end in pages:
+            places += [p for p in page_places if p["id"] not in seen]
+            seen.update(p["id"] for p in page_places)
+            if page_end:
+                is_end = True
+                break
+
+    covered = float(search_radius)
+    if not is_end and places:
+        covered = min(covered, max(
+            haversine_m(center_lat, center_lon, p["latitude"], p["longitude"]) for p in places
+        ))
+    place_store.ingest(keyword, places, center_lat, center_lon, covered)
+    return PlaceSearchResult(center_lat, center_lon, covered, tuple(places))
+
+
+async def fetch_point_places(keyword: str, lat: float, lon: float, radius: int) -> PlaceSearchResult:
+    """요청 지점 기준 맛집 검색 (캐시 없음)"""
+    places, is_end = await fetch_places_from_api(keyword, lat, lon, radius)
+    covered = float(radius)
+    if not is_end and places:
+        covered = max(haversine_m(lat, lon, p["latitude"], p["longitude"]) for p in places)
+    place_store.ingest(keyword, places, lat, lon, covered)
+    return PlaceSearchResult(lat, lon, covered, tuple(places))
+
+
+async def fetch_places_from_api(keyword: str, lat: float, lon: float, radius: int, page: int = 1):
+    """
+    카카오맵 API 호출 (가까운 순 한 페이지)
+
+    정확도순이 아니라 거리순(sort=distance)으로 받아야 받은 결과 밖의 맛집이
+    모두 가장 먼 결과보다 멀다고 보장되어 캐시 / 저장소 재사용이 가능합니다.
+    
+    Returns:
+        (list, bool): 맛집 정보 리스트, 반경 안 결과를 이 페이지까지 다 받았는지
+
+    Raises:
+        httpx.HTTPError: API 호출 실패 시
     """
     url = "https://dapi.kakao.com/v2/local/search/keyword.json"
     headers = {
@@ -34,35 +270,28 @@ async def search_places(keyword: str, lat: float, lon: float, radius: int = 1000
         "x": lon,
         "y": lat,
         "radius": radius,
+        "sort": "distance",
+        "size": KAKAO_PAGE_SIZE,
+        "page": page,
         "category_group_code": "FD6"  # 음식점 카테고리
     }
     
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=headers, params=params, timeout=10.0)
-            response.raise_for_status()
-            data = response.json()
-            
-            places = []
-            for place in data.get("documents", [])[:5]:  # 최대 5개
-                places.append({
-                    "name": place.get("place_name"),
-                    "category": place.get("category_name"),
-                    "address": place.get("address_name"),
-                    "road_address": place.get("road_address_name"),
-                    "latitude": float(place.get("y")),
-                    "longitude": float(place.get("x")),
-                    "distance": int(place.get("distance", 0)),
-                    "phone": place.get("phone", ""),
-                    "place_url": place.get("place_url", ""),
-                    "is_mock": False
-                })
-            
-            return places
+    place_cache_counters["upstream_calls"] += 1
+    response = await http_client.get("kakao", url, headers=headers, params=params)
+    data = response.json()
     
-    except Exception as e:
-        print(f"카카오맵 API 오류: {e}")
-        return []
+    places = [from_kakao_document(place) for place in data.get("documents", [])]
+    
+    # 결과가 45개를 넘으면 마지막 페이지(is_end)여도 뒤가 잘린 것이므로 끝이 아님
+    meta = data.get("meta", {})
+    total_count = meta.get("total_count", 0)
+    is_end = meta.get("is_end", True) and total_count <= meta.get("pageable_count", total_count)
+    return places, is_end
+
+
+def get_place_cache_stats() -> dict:
+    """맛집 검색 캐시 통계"""
+    return {**place_cache.stats(), **place_cache_counters}
 
 
 # ============================================
@@ -70,8 +299,6 @@ async def search_places(keyword: str, lat: float, lon: float, radius: int = 1000
 # ============================================
 
 if __name__ == "__main__":
-    import asyncio
-    
     async def test():
         print("=" * 50)
         print("맛집 검색 API 테스트")
@@ -99,5 +326,7 @@ if __name__ == "__main__":
         print("=" * 50)
         print("테스트 완료! ✅")
         print("=" * 50)
+        
+        await http_client.shutdown_http_client()
     
     asyncio.run(test())
@@ -0,0 +1,105 @@
+"""
+레벨 / 경험치 계산
+- 레벨 L → L+1 에 필요한 경험치 = step * L + offset (등차수열 곡선)
+- 누적 경험치가 이차식이므로 레벨업 횟수를 반복문 없이 O(1)로 계산
+- API 요청과 일괄 지급 작업(batch grant)에서 함께 사용
+"""
+
+import os
+from math import isqrt
+from typing import Iterable, List, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class XPCurve:
+    """
+    경험치 곡선
+
+    cost(L) = step * L + offset
+      - step=100, offset=0 : 레벨 * 100 (기본값, 기존 규칙)
+      - step=0, offset=N   : 매 레벨 N 고정
+    """
+
+    def __init__(self, step: int = 100, offset: int = 0):
+        if step < 0 or offset < 0 or step + offset <= 0:
+            raise ValueError("경험치 곡선은 모든 레벨에서 필요 경험치가 0보다 커야 합니다.")
+        self.step = step
+        self.offset = offset
+
+    def __repr__(self):
+        return f"<XPCurve(step={self.step}, offset={self.offset})>"
+
+    def cost(self, level: int) -> int:
+        """level → level+1 에 필요한 경험치"""
+        return self.step * level + self.offset
+
+    def cumulative(self, level: int) -> int:
+        """레벨 1에서 level까지 올라가는 데 필요한 총 경험치"""
+        n = level - 1
+        return self.step * n * (n + 1) // 2 + self.offset * n
+
+    def level_for_total(self, total: int) -> int:
+        """
+        누적 경험치 total로 도달하는 최대 레벨
+
+        step * n(n+1)/2 + offset * n <= total 인 최대 n을 정수 제곱근으로 구합니다.
+        """
+        if total <= 0:
+            return 1
+        if self.step == 0:
+            return 1 + total // self.offset
+
+        # step * n^2 + (step + 2*offset) * n - 2*total <= 0
+        b = self.step + 2 * self.offset
+        n = (isqrt(b * b + 8 * self.step * total) - b) // (2 * self.step)
+
+        # 정수 나눗셈 오차 보정
+        while self.cumulative(n + 2) <= total:
+            n += 1
+        while n > 0 and self.cumulative(n + 1) > total:
+            n -= 1
+        return n + 1
+
+
+DEFAULT_CURVE = XPCurve(
+    step=int(os.getenv("LEVEL_EXP_STEP", "100")),
+    offset=int(os.getenv("LEVEL_EXP_OFFSET", "0")),
+)
+
+
+# ============================================
+# 경험치 적용
+# ============================================
+
+def apply_exp(level: int, exp: int, exp_gain: int, curve: XPCurve = DEFAULT_CURVE) -> Tuple[int, int]:
+    """
+    경험치 획득 후 (레벨, 남은 경험치)
+
+    `while exp >= cost(level)` 반복문과 같은 결과를 O(1)로 계산합니다.
+    """
+    total = curve.cumulative(level) + exp + exp_gain
+    new_level = max(level, curve.level_for_total(total))
+    return new_level, total - curve.cumulative(new_level)
+
+
+def apply_exp_batch(
+    rows: Iterable[Tuple[int, int, int]],
+    curve: XPCurve = DEFAULT_CURVE,
+) -> List[Tuple[int, int, int]]:
+    """
+    여러 캐릭터에 한 번에 경험치 적용 (일괄 지급 작업용)
+
+    Args:
+        rows: (레벨, 경험치, 획득 경험치) 목록
+
+    Returns:
+        list: (새 레벨, 남은 경험치, 레벨업 횟수) 목록
+    """
+    results = []
+    for level, exp, exp_gain in rows:
+        new_level, new_exp = apply_exp(level, exp, exp_gain, curve)
+        results.append((new_level, new_exp, new_level - level))
+    return results
@@ -0,0 +1,81 @@
+"""
+이벤트 루프 지연 측정
+- 일정 간격으로 잠들었다 깨어나는 작업을 돌려, 예정보다 늦게 깬 시간(= 루프가 막힌 시간)을 기록
+- 스트리밍 제너레이터 등에서 루프를 막는 코드가 생기면 지연 시간이 바로 올라감
+- 서버(lifespan)와 부하 테스트 클라이언트에서 함께 사용
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# 측정 간격 (초)
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.1"))
+# 백분위 계산에 쓰는 최근 측정값 수
+LOOP_LAG_WINDOW = int(os.getenv("LOOP_LAG_WINDOW", "600"))
+
+
+class LoopLagMonitor:
+    """이벤트 루프 지연 측정기 (start() 후 stats()로 조회)"""
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL, window: int = LOOP_LAG_WINDOW):
+        self.interval = interval
+        self._recent = deque(maxlen=window)
+        self._task: Optional[asyncio.Task] = None
+        self.samples = 0
+        self.max_lag = 0.0
+        self.total_lag = 0.0
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def reset(self) -> None:
+        self._recent.clear()
+        self.samples = 0
+        self.max_lag = 0.0
+        self.total_lag = 0.0
+
+    async def _run(self) -> None:
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - expected)
+            self._recent.append(lag)
+            self.samples += 1
+            self.total_lag += lag
+            self.max_lag = max(self.max_lag, lag)
+
+    def stats(self) -> dict:
+        recent = sorted(self._recent)
+
+        def pct(p):
+            if not recent:
+                return 0.0
+            return round(recent[min(len(recent) - 1, int(p / 100 * len(recent)))] * 1000, 3)
+
+        return {
+            "samples": self.samples,
+            "interval_ms": self.interval * 1000,
+            "avg_ms": round(self.total_lag / self.samples * 1000, 3) if self.samples else 0.0,
+            "p99_ms": pct(99),
+            "max_ms": round(self.max_lag * 1000, 3),
+        }
+
+
+loop_monitor = LoopLagMonitor()
@@ -7,31 +7,78 @@ from fastapi.staticfiles import StaticFiles
 from fastapi import FastAPI, Depends, HTTPException, File, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel
 import aiofiles
 import uvicorn
 import shutil
+import time
 
 # 로컬 모듈
-from database import engine, get_db, Base
-from models import CharacterState, FoodRecord, Food
-from chatbot import with_message_history
-from weather_service import fetch_weather
-from kakao_service import search_places
-from recommendation_system import recommend_4_foods
-from foods_data import FOOD_DATABASE, load_foods_from_csv
-
-# 데이터베이스 테이블 생성
+from database import engine, get_async_db, Base, AsyncSessionLocal, async_engine
+from models import FoodRecord
+from chatbot import session_store, stream_chat
+from chat_cache import chat_cache
+from loop_monitor import loop_monitor
+from weather_service import fetch_weather, weather_cache
+from weather_prefetcher import WEATHER_PREFETCH_ENABLED, weather_prefetcher
+from kakao_service import PLACE_RESULT_MAX_LIMIT, get_place_cache_stats, search_places, search_places_many
+from place_store import load_place_store, normalize_keyword, place_store, save_place_store
+from http_client import startup_http_client, shutdown_http_client, get_http_stats
+from db_instrumentation import EndpointContextMiddleware, get_query_stats, stop_query_log
+from recommendation_system import recommend_4_foods, recommend_batch
+from recommendation_history import close_recent_store, get_recent_store_stats
+from personalized_recommender import get_food_matrix, load_user_profile, recommend_personalized
+from food_catalog import ensure_catalog, get_catalog, reload_catalog
+from migrations import run_migrations
+from character_service import (
+    apply_meal_reward, character_to_dict, current_satiety, get_or_create_character, update_character
+)
+from diary_service import get_diary_page, iter_diary_export, export_content_disposition, DEFAULT_PAGE_SIZE
+from foods_data import get_food, load_foods_from_csv
+
+# 데이터베이스 테이블 생성 및 마이그레이션
 Base.metadata.create_all(bind=engine)
+run_migrations(engine)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """앱 시작/종료 시 공용 리소스 관리"""
+    # 이벤트 루프 지연 측정 (스트리밍 등에서 루프를 막는 코드 감지)
+    loop_monitor.start()
+    # 외부 API 공용 HTTP 클라이언트 (커넥션 풀 재사용)
+    await startup_http_client()
+    # 인기 지역 날씨 미리 가져오기
+    if WEATHER_PREFETCH_ENABLED:
+        weather_prefetcher.start()
+    # 음식 카탈로그 스냅샷 (추천 시 DB 조회 없이 사용)
+    async with AsyncSessionLocal() as db:
+        await reload_catalog(db)
+    # CSV 음식 데이터 (DB에 없는 음식의 카테고리 보완용)
+    load_foods_from_csv()
+    # 로컬 맛집 저장소 (스냅샷 + 일괄 가져오기 파일)
+    load_place_store()
+    yield
+    save_place_store()
+    await weather_prefetcher.stop()
+    await shutdown_http_client()
+    await close_recent_store()
+    session_store.close()
+    await loop_monitor.stop()
+    await async_engine.dispose()
+    stop_query_log()
+
 
 # FastAPI 앱 생성
 app = FastAPI(
     title="밥토리 API",
     description="날씨 기반 음식 추천 및 캐릭터 육성 시스템",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS 설정
@@ -51,6 +98,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 쿼리 로그에 호출한 엔드포인트를 남기기 위해 요청 경로 기록
+app.add_middleware(EndpointContextMiddleware)
+
 # 정적 파일 마운트 (이미지 제공용)
 # /images URL 경로를 'foods' 디렉토리와 연결합니다.
 app.mount("/images", StaticFiles(directory="foods/images"), name="images")
@@ -77,6 +127,28 @@ def read_root():
     }
 
 
+# ============================================
+# 운영 통계 API
+# ============================================
+
+@app.get("/stats")
+def get_stats():
+    """서버 내부 통계 (커넥션 풀, 캐시 등)"""
+    return {
+        "http": get_http_stats(),
+        "weather_cache": weather_cache.stats(),
+        "weather_prefetch": weather_prefetcher.stats(),
+        "place_cache": get_place_cache_stats(),
+        "place_store": place_store.stats(),
+        "food_catalog": get_catalog().stats(),
+        "recent_recommendations": get_recent_store_stats(),
+        "chat_sessions": session_store.stats(),
+        "chat_cache": chat_cache.stats(),
+        "event_loop": loop_monitor.stats(),
+        "sql": get_query_stats(),
+    }
+
+
 # ============================================
 # 날씨 API
 # ============================================
@@ -102,7 +174,8 @@ async def get_places(
     keyword: str = "맛집",
     lat: float = 35.8714,
     lon: float = 128.6014,
-    radius: int = 1000
+    radius: int = 1000,
+    limit: int = 5
 ):
     """
     주변 맛집 검색
@@ -111,8 +184,33 @@ async def get_places(
     - **lat**: 위도
     - **lon**: 경도
     - **radius**: 검색 반경 (미터)
+    - **limit**: 최대 맛집 수 (1~50)
     """
-    places = await search_places(keyword, lat, lon, radius)
+    limit = max(1, min(limit, PLACE_RESULT_MAX_LIMIT))
+    places = await search_places(keyword, lat, lon, radius, limit)
+
+    return {
+        "keyword": keyword,
+        "count": len(places),
+        "places": places
+    }
+
+
+@app.get("/places/nearest")
+def get_nearest_places(
+    lat: float = 35.8714,
+    lon: float = 128.6014,
+    k: int = 5,
+    keyword: str = ""
+):
+    """
+    가장 가까운 맛집 k개 (로컬 저장소만 사용, 카카오 호출 없음)
+    
+    - **keyword**: 검색 키워드 (비우면 전체)
+    - **k**: 맛집 수 (1~50)
+    """
+    k = max(1, min(k, PLACE_RESULT_MAX_LIMIT))
+    places = place_store.nearest(lat, lon, k, normalize_keyword(keyword) or None)
 
     return {
         "keyword": keyword,
@@ -126,74 +224,38 @@ async def get_places(
 # ============================================
 
 @app.get("/character/state")
-def get_character_state(user_id: str = "default_user", db: Session = Depends(get_db)):
-    """캐릭터 현재 상태 조회"""
-    character = db.query(CharacterState).filter(CharacterState.user_id == user_id).first()
-    
-    if not character:
-        # 캐릭터가 없으면 새로 생성
-        character = CharacterState(user_id=user_id)
-        db.add(character)
-        db.commit()
-        db.refresh(character)
+async def get_character_state(user_id: str = "default_user", db: AsyncSession = Depends(get_async_db)):
+    """
+    캐릭터 현재 상태 조회
     
-    # 포만감 자동 감소 계산 (시간 경과)
-    if character.last_update_time:
-        now = datetime.now()
-        last_update_time = character.last_update_time
-
-        # ✅ 둘 다 tz정보를 제거해서 같은 타입으로 맞춰주기
-        now_naive = now.replace(tzinfo=None)
-        last_naive = last_update_time.replace(tzinfo=None)
-
-        time_diff = now_naive - last_naive
-        hours_passed = time_diff.total_seconds() / 3600
-        
-        # 1시간당 10% 감소
-        satiety_decrease = int(hours_passed * 10)
-        character.satiety = max(0, character.satiety - satiety_decrease)
-        character.last_update_time = now
-        db.commit()
+    포만감 감소(1시간당 10%)는 조회 시점에 계산만 하고 저장하지 않습니다.
+    """
+    # 캐릭터가 없으면 새로 생성
+    character = await get_or_create_character(db, user_id)
     
-    return character.to_dict()
+    return character_to_dict(character)
 
 @app.post("/character/update")
-def update_character_state(
+async def update_character_state(
     satiety: Optional[int] = None,
     friendship: Optional[int] = None,
     exp_gain: int = 0,
     user_id: str = "default_user",
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """캐릭터 상태 업데이트"""
-    character = db.query(CharacterState).filter(CharacterState.user_id == user_id).first()
+    """캐릭터 상태 업데이트 (행 잠금 후 한 번에 적용)"""
+    character, level_up = await update_character(
+        db, user_id, satiety=satiety, friendship=friendship, exp_gain=exp_gain
+    )
     
     if not character:
         raise HTTPException(status_code=404, detail="캐릭터를 찾을 수 없습니다.")
     
-    # 상태 업데이트
-    if satiety is not None:
-        character.satiety = max(0, min(100, satiety))
-    if friendship is not None:
-        character.friendship = max(0, min(100, friendship))
-    
-    # 경험치 및 레벨업
-    level_up = False
-    if exp_gain > 0:
-        character.exp += exp_gain
-        
-        # 레벨업 체크 (레벨 * 100 경험치 필요)
-        while character.exp >= character.level * 100:
-            character.exp -= character.level * 100
-            character.level += 1
-            level_up = True
-    
-    db.commit()
-    db.refresh(character)
+    await db.commit()
     
     return {
         "message": "캐릭터 상태가 업데이트되었습니다.",
-        "character": character.to_dict(),
+        "character": character_to_dict(character),
         "level_up": level_up
     }
 
@@ -202,59 +264,182 @@ def update_character_state(
 # 음식 추천 API
 # ============================================
 
-@app.get("/food/recommend")
-async def recommend_food(
-    lat: float = 35.8714,
-    lon: float = 128.6014,
-    user_id: str = "default_user",
-    db: Session = Depends(get_db)
-):
-    """
-    날씨 기반 음식 4개 추천
-    
-    - 날씨 기반 (재료) 1개
-    - 날씨 기반 (카테고리) 1개
-    - 랜덤 2개
-    """
+def to_absolute_image_urls(recommendations, base_url: str = "http://localhost:8000"):
+    """추천 목록의 imageUrl을 프론트엔드에서 바로 쓸 수 있는 전체 URL로 변환"""
+    for item in recommendations:
+        # 'imageUrl' 키가 있고, 값이 비어있지 않은 경우
+        if item.get("imageUrl"):
+            # 'imageUrl'이 http로 시작하지 않으면, base_url을 앞에 붙여 완전한 URL로 만듦
+            if not str(item["imageUrl"]).startswith("http"):
+                item["imageUrl"] = f"{base_url}{item['imageUrl']}"
+
+
+async def build_recommend_response(db: AsyncSession, lat: float, lon: float, user_id: str):
+    """/food/recommend 응답 (날씨 + 캐릭터 + 추천 4개)"""
     # 1. 날씨 정보
     weather = await fetch_weather(lat, lon)
     
     # 2. 캐릭터 상태
-    character = db.query(CharacterState).filter(CharacterState.user_id == user_id).first()
-    
-    if not character:
-        character = CharacterState(user_id=user_id)
-        db.add(character)
-        db.commit()
-        db.refresh(character)
+    character = await get_or_create_character(db, user_id)
     
     # 3. 음식 추천 (4개)
-    recommendations = recommend_4_foods(
+    recommendations = await recommend_4_foods(
         db,
         weather["condition"],
-        weather["temperature"]
+        weather["temperature"],
+        humidity=weather.get("humidity"),
+        feels_like=weather.get("feels_like"),
+        user_id=user_id,
     )
     
     # image_url을 프론트엔드에서 바로 사용할 수 있는 전체 URL로 변환
-    base_url = "http://localhost:8000"
-    for item in recommendations:
-        # 'imageUrl' 키가 있고, 값이 비어있지 않은 경우
-        if item.get("imageUrl"):
-            # 'imageUrl'이 http로 시작하지 않으면, base_url을 앞에 붙여 완전한 URL로 만듦
-            if not str(item["imageUrl"]).startswith("http"):
-                item["imageUrl"] = f"{base_url}{item['imageUrl']}"
+    to_absolute_image_urls(recommendations)
 
     return {
         "weather": weather,
         "character": {
             "level": character.level,
-            "satiety": character.satiety,
+            "satiety": current_satiety(character),
             "friendship": character.friendship
         },
         "recommendations": recommendations
     }
 
 
+@app.get("/food/recommend")
+async def recommend_food(
+    lat: float = 35.8714,
+    lon: float = 128.6014,
+    user_id: str = "default_user",
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    날씨 기반 음식 4개 추천
+    
+    - 날씨 기반 (재료) 1개
+    - 날씨 기반 (카테고리) 1개
+    - 랜덤 2개
+    """
+    return await build_recommend_response(db, lat, lon, user_id)
+
+
+RECOMMEND_PLACES_MAX_FOODS = 10
+
+
+class RecommendPlacesRequest(BaseModel):
+    lat: float = 35.8714
+    lon: float = 128.6014
+    user_id: str = "default_user"
+    radius: int = 1000
+    limit: int = 5
+    # 이미 받은 추천 음식 이름 (없으면 새로 추천)
+    foods: Optional[List[str]] = None
+
+
+@app.post("/food/recommend/places")
+async def recommend_food_places(request: RecommendPlacesRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    추천 음식별 주변 맛집을 한 번에 검색 (추천 화면용)
+    
+    - foods가 없으면 /food/recommend와 같이 새로 추천하고 그 결과도 함께 반환
+    - 음식마다 맛집 검색을 동시에 실행하고, 음식별 검색 시간(elapsed_ms)을 포함
+    """
+    if request.foods is not None and len(request.foods) > RECOMMEND_PLACES_MAX_FOODS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"한 번에 최대 {RECOMMEND_PLACES_MAX_FOODS}개 음식까지 요청할 수 있습니다.",
+        )
+    
+    started = time.perf_counter()
+    response = {}
+    foods = request.foods
+    if foods is None:
+        response = await build_recommend_response(db, request.lat, request.lon, request.user_id)
+        foods = [food["name"] for food in response["recommendations"]]
+    
+    limit = max(1, min(request.limit, PLACE_RESULT_MAX_LIMIT))
+    response["places"] = await search_places_many(foods, request.lat, request.lon, request.radius, limit)
+    response["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return response
+
+
+@app.get("/food/recommend/personal")
+async def recommend_food_personal(
+    user_id: str = "default_user",
+    count: int = 4,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    개인화 음식 추천
+    
+    - 선호/비선호 카테고리·재료와 먹은 기록으로 점수 계산
+    - 알러지/식이 제한에 해당하는 음식은 제외
+    """
+    count = max(1, min(count, 20))
+    catalog = await ensure_catalog(db)
+    profile = await load_user_profile(db, user_id)
+    recommendations = recommend_personalized(get_food_matrix(catalog), profile, count=count)
+    to_absolute_image_urls(recommendations)
+    
+    return {
+        "user_id": user_id,
+        "recommendations": recommendations,
+    }
+
+
+# 한 번에 받을 수 있는 최대 사용자 수 (IN 쿼리 파라미터 수 제한)
+RECOMMEND_BATCH_MAX = 5000
+
+
+class RecommendTarget(BaseModel):
+    user_id: str
+    lat: float
+    lon: float
+
+
+class RecommendBatchRequest(BaseModel):
+    targets: List[RecommendTarget]
+
+
+@app.post("/food/recommend/batch")
+async def recommend_food_batch(request: RecommendBatchRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    여러 사용자 음식 추천 일괄 생성 (아침 푸시 알림 사전 생성용)
+    
+    - 같은 날씨 격자 셀의 사용자는 날씨를 한 번만 조회
+    - 캐릭터는 한 번의 IN 쿼리로 조회
+    - 결과는 요청 순서대로 /food/recommend와 같은 형식 + user_id
+    """
+    if len(request.targets) > RECOMMEND_BATCH_MAX:
+        raise HTTPException(
+            status_code=400,
+            detail=f"한 번에 최대 {RECOMMEND_BATCH_MAX}명까지 요청할 수 있습니다.",
+        )
+    
+    results = await recommend_batch(db, ((t.user_id, t.lat, t.lon) for t in request.targets))
+    for result in results:
+        to_absolute_image_urls(result["recommendations"])
+    
+    return {
+        "count": len(results),
+        "results": results,
+    }
+
+
+@app.post("/food/catalog/reload")
+async def reload_food_catalog(db: AsyncSession = Depends(get_async_db)):
+    """
+    음식 카탈로그 스냅샷 다시 읽기
+    
+    foods 테이블이 바뀐 뒤 호출하면 새 스냅샷으로 교체됩니다.
+    """
+    catalog = await reload_catalog(db)
+    return {
+        "message": "음식 카탈로그를 다시 불러왔습니다.",
+        "catalog": catalog.stats()
+    }
+
+
 # ============================================
 # 음식 선택 API
 # ============================================
@@ -268,7 +453,7 @@ async def select_food(
     category: Optional[str] = None,
     lat: float = 35.8714,
     lon: float = 128.6014,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     음식 선택 및 사진 업로드
@@ -277,39 +462,16 @@ async def select_food(
     - 다른 음식: 친밀도 +5%, 경험치 +10
     - 포만감은 동일하게 +40%
     """
-    # 캐릭터 가져오기
-    character = db.query(CharacterState).filter(CharacterState.user_id == user_id).first()
-    
-    if not character:
-        character = CharacterState(user_id=user_id)
-        db.add(character)
-        db.commit()
-        db.refresh(character)
-    
     # 보상 계산
     satiety_gain = 40
     friendship_gain = 20 if is_recommended else 5
     exp_gain = 50 if is_recommended else 10
     
-    # 캐릭터 상태 업데이트
-    character.satiety = min(100, character.satiety + satiety_gain)
-    character.friendship = min(100, character.friendship + friendship_gain)
-    character.exp += exp_gain
-    character.last_meal_time = datetime.now()
-    character.last_update_time = datetime.now()
-    
-    # 레벨업 체크
-    level_up = False
-    while character.exp >= character.level * 100:
-        character.exp -= character.level * 100
-        character.level += 1
-        level_up = True
-    
     # 날씨 정보 가져오기
     weather = await fetch_weather(lat, lon)
     
     # 음식 정보 가져오기 (카테고리, 재료 등)
-    food_info = db.query(Food).filter(Food.name == food_name).first()
+    food_info = (await ensure_catalog(db)).by_name.get(food_name)
     food_category = food_info.category if food_info else None
     food_ingredients = food_info.ingredients if food_info else None
 
@@ -330,12 +492,9 @@ async def select_food(
     record_category = category or food_category
 
     if not record_category:
-        if not FOOD_DATABASE:
-            load_foods_from_csv()
-        for food in FOOD_DATABASE:
-            if food["name"] == food_name:
-                record_category = food["category"]
-                break
+        csv_food = get_food(food_name)
+        if csv_food:
+            record_category = csv_food.category
 
     # 음식 기록 저장
     food_record = FoodRecord(
@@ -352,9 +511,13 @@ async def select_food(
         temperature=weather["temperature"],
     )
     
+    # 캐릭터 상태 업데이트
+    # 외부 API/파일 작업이 끝난 뒤 행을 잠그고 보상과 기록을 한 트랜잭션으로 저장
+    character, level_up = await apply_meal_reward(
+        db, user_id, satiety_gain, friendship_gain, exp_gain
+    )
     db.add(food_record)
-    db.commit()
-    db.refresh(character)
+    await db.commit()
     
     # 캐릭터 반응
     if is_recommended:
@@ -372,7 +535,7 @@ async def select_food(
             "friendship_gain": friendship_gain,
             "exp_gain": exp_gain
         },
-        "character": character.to_dict(),
+        "character": character_to_dict(character),
         "level_up": level_up
     }
 
@@ -395,18 +558,14 @@ async def chat_with_bot(request: ChatRequest):
     - **message**: 사용자가 보낸 메시지
     """
     try:
-        async def stream_generator():
-            """스트리밍 응답을 생성하는 제너레이터"""
-            config = {"configurable": {"session_id": request.session_id}}
-            
-            # 챗봇 체인을 스트림 방식으로 호출
-            async for chunk in with_message_history.astream(
-                {"message": request.message},
-                config=config
-            ):
-                yield chunk.content
-
-        return StreamingResponse(stream_generator(), media_type="text/plain")
+        # 저장된 세션은 미리 불러 둠 (DB 조회로 이벤트 루프를 막지 않도록)
+        await session_store.prepare(request.session_id)
+        
+        # 응답 캐시 확인 후 챗봇 체인을 스트림 방식으로 호출
+        return StreamingResponse(
+            stream_chat(request.session_id, request.message),
+            media_type="text/plain",
+        )
     except Exception as e:
         print(f"챗봇 API 오류: {e}")
         raise HTTPException(status_code=500, detail="챗봇 응답 중 오류가 발생했습니다.")
@@ -417,19 +576,51 @@ async def chat_with_bot(request: ChatRequest):
 # ============================================
 
 @app.get("/food/diary")
-def get_food_diary(user_id: str = "default_user", db: Session = Depends(get_db)):
-    records = (
-        db.query(FoodRecord)
-        .filter(FoodRecord.user_id == user_id)
-        .order_by(FoodRecord.created_at.desc())
-        .all()
-    )
+async def get_food_diary(
+    user_id: str = "default_user",
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    음식 일기 조회 (최신순, 커서 페이지네이션)
+    
+    - **limit**: 페이지 크기 (최대 200)
+    - **cursor**: 이전 응답의 next_cursor
+    - **fields**: 필요한 필드만 조회 (예: "food_name,created_at")
+    """
+    try:
+        return await get_diary_page(db, user_id, limit=limit, cursor=cursor, fields=fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    return {
-        "user_id": user_id,
-        "total_count": len(records),
-        "records": [record.to_dict() for record in records],  # ✅ 여기
-    }
+@app.get("/food/diary/export")
+async def export_food_diary(
+    user_id: str = "default_user",
+    format: str = "ndjson",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    cursor: Optional[str] = None
+):
+    """
+    음식 일기 전체 내보내기 (스트리밍, 오래된 순)
+    
+    - **format**: ndjson 또는 csv
+    - **start** / **end**: 기간 필터 (start 포함, end 미포함)
+    - **cursor**: 이어받기 위치 (마지막으로 받은 행의 cursor 값)
+    """
+    try:
+        rows = iter_diary_export(user_id, format=format, start=start, end=end, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        rows,
+        media_type=media_type,
+        headers={"Content-Disposition": export_content_disposition(user_id, format)}
+    )
 
 # ============================================
 # 서버 실행
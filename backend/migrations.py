@@ -0,0 +1,119 @@
+"""
+데이터베이스 스키마 마이그레이션
+- create_all()은 기존 테이블에 컬럼/인덱스를 추가하지 않으므로
+  이미 운영 중인 DB는 여기서 순서대로 변경 사항을 적용
+- 적용한 마이그레이션은 schema_migrations 테이블에 기록 (중복 실행 안전)
+
+Usage:
+    python migrations.py
+"""
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+
+# ============================================
+# 마이그레이션 목록 (순서대로 적용)
+# ============================================
+
+MIGRATIONS = [
+    (
+        "0001_ingredient_tags",
+        [
+            # 쉼표 문자열 → 배열 태그 컬럼
+            "ALTER TABLE foods ADD COLUMN IF NOT EXISTS ingredient_tags VARCHAR(50)[]",
+            "ALTER TABLE food_records ADD COLUMN IF NOT EXISTS ingredient_tags VARCHAR(50)[]",
+            # 기존 데이터 변환 ("고기, 국물,밥" → {고기,국물,밥})
+            """
+            UPDATE foods SET ingredient_tags = ARRAY(
+                SELECT btrim(tag) FROM unnest(string_to_array(ingredients, ',')) AS tag
+                WHERE btrim(tag) <> ''
+            )
+            WHERE ingredients IS NOT NULL
+            """,
+            """
+            UPDATE food_records SET ingredient_tags = ARRAY(
+                SELECT btrim(tag) FROM unnest(string_to_array(ingredients, ',')) AS tag
+                WHERE btrim(tag) <> ''
+            )
+            WHERE ingredients IS NOT NULL
+            """,
+            # 포함 검색(@>)용 GIN 인덱스
+            "CREATE INDEX IF NOT EXISTS ix_foods_ingredient_tags ON foods USING gin (ingredient_tags)",
+            "CREATE INDEX IF NOT EXISTS ix_food_records_ingredient_tags ON food_records USING gin (ingredient_tags)",
+        ],
+    ),
+    (
+        "0002_diary_pagination",
+        [
+            # 일기 커서 페이지네이션용 복합 인덱스
+            """
+            CREATE INDEX IF NOT EXISTS ix_food_records_user_created_id
+            ON food_records (user_id, created_at DESC, id DESC)
+            """,
+            # 일기 개수 카운터
+            "ALTER TABLE character_states ADD COLUMN IF NOT EXISTS diary_count INTEGER NOT NULL DEFAULT 0",
+            """
+            UPDATE character_states AS c SET diary_count = (
+                SELECT count(*) FROM food_records AS r WHERE r.user_id = c.user_id
+            )
+            """,
+        ],
+    ),
+    (
+        "0003_unique_character_user",
+        [
+            # 동시 생성으로 생긴 중복 캐릭터 정리 (가장 먼저 만든 행만 유지)
+            """
+            DELETE FROM character_states AS c
+            USING character_states AS keep
+            WHERE c.user_id = keep.user_id AND c.id > keep.id
+            """,
+            # 사용자당 캐릭터 1개 (INSERT ... ON CONFLICT (user_id) 용)
+            "DROP INDEX IF EXISTS ix_character_states_user_id",
+            "CREATE UNIQUE INDEX ix_character_states_user_id ON character_states (user_id)",
+        ],
+    ),
+]
+
+
+def run_migrations(engine: Engine) -> list:
+    """
+    적용되지 않은 마이그레이션 실행
+
+    Returns:
+        list: 이번에 적용한 마이그레이션 이름
+    """
+    applied_now = []
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                name VARCHAR(100) PRIMARY KEY,
+                applied_at TIMESTAMPTZ DEFAULT now()
+            )
+        """))
+        applied = {row[0] for row in conn.execute(text("SELECT name FROM schema_migrations"))}
+
+    for name, statements in MIGRATIONS:
+        if name in applied:
+            continue
+
+        # 마이그레이션 하나는 하나의 트랜잭션으로 적용
+        with engine.begin() as conn:
+            for statement in statements:
+                conn.execute(text(statement))
+            conn.execute(text("INSERT INTO schema_migrations (name) VALUES (:name)"), {"name": name})
+
+        print(f"[migrations] 적용 완료: {name}")
+        applied_now.append(name)
+
+    return applied_now
+
+
+if __name__ == "__main__":
+    from database import engine, Base
+    import models  # noqa: F401  (Base에 테이블 메타데이터 등록)
+
+    Base.metadata.create_all(bind=engine)
+    applied = run_migrations(engine)
+    print(f"적용한 마이그레이션: {len(applied)}개")
@@ -3,8 +3,11 @@
 Tamagotchi Clone 참고: https://github.com/ChrisChrisLoLo/tamagotchiClone
 """
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, Index
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import validates
 from sqlalchemy.sql import func
+from catalog_snapshot import split_ingredients
 from database import Base
 
 
@@ -26,7 +29,7 @@ class CharacterState(Base):
     
     # 기본 키
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    user_id = Column(String(50), default="default_user", index=True)
+    user_id = Column(String(50), default="default_user", unique=True, index=True)  # 사용자당 캐릭터 1개
     
     # 캐릭터 상태 (Tamagotchi 참고)
     satiety = Column(Integer, default=50)  # 포만감 (0-100)
@@ -36,6 +39,9 @@ class CharacterState(Base):
     exp = Column(Integer, default=0)  # 경험치
     level = Column(Integer, default=1)  # 레벨
     
+    # 음식 일기 개수 (기록 저장 시 함께 증가, /food/diary total_count용)
+    diary_count = Column(Integer, default=0, server_default="0", nullable=False)
+    
     # 시간 정보
     last_meal_time = Column(DateTime(timezone=True), nullable=True)
     last_update_time = Column(DateTime(timezone=True), server_default=func.now())
@@ -70,6 +76,10 @@ class Food(Base):
     recommendation_system에서 사용하는 음식 데이터베이스
     """
     __tablename__ = "foods"
+    __table_args__ = (
+        # 재료 포함 검색 (ingredient_tags @> ARRAY[...]) 용 GIN 인덱스
+        Index("ix_foods_ingredient_tags", "ingredient_tags", postgresql_using="gin"),
+    )
     
     # 기본 키
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
@@ -78,6 +88,7 @@ class Food(Base):
     name = Column(String(100), nullable=False, index=True, unique=True)
     category = Column(String(50), nullable=True)  # 한식, 중식, 일식 등
     ingredients = Column(String(200), nullable=True)  # 고기,면,국물 등
+    ingredient_tags = Column(ARRAY(String(50)), nullable=True)  # ["고기", "면", "국물"]
     image_url = Column(Text, nullable=True)  # 음식 이미지 URL
     description = Column(Text, nullable=True) # 음식 설명
     
@@ -87,6 +98,12 @@ class Food(Base):
     def __repr__(self):
         return f"<Food(name='{self.name}', category='{self.category}')>"
     
+    @validates("ingredients")
+    def _sync_ingredient_tags(self, key, value):
+        """ingredients 문자열이 바뀌면 ingredient_tags도 함께 갱신"""
+        self.ingredient_tags = list(split_ingredients(value))
+        return value
+    
     def to_dict(self):
         """딕셔너리로 변환"""
         return {c.name: getattr(self, c.name) for c in self.__table__.columns}
@@ -102,6 +119,9 @@ class FoodRecord(Base):
     사용자가 먹은 음식을 기록 (음식 일기/도감용)
     """
     __tablename__ = "food_records"
+    __table_args__ = (
+        Index("ix_food_records_ingredient_tags", "ingredient_tags", postgresql_using="gin"),
+    )
     
     # 기본 키
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
@@ -111,6 +131,7 @@ class FoodRecord(Base):
     food_name = Column(String(100), nullable=False, index=True)
     category = Column(String(50), nullable=True)  # 한식, 중식, 일식 등
     ingredients = Column(String(200), nullable=True)  # 고기/면/국물 등
+    ingredient_tags = Column(ARRAY(String(50)), nullable=True)
     
     # 추천 여부
     is_recommended = Column(Boolean, default=False)  # 밥토리가 추천한 음식인지
@@ -137,6 +158,12 @@ class FoodRecord(Base):
     def __repr__(self):
         return f"<FoodRecord(food_name='{self.food_name}', is_recommended={self.is_recommended})>"
     
+    @validates("ingredients")
+    def _sync_ingredient_tags(self, key, value):
+        """ingredients 문자열이 바뀌면 ingredient_tags도 함께 갱신"""
+        self.ingredient_tags = list(split_ingredients(value))
+        return value
+    
     def to_dict(self):
         """딕셔너리로 변환"""
         return {
@@ -156,6 +183,15 @@ class FoodRecord(Base):
         }
 
 
+# 일기 커서 페이지네이션용 복합 인덱스 (user_id, created_at DESC, id DESC)
+Index(
+    "ix_food_records_user_created_id",
+    FoodRecord.user_id,
+    FoodRecord.created_at.desc(),
+    FoodRecord.id.desc(),
+)
+
+
 # ============================================
 # 사용자 선호도 모델 (추후 확장)
 # ============================================
@@ -0,0 +1,292 @@
+"""
+개인화 음식 추천
+- UserPreference(선호/비선호, 알러지, 식이 제한)와 FoodRecord(먹은 기록)로 사용자 취향 벡터 생성
+- 음식은 [카테고리 one-hot | 재료 multi-hot] 특성 행렬로 카탈로그가 바뀔 때 미리 계산
+- 점수 = 음식 행렬 × 취향 벡터 (행렬-벡터 곱 한 번) - 최근에 먹은 음식 감점
+- 알러지/식이 제한은 마스크로 완전히 제외, 상위 k개 중에서 점수 비례로 추출
+
+DB 조회(load_user_profile)와 점수 계산(recommend_personalized)을 나눠
+점수 계산은 메모리만 사용합니다 (5만 개 카탈로그 기준 1회 2ms 이내).
+"""
+
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from character_service import utc_now
+from food_catalog import CatalogSnapshot, register_catalog_listener
+from models import FoodRecord, UserPreference, split_ingredients
+
+# 취향 벡터 가중치
+FAVORITE_WEIGHT = 1.0
+DISLIKE_WEIGHT = -1.5
+HISTORY_WEIGHT = 1.0  # 먹은 기록에서 나온 취향 (기록 전체 합이 1이 되도록 정규화)
+REPEAT_PENALTY = 2.0  # 같은 음식을 최근에 먹었으면 감점 (오늘 먹은 음식 = 2.0)
+
+# 먹은 기록 반영 범위
+HISTORY_LIMIT = 200
+HISTORY_HALF_LIFE_DAYS = 14.0
+
+# 상위 후보 수 / 점수 → 추출 확률 온도
+TOP_K = 20
+SAMPLE_TEMPERATURE = 0.5
+
+# 태그에 없는 알러지 항목의 문자열 검색 결과를 보관하는 항목 수 (LRU, 항목마다 음식 수 바이트)
+TEXT_MASK_CACHE_SIZE = 64
+
+# 식이 제한 → 제외할 재료 태그
+DIETARY_EXCLUDES: Dict[str, Tuple[str, ...]] = {
+    "채식": ("고기", "닭", "해산물"),
+    "비건": ("고기", "닭", "해산물"),
+    "페스코": ("고기", "닭"),
+}
+
+
+def _split(value: Optional[str]) -> Tuple[str, ...]:
+    """UserPreference의 쉼표 문자열 → 태그 튜플 ("한식,중식" → ("한식", "중식"))"""
+    return split_ingredients(value)
+
+
+# ============================================
+# 음식 특성 행렬 (카탈로그 스냅샷마다 한 번)
+# ============================================
+
+class FoodMatrix:
+    """카탈로그 스냅샷의 음식 특성 행렬"""
+
+    def __init__(self, catalog: CatalogSnapshot):
+        self.catalog = catalog
+        self.categories = sorted({f.category for f in catalog.foods if f.category})
+        self.ingredients = sorted({tag for f in catalog.foods for tag in f.ingredient_tags})
+        self.columns: Dict[str, int] = {}
+        for name in self.categories:
+            self.columns[f"category:{name}"] = len(self.columns)
+        for name in self.ingredients:
+            self.columns[f"ingredient:{name}"] = len(self.columns)
+
+        n = len(catalog.foods)
+        self.ids = np.fromiter((f.id for f in catalog.foods), dtype=np.int64, count=n)
+        self.row_by_name: Dict[str, int] = {f.name: row for row, f in enumerate(catalog.foods)}
+        # (특성 수, 음식 수) 모양으로 저장: 취향 벡터 @ features가 연속 메모리를 읽고
+        # 특성 한 개(재료 마스크 등)도 연속 배열로 꺼낼 수 있음
+        self.features = np.zeros((len(self.columns), n), dtype=np.float32)
+        for row, food in enumerate(catalog.foods):
+            if food.category:
+                self.features[self.columns[f"category:{food.category}"], row] = 1.0
+            for tag in food.ingredient_tags:
+                self.features[self.columns[f"ingredient:{tag}"], row] = 1.0
+
+        # 태그에 없는 알러지 항목(예: 새우)은 이름/재료 문자열로 찾고 결과를 보관
+        # (사용자 입력이라 종류가 끝없이 늘 수 있으므로 최근 TEXT_MASK_CACHE_SIZE개만)
+        self._text_masks: "OrderedDict[str, np.ndarray]" = OrderedDict()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def column(self, kind: str, name: str) -> Optional[int]:
+        return self.columns.get(f"{kind}:{name}")
+
+    def blocked_mask(self, terms: Sequence[str]) -> np.ndarray:
+        """terms(알러지, 제외 재료) 중 하나라도 포함된 음식 = True"""
+        mask = np.zeros(len(self), dtype=bool)
+        for term in terms:
+            col = self.column("ingredient", term)
+            if col is not None:
+                mask |= self.features[col] > 0
+                continue
+            text_mask = self._text_masks.get(term)
+            if text_mask is None:
+                text_mask = np.fromiter(
+                    (term in f.name or term in (f.ingredients or "") for f in self.catalog.foods),
+                    dtype=bool,
+                    count=len(self),
+                )
+                self._text_masks[term] = text_mask
+                while len(self._text_masks) > TEXT_MASK_CACHE_SIZE:
+                    self._text_masks.popitem(last=False)
+            else:
+                self._text_masks.move_to_end(term)
+            mask |= text_mask
+        return mask
+
+
+def _precompute(snapshot: CatalogSnapshot) -> None:
+    snapshot.derived["food_matrix"] = FoodMatrix(snapshot)
+
+
+def get_food_matrix(catalog: CatalogSnapshot) -> FoodMatrix:
+    """스냅샷의 음식 특성 행렬 (리스너 등록 전에 만들어진 스냅샷이면 지금 계산)"""
+    matrix = catalog.derived.get("food_matrix")
+    if matrix is None:
+        matrix = FoodMatrix(catalog)
+        catalog.derived["food_matrix"] = matrix
+    return matrix
+
+
+register_catalog_listener(_precompute)
+
+
+# ============================================
+# 사용자 프로필
+# ============================================
+
+class UserProfile:
+    """추천에 필요한 사용자 정보 (DB 조회 결과만 보관, 카탈로그와 무관)"""
+
+    __slots__ = (
+        "user_id",
+        "favorite_categories",
+        "dislike_categories",
+        "favorite_ingredients",
+        "dislike_ingredients",
+        "blocked_terms",
+        "history",
+    )
+
+    def __init__(
+        self,
+        user_id: str,
+        preference: Optional[UserPreference] = None,
+        history: Sequence[Tuple[str, float]] = (),
+    ):
+        """
+        Args:
+            preference: 사용자 선호도 (없으면 기록만 사용)
+            history: (음식 이름, 감쇠 가중치) 목록
+        """
+        self.user_id = user_id
+        self.favorite_categories = _split(preference.favorite_categories) if preference else ()
+        self.dislike_categories = _split(preference.dislike_categories) if preference else ()
+        self.favorite_ingredients = _split(preference.favorite_ingredients) if preference else ()
+        self.dislike_ingredients = _split(preference.dislike_ingredients) if preference else ()
+
+        blocked = list(_split(preference.allergies)) if preference else []
+        for restriction in (_split(preference.dietary_restrictions) if preference else ()):
+            blocked.extend(DIETARY_EXCLUDES.get(restriction, ()))
+        self.blocked_terms = tuple(dict.fromkeys(blocked))
+        self.history = tuple(history)
+
+
+def history_weight(eaten_at: Optional[datetime], now: datetime) -> float:
+    """먹은 시점에 따른 가중치 (반감기 HISTORY_HALF_LIFE_DAYS일)"""
+    if eaten_at is None:
+        return 0.0
+    days = max(0.0, (now - eaten_at.astimezone(timezone.utc)).total_seconds() / 86400)
+    return 0.5 ** (days / HISTORY_HALF_LIFE_DAYS)
+
+
+async def load_user_profile(db: AsyncSession, user_id: str, now: Optional[datetime] = None) -> UserProfile:
+    """선호도 1건 + 최근 먹은 기록 HISTORY_LIMIT건 조회 (user_id, created_at 인덱스 사용)"""
+    now = now or utc_now()
+    preference = (
+        await db.execute(select(UserPreference).where(UserPreference.user_id == user_id))
+    ).scalars().first()
+    rows = (
+        await db.execute(
+            select(FoodRecord.food_name, FoodRecord.created_at)
+            .where(FoodRecord.user_id == user_id)
+            .order_by(FoodRecord.created_at.desc(), FoodRecord.id.desc())
+            .limit(HISTORY_LIMIT)
+        )
+    ).all()
+    history = [(name, history_weight(created_at, now)) for name, created_at in rows]
+    return UserProfile(user_id, preference, history)
+
+
+# ============================================
+# 점수 계산 / 추천
+# ============================================
+
+def score_foods(matrix: FoodMatrix, profile: UserProfile) -> np.ndarray:
+    """
+    모든 음식의 점수 계산 (제외 대상은 -inf)
+    """
+    taste = np.zeros(len(matrix.columns), dtype=np.float32)
+    for kind, names, weight in (
+        ("category", profile.favorite_categories, FAVORITE_WEIGHT),
+        ("ingredient", profile.favorite_ingredients, FAVORITE_WEIGHT),
+        ("category", profile.dislike_categories, DISLIKE_WEIGHT),
+        ("ingredient", profile.dislike_ingredients, DISLIKE_WEIGHT),
+    ):
+        for name in names:
+            col = matrix.column(kind, name)
+            if col is not None:
+                taste[col] += weight
+
+    # 음식별 최근 먹은 정도 (감쇠 가중치 합, 기록이 있는 음식만)
+    eaten: Dict[int, float] = {}
+    for name, weight in profile.history:
+        row = matrix.row_by_name.get(name)
+        if row is not None:
+            eaten[row] = eaten.get(row, 0.0) + weight
+
+    if eaten:
+        rows = np.fromiter(eaten.keys(), dtype=np.int64, count=len(eaten))
+        weights = np.fromiter(eaten.values(), dtype=np.float32, count=len(eaten))
+        # 먹은 음식들의 특성 가중 평균 → 자주 먹는 카테고리/재료 선호
+        taste += HISTORY_WEIGHT * (matrix.features[:, rows] @ weights) / weights.sum()
+
+    scores = taste @ matrix.features
+    if eaten:
+        scores[rows] -= REPEAT_PENALTY * weights
+    if profile.blocked_terms:
+        scores[matrix.blocked_mask(profile.blocked_terms)] = -np.inf
+    return scores
+
+
+def _reason(matrix: FoodMatrix, profile: UserProfile, row: int) -> str:
+    food = matrix.catalog.foods[row]
+    if food.category in profile.favorite_categories:
+        return f"좋아하는 {food.category}!"
+    liked = [tag for tag in food.ingredient_tags if tag in profile.favorite_ingredients]
+    if liked:
+        return f"좋아하는 {liked[0]} 요리!"
+    if profile.history:
+        return "자주 먹던 입맛에 딱!"
+    return "이것도 맛있을 것 같아!"
+
+
+_rng = np.random.default_rng()
+
+
+def recommend_personalized(
+    matrix: FoodMatrix,
+    profile: UserProfile,
+    count: int = 4,
+    top_k: int = TOP_K,
+    rng: Optional[np.random.Generator] = None,
+) -> List[dict]:
+    """
+    개인화 추천 (메모리만 사용)
+
+    점수 상위 top_k개 중에서 점수가 높을수록 잘 뽑히도록 count개를 중복 없이 추출합니다.
+    알러지/식이 제한에 걸리는 음식은 후보에 들어가지 않습니다.
+    """
+    if count <= 0 or not len(matrix):
+        return []
+    rng = rng or _rng
+
+    scores = score_foods(matrix, profile)
+    k = min(max(top_k, count), len(scores))
+    if k < len(scores):
+        candidates = np.argpartition(scores, -k)[-k:]
+    else:
+        candidates = np.arange(len(scores))
+    # 제외 대상(-inf)은 상위 k개에 허용 음식이 부족할 때만 섞여 들어옴
+    candidates = candidates[np.isfinite(scores[candidates])]
+    if not candidates.size:
+        return []
+
+    # 점수 → 확률 (softmax, 0이 되지 않도록 하한)
+    logits = scores[candidates].astype(np.float64) / SAMPLE_TEMPERATURE
+    weights = np.exp(np.maximum(logits - logits.max(), -50.0))
+    picked = rng.choice(candidates, size=min(count, candidates.size), replace=False, p=weights / weights.sum())
+
+    return [
+        matrix.catalog.foods[row].to_recommendation(_reason(matrix, profile, row), "personalized")
+        for row in picked
+    ]
@@ -0,0 +1,558 @@
+"""
+로컬 맛집 저장소
+- 카카오 검색 응답과 일괄 가져오기 파일(CSV / JSON / JSONL)로 채움
+- 고정 격자(PLACE_GRID_DEG도 단위 셀) 색인으로 반경 검색 / 가까운 k개 검색을 로컬에서 처리
+- 카카오가 "이 원 안은 빠짐없이 확인했다"고 알려준 범위(coverage)를 키워드별로 기록해
+  로컬 결과로 충분한지 판단 → 카카오는 빈 곳만 채움
+- 맛집은 PLACE_STORE_TTL이 지나면 빠지고(폐업 반영), PLACE_STORE_MAX_PLACES를 넘으면 오래된 것부터 제거
+- PLACE_STORE_OFFLINE=true면 카카오 없이 로컬 데이터로만 응답 (테스트 / 개발용)
+"""
+
+import csv
+import heapq
+import json
+import math
+import os
+import time
+import unicodedata
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+from geo import haversine_m
+
+load_dotenv()
+
+PLACE_STORE_ENABLED = os.getenv("PLACE_STORE_ENABLED", "true").lower() == "true"
+PLACE_STORE_OFFLINE = os.getenv("PLACE_STORE_OFFLINE", "false").lower() == "true"
+# 시작 시 가져올 파일 (쉼표로 구분)
+PLACE_STORE_IMPORT = os.getenv("PLACE_STORE_IMPORT", "")
+# 저장소 스냅샷 파일 (시작 시 읽고 종료 시 저장, 비우면 저장 안 함)
+PLACE_STORE_PATH = os.getenv("PLACE_STORE_PATH", "")
+# 맛집 정보 유효 시간 (초, 지나면 저장소에서 빠지고 카카오로 다시 확인)
+PLACE_STORE_TTL = float(os.getenv("PLACE_STORE_TTL", "604800"))
+# 저장소 최대 맛집 수 (넘으면 만료가 가까운 것부터 제거)
+PLACE_STORE_MAX_PLACES = int(os.getenv("PLACE_STORE_MAX_PLACES", "200000"))
+# 격자 셀 크기 (도, 0.005 ≈ 550m × 450m)
+PLACE_GRID_DEG = float(os.getenv("PLACE_GRID_DEG", "0.005"))
+# 카카오 확인 범위 유효 시간 (초, 지나면 다시 카카오로 확인)
+PLACE_COVERAGE_TTL = float(os.getenv("PLACE_COVERAGE_TTL", "86400"))
+# 키워드별로 기억하는 확인 범위 수
+PLACE_COVERAGE_PER_KEYWORD = int(os.getenv("PLACE_COVERAGE_PER_KEYWORD", "256"))
+# 키워드 일치 여부를 캐시하는 키워드 수 (키워드마다 맛집 수 바이트)
+PLACE_KEYWORD_MASKS = int(os.getenv("PLACE_KEYWORD_MASKS", "128"))
+# 가까운 k개 검색의 최대 거리 (미터)
+PLACE_NEAREST_MAX_RADIUS = float(os.getenv("PLACE_NEAREST_MAX_RADIUS", "20000"))
+
+# 위도 1도의 길이 (미터)
+M_PER_DEG = math.pi * 6371008.8 / 180
+
+# 응답에 포함하는 필드 (색인용 키워드 등은 제외)
+PLACE_FIELDS = (
+    "id", "name", "category", "address", "road_address",
+    "latitude", "longitude", "phone", "place_url",
+)
+
+
+def normalize_keyword(keyword: str) -> str:
+    """검색 키워드 정규화 (유니코드 정규화, 소문자, 공백 정리)"""
+    return " ".join(unicodedata.normalize("NFKC", keyword).lower().split())
+
+
+def from_kakao_document(document: dict) -> dict:
+    """카카오 검색 결과 문서 → 맛집 정보"""
+    return {
+        "id": document.get("id") or None,
+        "name": document.get("place_name"),
+        "category": document.get("category_name"),
+        "address": document.get("address_name"),
+        "road_address": document.get("road_address_name"),
+        "latitude": float(document.get("y")),
+        "longitude": float(document.get("x")),
+        "distance": int(document.get("distance") or 0),
+        "phone": document.get("phone", ""),
+        "place_url": document.get("place_url", ""),
+        "is_mock": False
+    }
+
+
+def _from_record(record: dict) -> dict:
+    """가져오기 파일의 한 행 (카카오 원본 형식도 허용)"""
+    if "place_name" in record:
+        place = from_kakao_document(record)
+    else:
+        place = {field: record.get(field) or "" for field in PLACE_FIELDS}
+        place["latitude"] = float(record["latitude"])
+        place["longitude"] = float(record["longitude"])
+    keywords = record.get("keywords") or ()
+    if isinstance(keywords, str):
+        keywords = keywords.split(",")
+    place["keywords"] = keywords
+    if record.get("expires_at"):
+        place["expires_at"] = float(record["expires_at"])
+    return place
+
+
+class PlaceStore:
+    """
+    격자 색인 맛집 저장소
+
+    맛집은 행 번호로 관리하고(제거된 행은 None, 많이 쌓이면 행 번호를 다시 매김), 격자 셀 → 행 번호 목록 색인으로 주변 셀만 확인합니다.
+    셀마다 좌표를 NumPy 배열로 묶어 두고(바뀐 셀만 다시 만듦), 키워드 일치 여부는
+    키워드별 bool 배열로 캐시합니다. 거리 비교는 평면 근사(수 km 안에서 오차 0.1% 미만)로 하고,
+    응답에 넣는 거리만 haversine으로 계산합니다.
+    """
+
+    def __init__(self, grid_deg: float = PLACE_GRID_DEG, offline: bool = PLACE_STORE_OFFLINE,
+                 enabled: bool = PLACE_STORE_ENABLED, ttl: float = PLACE_STORE_TTL,
+                 max_places: int = PLACE_STORE_MAX_PLACES):
+        self.grid_deg = grid_deg
+        self.offline = offline
+        self.enabled = enabled
+        self.ttl = ttl
+        self.max_places = max_places
+
+        # 통계
+        self.local_answers = 0
+        self.gaps = 0
+        self.imported = 0
+        self.expired = 0
+        self.evicted = 0
+
+        self._reset()
+
+    def _reset(self) -> None:
+        self._rows: List[Optional[dict]] = []
+        self._lats: List[float] = []
+        self._lons: List[float] = []
+        self._texts: List[str] = []
+        self._keywords: List[set] = []
+        self._by_id: Dict[str, int] = {}
+        self._cells: Dict[Tuple[int, int], List[int]] = {}
+        # 맛집이 있는 셀 범위 [최소 행, 최대 행, 최소 열, 최대 열]
+        self._bounds: Optional[List[int]] = None
+        # 셀 → (위도 배열, 경도 배열, 행 번호 배열)
+        self._arrays: Dict[Tuple[int, int], tuple] = {}
+        # 키워드 → 행별 일치 여부
+        self._masks: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        # 행별 만료 시각 (epoch 초) / (만료 시각, 행 번호) 힙 (갱신된 행의 예전 항목은 꺼낼 때 버림)
+        self._expires: List[float] = []
+        self._expiry_heap: List[Tuple[float, int]] = []
+        self._removed = 0
+        # 키워드 → (위도, 경도, 반경, 만료 시각)
+        self._coverage: Dict[str, deque] = {}
+
+    def __len__(self):
+        return len(self._rows) - self._removed
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / self.grid_deg), math.floor(lon / self.grid_deg)
+
+    def _put(self, index: int, cell: Tuple[int, int]) -> None:
+        self._cells.setdefault(cell, []).append(index)
+        self._arrays.pop(cell, None)
+        row, col = cell
+        if self._bounds is None:
+            self._bounds = [row, row, col, col]
+        else:
+            bounds = self._bounds
+            bounds[0], bounds[1] = min(bounds[0], row), max(bounds[1], row)
+            bounds[2], bounds[3] = min(bounds[2], col), max(bounds[3], col)
+
+    def _ring(self, row: int, col: int, ring: int) -> List[Tuple[int, int]]:
+        """(row, col)에서 ring칸 떨어진 테두리 셀 (맛집이 있는 범위 안만)"""
+        if ring == 0:
+            return [(row, col)]
+        row_min, row_max, col_min, col_max = self._bounds
+        cols = range(max(col - ring, col_min), min(col + ring, col_max) + 1)
+        cells = [(r, c) for r in (row - ring, row + ring) if row_min <= r <= row_max for c in cols]
+        rows = range(max(row - ring + 1, row_min), min(row + ring - 1, row_max) + 1)
+        cells += [(r, c) for c in (col - ring, col + ring) if col_min <= c <= col_max for r in rows]
+        return cells
+
+    # ----- 추가 -----
+
+    def add_places(self, places: Iterable[dict], keyword: Optional[str] = None) -> int:
+        """
+        맛집 추가 (같은 id면 정보 갱신)
+
+        keyword가 주어지면 그 키워드의 검색 결과로 기록합니다.
+        """
+        added = 0
+        now = time.time()
+        for place in places:
+            expires_at = place.get("expires_at") or now + self.ttl
+            if expires_at <= now:
+                continue
+            row = {field: place.get(field) for field in PLACE_FIELDS}
+            row["is_mock"] = False
+            lat, lon = row["latitude"], row["longitude"]
+            key = row["id"] or f"{row['name']}@{lat:.5f},{lon:.5f}"
+            row["id"] = key
+            keywords = {normalize_keyword(k) for k in place.get("keywords", ()) if k.strip()}
+            if keyword:
+                keywords.add(keyword)
+
+            text = normalize_keyword(f"{row['name'] or ''}|{row['category'] or ''}").replace(" ", "")
+            cell = self._cell(lat, lon)
+
+            index = self._by_id.get(key)
+            if index is None:
+                index = len(self._rows)
+                self._by_id[key] = index
+                self._rows.append(row)
+                self._lats.append(lat)
+                self._lons.append(lon)
+                self._texts.append(text)
+                self._keywords.append(keywords)
+                self._expires.append(expires_at)
+                heapq.heappush(self._expiry_heap, (expires_at, index))
+                self._put(index, cell)
+                added += 1
+                continue
+
+            old_cell = self._cell(self._lats[index], self._lons[index])
+            if old_cell != cell:
+                self._cells[old_cell].remove(index)
+                self._arrays.pop(old_cell, None)
+                self._put(index, cell)
+            self._arrays.pop(cell, None)
+            self._rows[index] = row
+            self._lats[index] = lat
+            self._lons[index] = lon
+            self._texts[index] = text
+            self._keywords[index] |= keywords
+            if expires_at > self._expires[index]:
+                self._expires[index] = expires_at
+                heapq.heappush(self._expiry_heap, (expires_at, index))
+            for masked, mask in self._masks.items():
+                if index < len(mask):
+                    mask[index] = self._match(masked, index)
+        self._expire(now)
+        return added
+
+    # ----- 만료 / 제거 -----
+
+    def _remove(self, index: int) -> None:
+        cell = self._cell(self._lats[index], self._lons[index])
+        self._cells[cell].remove(index)
+        if not self._cells[cell]:
+            del self._cells[cell]
+        self._arrays.pop(cell, None)
+        del self._by_id[self._rows[index]["id"]]
+        self._rows[index] = None
+        self._removed += 1
+
+    def _expire(self, now: Optional[float] = None) -> None:
+        """만료된 맛집 제거 + 최대 수를 넘으면 만료가 가까운 것부터 제거"""
+        now = time.time() if now is None else now
+        heap = self._expiry_heap
+        while heap and (heap[0][0] <= now or len(self) > self.max_places):
+            expires_at, index = heapq.heappop(heap)
+            if self._rows[index] is None or self._expires[index] != expires_at:
+                continue  # 이미 제거됐거나 갱신된 행의 예전 항목
+            if expires_at <= now:
+                self.expired += 1
+            else:
+                self.evicted += 1
+            self._remove(index)
+
+        if self._removed > max(1024, len(self)) or len(heap) > 2 * len(self) + 1024:
+            self._compact()
+
+    def _compact(self) -> None:
+        """제거된 행을 빼고 행 번호를 다시 매김 (확인 범위는 유지)"""
+        alive = [
+            dict(row, keywords=keywords, expires_at=expires_at)
+            for row, keywords, expires_at in zip(self._rows, self._keywords, self._expires)
+            if row is not None
+        ]
+        coverage = self._coverage
+        self._reset()
+        self._coverage = coverage
+        self.add_places(alive)
+
+    def add_coverage(self, keyword: str, lat: float, lon: float, radius: float) -> None:
+        """카카오가 keyword의 결과를 (lat, lon) 반경 radius 안에서 빠짐없이 돌려줬음을 기록"""
+        circles = self._coverage.get(keyword)
+        if circles is None:
+            circles = self._coverage[keyword] = deque(maxlen=PLACE_COVERAGE_PER_KEYWORD)
+        circles.append((lat, lon, radius, time.monotonic() + PLACE_COVERAGE_TTL))
+
+    def ingest(self, keyword: str, places: Iterable[dict], lat: float, lon: float, covered_radius: float) -> None:
+        """카카오 검색 응답 반영 (맛집 + 확인 범위)"""
+        self.add_places(places, keyword)
+        self.add_coverage(keyword, lat, lon, covered_radius)
+
+    def import_file(self, path: str) -> int:
+        """
+        일괄 가져오기
+
+        - .csv: id,name,category,address,road_address,latitude,longitude,phone,place_url,keywords
+        - .json: 맛집 리스트 또는 카카오 응답({"documents": [...]})
+        - .jsonl: 한 줄에 맛집 하나
+        """
+        if path.endswith(".csv"):
+            with open(path, encoding="utf-8-sig", newline="") as f:
+                records = list(csv.DictReader(f))
+        elif path.endswith(".jsonl"):
+            with open(path, encoding="utf-8") as f:
+                records = [json.loads(line) for line in f if line.strip()]
+        else:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            records = data.get("documents", []) if isinstance(data, dict) else data
+
+        added = self.add_places(_from_record(record) for record in records)
+        self.imported += added
+        return added
+
+    def save(self, path: str) -> None:
+        """JSONL 스냅샷 저장 (import_file로 다시 읽을 수 있음)"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for row, keywords, expires_at in zip(self._rows, self._keywords, self._expires):
+                if row is None:
+                    continue
+                record = dict(row, keywords=sorted(keywords), expires_at=expires_at)
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, path)
+
+    # ----- 검색 -----
+
+    def _match(self, keyword: str, index: int) -> bool:
+        return keyword in self._keywords[index] or keyword.replace(" ", "") in self._texts[index]
+
+    def _mask(self, keyword: Optional[str]) -> Optional[np.ndarray]:
+        """키워드에 맞는 행 (행 번호 → bool, 새로 추가된 행만 이어서 계산)"""
+        if not keyword:
+            return None
+        mask = self._masks.get(keyword)
+        size = len(self._rows)
+        if mask is None or len(mask) < size:
+            done = 0 if mask is None else len(mask)
+            tail = np.fromiter((self._match(keyword, i) for i in range(done, size)), dtype=bool, count=size - done)
+            mask = tail if mask is None else np.concatenate([mask, tail])
+            self._masks[keyword] = mask
+            while len(self._masks) > PLACE_KEYWORD_MASKS:
+                self._masks.popitem(last=False)
+        self._masks.move_to_end(keyword)
+        return mask
+
+    def _cell_arrays(self, cell: Tuple[int, int]):
+        arrays = self._arrays.get(cell)
+        if arrays is None:
+            rows = self._cells.get(cell)
+            if not rows:
+                return None
+            index = np.array(rows, dtype=np.int64)
+            arrays = (
+                np.array([self._lats[i] for i in rows]),
+                np.array([self._lons[i] for i in rows]),
+                index,
+            )
+            self._arrays[cell] = arrays
+        return arrays
+
+    def _scan(self, cells, lat, lon, cos_lat, max_d2, mask, d2_parts, index_parts) -> int:
+        """셀 목록의 맛집 중 max_d2 이내 + 키워드 일치 (평면 근사 거리 제곱)"""
+        arrays = [a for a in map(self._cell_arrays, cells) if a is not None]
+        if not arrays:
+            return 0
+        if len(arrays) == 1:
+            lats, lons, index = arrays[0]
+        else:
+            lats = np.concatenate([a[0] for a in arrays])
+            lons = np.concatenate([a[1] for a in arrays])
+            index = np.concatenate([a[2] for a in arrays])
+        y = (lats - lat) * M_PER_DEG
+        x = (lons - lon) * (M_PER_DEG * cos_lat)
+        d2 = x * x + y * y
+        keep = d2 <= max_d2
+        if mask is not None:
+            keep &= mask[index]
+        found = int(np.count_nonzero(keep))
+        if found:
+            d2_parts.append(d2[keep])
+            index_parts.append(index[keep])
+        return found
+
+    def _results(self, d2_parts, index_parts, lat, lon, limit: Optional[int]) -> List[dict]:
+        """후보 중 가까운 limit개 (순서와 응답 거리는 haversine 기준)"""
+        if not d2_parts:
+            return []
+        d2 = np.concatenate(d2_parts)
+        index = np.concatenate(index_parts)
+        if limit is not None and limit < len(d2):
+            index = index[np.argpartition(d2, limit - 1)[:limit]]
+
+        rows = self._rows
+        found = sorted(
+            (haversine_m(lat, lon, rows[i]["latitude"], rows[i]["longitude"]), i) for i in index.tolist()
+        )
+        return [dict(rows[i], distance=int(distance)) for distance, i in found]
+
+    def within(self, lat: float, lon: float, radius: float, keyword: Optional[str] = None,
+               limit: Optional[int] = None) -> List[dict]:
+        """반경 안의 맛집 (가까운 순, limit이 있으면 가까운 것부터 찾다가 멈춤)"""
+        if limit is not None:
+            return self.nearest(lat, lon, limit, keyword, max_radius=radius)
+        self._expire()
+
+        cos_lat = math.cos(math.radians(lat))
+        dlat = radius / M_PER_DEG
+        dlon = radius / (M_PER_DEG * max(cos_lat, 1e-6))
+        row0, col0 = self._cell(lat - dlat, lon - dlon)
+        row1, col1 = self._cell(lat + dlat, lon + dlon)
+
+        if (row1 - row0 + 1) * (col1 - col0 + 1) <= len(self._cells):
+            cells = [(r, c) for r in range(row0, row1 + 1) for c in range(col0, col1 + 1)]
+        else:
+            # 반경이 데이터 범위보다 넓으면 셀 목록을 직접 훑는 쪽이 빠름
+            cells = [(r, c) for r, c in self._cells if row0 <= r <= row1 and col0 <= c <= col1]
+
+        d2_parts, index_parts = [], []
+        self._scan(cells, lat, lon, cos_lat, radius * radius, self._mask(keyword), d2_parts, index_parts)
+        return self._results(d2_parts, index_parts, lat, lon, None)
+
+    def nearest(self, lat: float, lon: float, k: int = 5, keyword: Optional[str] = None,
+                max_radius: float = PLACE_NEAREST_MAX_RADIUS) -> List[dict]:
+        """
+        가장 가까운 k개 (max_radius 이내)
+
+        요청 지점의 셀부터 한 겹씩 넓혀가며, 확인한 영역 밖의 가장 가까운 지점보다
+        k번째 후보가 가까워지면 멈춥니다.
+        """
+        self._expire()
+        if k <= 0 or not len(self):
+            return []
+        cos_lat = math.cos(math.radians(lat))
+        max_d2 = max_radius * max_radius
+        mask = self._mask(keyword)
+        center_row, center_col = self._cell(lat, lon)
+        grid = self.grid_deg
+        # 셀 안에서 요청 지점 위치 (도)
+        lat_low = lat - center_row * grid
+        lon_low = lon - center_col * grid
+        row_min, row_max, col_min, col_max = self._bounds
+
+        # 맛집이 있는 범위까지도 max_radius보다 멀면 바로 종료
+        near_lat = min(max(lat, row_min * grid), (row_max + 1) * grid)
+        near_lon = min(max(lon, col_min * grid), (col_max + 1) * grid)
+        y = (near_lat - lat) * M_PER_DEG
+        x = (near_lon - lon) * M_PER_DEG * cos_lat
+        if x * x + y * y > max_d2:
+            return []
+
+        # 맛집이 있는 범위를 다 덮는 겹 수 (max_radius를 넘는 겹은 보지 않음)
+        cell_m = grid * M_PER_DEG * max(min(cos_lat, 1.0), 1e-6)
+        last_ring = min(
+            int(max_radius / cell_m) + 1,
+            max(center_row - row_min, row_max - center_row, center_col - col_min, col_max - center_col),
+        )
+
+        d2_parts, index_parts = [], []
+        found = 0
+        for ring in range(last_ring + 1):
+            if (2 * ring + 1) ** 2 > len(self._cells):
+                # 확인한 칸 수가 실제 셀 수를 넘어서면 남은 셀은 셀 목록을 직접 훑고 끝냄
+                cells = [
+                    (r, c) for r, c in self._cells
+                    if ring <= max(abs(r - center_row), abs(c - center_col)) <= last_ring
+                ]
+                self._scan(cells, lat, lon, cos_lat, max_d2, mask, d2_parts, index_parts)
+                break
+
+            cells = self._ring(center_row, center_col, ring)
+            found += self._scan(cells, lat, lon, cos_lat, max_d2, mask, d2_parts, index_parts)
+
+            if found >= k:
+                # 확인한 정사각형 영역 경계까지의 최단 거리
+                safe = min(
+                    (lat_low + ring * grid) * M_PER_DEG,
+                    ((ring + 1) * grid - lat_low) * M_PER_DEG,
+                    (lon_low + ring * grid) * M_PER_DEG * cos_lat,
+                    ((ring + 1) * grid - lon_low) * M_PER_DEG * cos_lat,
+                )
+                d2 = np.concatenate(d2_parts)
+                if np.partition(d2, k - 1)[k - 1] <= safe * safe:
+                    break
+
+        return self._results(d2_parts, index_parts, lat, lon, k)
+
+    def is_covered(self, keyword: str, lat: float, lon: float, radius: float) -> bool:
+        """(lat, lon) 반경 radius 원이 keyword의 카카오 확인 범위 안인지"""
+        circles = self._coverage.get(keyword)
+        if not circles:
+            return False
+        now = time.monotonic()
+        while circles and circles[0][3] <= now:
+            circles.popleft()
+        return any(
+            haversine_m(c_lat, c_lon, lat, lon) + radius <= c_radius
+            for c_lat, c_lon, c_radius, _ in circles
+        )
+
+    def search(self, keyword: str, lat: float, lon: float, radius: float, limit: int):
+        """
+        /places 검색을 로컬에서 처리
+
+        Returns:
+            (list, bool): 맛집 리스트, 로컬 결과로 충분한지
+            (limit개를 채웠으면 limit번째 결과까지의 원, 못 채웠으면 반경 원이
+            카카오 확인 범위 안일 때만 충분 — 저장소에 없는 더 가까운 맛집이 있을 수 있음)
+        """
+        places = self.within(lat, lon, radius, keyword, limit)
+        if places and len(places) >= limit:
+            # 응답 거리는 내림한 정수라 1m 여유
+            enough = self.is_covered(keyword, lat, lon, places[-1]["distance"] + 1)
+        else:
+            enough = self.is_covered(keyword, lat, lon, radius)
+        if enough or self.offline:
+            self.local_answers += 1
+        else:
+            self.gaps += 1
+        return places, enough
+
+    def stats(self) -> dict:
+        answered = self.local_answers + self.gaps
+        return {
+            "enabled": self.enabled,
+            "offline": self.offline,
+            "places": len(self),
+            "cells": len(self._cells),
+            "imported": self.imported,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "covered_keywords": len(self._coverage),
+            "local_answers": self.local_answers,
+            "kakao_gap_fills": self.gaps,
+            "local_rate": round(self.local_answers / answered, 4) if answered else 0.0,
+        }
+
+
+place_store = PlaceStore()
+
+
+def load_place_store() -> None:
+    """시작 시 스냅샷과 가져오기 파일 읽기"""
+    paths = [p.strip() for p in PLACE_STORE_IMPORT.split(",") if p.strip()]
+    if PLACE_STORE_PATH and os.path.exists(PLACE_STORE_PATH):
+        paths.insert(0, PLACE_STORE_PATH)
+    for path in paths:
+        try:
+            added = place_store.import_file(path)
+            print(f"맛집 데이터 가져오기: {path} ({added}개)")
+        except Exception as e:
+            print(f"맛집 데이터 가져오기 실패: {path} ({e})")
+
+
+def save_place_store() -> None:
+    """종료 시 스냅샷 저장 (PLACE_STORE_PATH 설정 시)"""
+    if PLACE_STORE_PATH and len(place_store):
+        try:
+            place_store.save(PLACE_STORE_PATH)
+        except Exception as e:
+            print(f"맛집 저장소 저장 실패: {e}")
@@ -0,0 +1,148 @@
+"""
+사용자별 최근 추천 기록
+- 새로고침할 때마다 같은 음식이 다시 나오지 않도록 최근 추천한 음식 id를 사용자별로 보관
+- 사용자마다 최대 RECENT_RECOMMEND_SIZE개만 유지 (링 버퍼)
+- 기본은 프로세스 메모리 (TTL + LRU), REDIS_URL이 있으면 Redis 사용 (여러 워커 공유)
+- 제외는 DB 쿼리 조건이 아니라 카탈로그 후보군에서 집합 연산으로 처리
+"""
+
+import os
+from typing import FrozenSet, Iterable
+
+from dotenv import load_dotenv
+
+from ttl_cache import TTLCache
+
+load_dotenv()
+
+# 사용자별로 기억할 최근 추천 수 (추천 4개 × 3번 새로고침)
+RECENT_RECOMMEND_SIZE = int(os.getenv("RECENT_RECOMMEND_SIZE", "12"))
+# 마지막 추천 후 기록 유지 시간 (초)
+RECENT_RECOMMEND_TTL = float(os.getenv("RECENT_RECOMMEND_TTL", "3600"))
+# 메모리 저장소에 보관할 최대 사용자 수
+RECENT_RECOMMEND_MAX_USERS = int(os.getenv("RECENT_RECOMMEND_MAX_USERS", "10000"))
+# 설정 시 Redis에 저장 (예: redis://localhost:6379/0)
+REDIS_URL = os.getenv("REDIS_URL")
+
+# Redis는 redis 패키지가 설치된 경우에만 사용
+try:
+    import redis.asyncio as redis_asyncio
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+
+# ============================================
+# 저장소
+# ============================================
+
+class MemoryRecentStore:
+    """프로세스 메모리 저장소 (사용자별 최근 id 튜플)"""
+
+    backend = "memory"
+
+    def __init__(self, size: int, ttl: float, max_users: int):
+        self.size = size
+        self._cache = TTLCache(ttl=ttl, max_size=max_users)
+
+    async def get(self, user_id: str) -> FrozenSet[int]:
+        return frozenset(self._cache.get(user_id) or ())
+
+    async def add(self, user_id: str, food_ids: Iterable[int]) -> None:
+        # await 없이 읽고 쓰므로 같은 사용자의 동시 요청에서도 섞이지 않음
+        recent = (self._cache.get(user_id) or ()) + tuple(food_ids)
+        self._cache.set(user_id, recent[-self.size:])
+
+    async def close(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        cache_stats = self._cache.stats()
+        return {
+            "backend": self.backend,
+            "history_size": self.size,
+            "users": cache_stats["size"],
+            "max_users": cache_stats["max_size"],
+            "ttl": cache_stats["ttl"],
+            "evictions": cache_stats["evictions"],
+        }
+
+
+class RedisRecentStore:
+    """
+    Redis 저장소 (LPUSH + LTRIM 리스트, 키마다 만료 시간)
+
+    Redis 장애 시 추천은 계속 동작해야 하므로 오류는 기록만 하고 넘어갑니다.
+    """
+
+    backend = "redis"
+    key_prefix = "babtori:recent_recommendations:"
+
+    def __init__(self, url: str, size: int, ttl: float):
+        self.size = size
+        self.ttl = int(ttl)
+        self._client = redis_asyncio.from_url(url)
+        self.errors = 0
+
+    async def get(self, user_id: str) -> FrozenSet[int]:
+        try:
+            values = await self._client.lrange(self.key_prefix + user_id, 0, self.size - 1)
+        except Exception as e:
+            self.errors += 1
+            print(f"[recommendation_history] Redis 조회 실패: {e}")
+            return frozenset()
+        return frozenset(int(value) for value in values)
+
+    async def add(self, user_id: str, food_ids: Iterable[int]) -> None:
+        food_ids = list(food_ids)
+        if not food_ids:
+            return
+        key = self.key_prefix + user_id
+        try:
+            async with self._client.pipeline(transaction=True) as pipe:
+                pipe.lpush(key, *food_ids)
+                pipe.ltrim(key, 0, self.size - 1)
+                pipe.expire(key, self.ttl)
+                await pipe.execute()
+        except Exception as e:
+            self.errors += 1
+            print(f"[recommendation_history] Redis 저장 실패: {e}")
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+    def stats(self) -> dict:
+        return {"backend": self.backend, "history_size": self.size, "ttl": self.ttl, "errors": self.errors}
+
+
+def _create_store():
+    if REDIS_URL:
+        if REDIS_AVAILABLE:
+            return RedisRecentStore(REDIS_URL, RECENT_RECOMMEND_SIZE, RECENT_RECOMMEND_TTL)
+        print("[recommendation_history] redis 패키지가 없어 메모리 저장소를 사용합니다.")
+    return MemoryRecentStore(RECENT_RECOMMEND_SIZE, RECENT_RECOMMEND_TTL, RECENT_RECOMMEND_MAX_USERS)
+
+
+recent_store = _create_store()
+
+
+# ============================================
+# 외부 함수
+# ============================================
+
+async def get_recent_recommendations(user_id: str) -> FrozenSet[int]:
+    """사용자에게 최근 추천한 음식 id 집합"""
+    return await recent_store.get(user_id)
+
+
+async def remember_recommendations(user_id: str, food_ids: Iterable[int]) -> None:
+    """이번에 추천한 음식 id 기록 (오래된 기록은 밀려남)"""
+    await recent_store.add(user_id, food_ids)
+
+
+async def close_recent_store() -> None:
+    await recent_store.close()
+
+
+def get_recent_store_stats() -> dict:
+    return recent_store.stats()
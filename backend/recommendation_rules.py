@@ -0,0 +1,177 @@
+"""
+날씨 기반 추천 규칙
+- 날씨 → (재료 / 카테고리) 매핑을 코드 분기 대신 선언적 규칙 표로 관리
+- 카탈로그가 바뀔 때 규칙별 후보군을 미리 계산해 스냅샷에 함께 저장
+- 날씨 값은 규칙 경계값 기준 구간으로 묶어 매칭 결과를 재사용
+  (같은 날씨 구간이면 규칙 평가 없이 후보군만 바로 샘플링)
+
+새 규칙(습도, 체감온도 등)은 WEATHER_RULES에 한 줄 추가하면 됩니다.
+"""
+
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from food_catalog import CatalogSnapshot, register_catalog_listener
+
+RAINY = frozenset({"Rain", "Drizzle", "Thunderstorm"})
+SNOWY = frozenset({"Snow"})
+
+# 규칙이 비교하는 날씨 값
+WEATHER_FIELDS = ("temperature", "humidity", "feels_like")
+
+
+@dataclass(frozen=True)
+class WeatherRule:
+    """
+    추천 규칙 한 줄
+
+    조건은 모두 만족해야 하며(AND), 지정하지 않은 조건은 검사하지 않습니다.
+    *_above / *_below는 경계값을 포함하지 않습니다 (>, <).
+    """
+    slot: str  # "weather_ingredient" 또는 "weather_category"
+    reason: str
+    ingredient: Optional[str] = None
+    category: Optional[str] = None
+    conditions: Optional[FrozenSet[str]] = None  # Rain, Snow 등
+    temperature_above: Optional[float] = None
+    temperature_below: Optional[float] = None
+    humidity_above: Optional[float] = None
+    humidity_below: Optional[float] = None
+    feels_like_above: Optional[float] = None
+    feels_like_below: Optional[float] = None
+
+    def matches(self, condition: str, values: Dict[str, Optional[float]]) -> bool:
+        if self.conditions is not None and condition not in self.conditions:
+            return False
+        for field in WEATHER_FIELDS:
+            above = getattr(self, f"{field}_above")
+            below = getattr(self, f"{field}_below")
+            if above is None and below is None:
+                continue
+            value = values.get(field)
+            if value is None:
+                return False
+            if above is not None and not value > above:
+                return False
+            if below is not None and not value < below:
+                return False
+        return True
+
+
+# ============================================
+# 규칙 표 (슬롯마다 위에서부터 처음 맞는 규칙 사용)
+# ============================================
+
+WEATHER_RULES: Tuple[WeatherRule, ...] = (
+    # 추천 1: 날씨 기반 - 재료 우선
+    WeatherRule("weather_ingredient", "비 오는 날엔 따뜻한 국물이 최고!", ingredient="국물", conditions=RAINY),
+    WeatherRule("weather_ingredient", "눈 오는 날엔 뜨끈한 국물!", ingredient="국물", conditions=SNOWY),
+    WeatherRule("weather_ingredient", "더울 땐 시원한 면 요리!", ingredient="면", temperature_above=28),
+    WeatherRule("weather_ingredient", "추울 땐 따뜻한 국물!", ingredient="국물", temperature_below=10),
+    WeatherRule("weather_ingredient", "든든하게 밥 먹자!", ingredient="밥"),
+
+    # 추천 2: 날씨 기반 - 카테고리 우선
+    WeatherRule("weather_category", "날씨가 안 좋을 땐 역시 한식!", category="한식", conditions=RAINY | SNOWY),
+    WeatherRule("weather_category", "더울 땐 깔끔한 일식!", category="일식", temperature_above=28),
+    WeatherRule("weather_category", "추울 땐 든든한 중식!", category="중식", temperature_below=10),
+    WeatherRule("weather_category", "오늘은 양식 어때?", category="양식"),
+)
+
+RULE_SLOTS = tuple(dict.fromkeys(rule.slot for rule in WEATHER_RULES))
+
+
+# ============================================
+# 날씨 구간
+# ============================================
+
+def _thresholds(field: str) -> Tuple[float, ...]:
+    values = set()
+    for rule in WEATHER_RULES:
+        for bound in ("above", "below"):
+            value = getattr(rule, f"{field}_{bound}")
+            if value is not None:
+                values.add(value)
+    return tuple(sorted(values))
+
+
+# 필드별 규칙 경계값 (예: temperature → (10, 28))
+THRESHOLDS: Dict[str, Tuple[float, ...]] = {field: _thresholds(field) for field in WEATHER_FIELDS}
+
+
+def weather_band(condition: str, values: Dict[str, Optional[float]]) -> tuple:
+    """
+    날씨를 규칙 결과가 같은 구간 키로 변환
+
+    같은 키를 가진 날씨는 모든 규칙에서 같은 결과를 내므로
+    (날씨 상태, 온도 구간, ...) 단위로 매칭 결과를 재사용할 수 있습니다.
+    경계값과 정확히 같은 값은 별도 구간으로 취급합니다.
+    """
+    key = [condition]
+    for field in WEATHER_FIELDS:
+        thresholds = THRESHOLDS[field]
+        if not thresholds:
+            continue
+        value = values.get(field)
+        if value is None:
+            key.append(None)
+            continue
+        index = bisect_left(thresholds, value)
+        on_boundary = index < len(thresholds) and thresholds[index] == value
+        key.append((index, on_boundary))
+    return tuple(key)
+
+
+# ============================================
+# 사전 계산된 추천 계획
+# ============================================
+
+class RulePlan:
+    """카탈로그 스냅샷 하나에 대한 규칙별 후보군과 구간별 매칭 결과"""
+
+    def __init__(self, catalog: CatalogSnapshot):
+        self.pools: Dict[WeatherRule, Tuple[int, ...]] = {
+            rule: self._pool(catalog, rule) for rule in WEATHER_RULES
+        }
+        self._matches: Dict[tuple, Tuple[WeatherRule, ...]] = {}
+
+    @staticmethod
+    def _pool(catalog: CatalogSnapshot, rule: WeatherRule) -> Tuple[int, ...]:
+        if rule.ingredient and rule.category:
+            category_ids = set(catalog.ids_by_category(rule.category))
+            return tuple(i for i in catalog.ids_by_ingredient(rule.ingredient) if i in category_ids)
+        if rule.ingredient:
+            return catalog.ids_by_ingredient(rule.ingredient)
+        if rule.category:
+            return catalog.ids_by_category(rule.category)
+        return catalog.all_ids
+
+    def match(self, condition: str, values: Dict[str, Optional[float]]) -> Tuple[WeatherRule, ...]:
+        """슬롯별로 처음 맞는 규칙 (구간 단위로 캐시)"""
+        band = weather_band(condition, values)
+        rules = self._matches.get(band)
+        if rules is None:
+            matched = []
+            for slot in RULE_SLOTS:
+                for rule in WEATHER_RULES:
+                    if rule.slot == slot and rule.matches(condition, values):
+                        matched.append(rule)
+                        break
+            rules = self._matches[band] = tuple(matched)
+        return rules
+
+
+def _precompute(snapshot: CatalogSnapshot) -> None:
+    snapshot.derived["weather_rules"] = RulePlan(snapshot)
+
+
+def get_rule_plan(catalog: CatalogSnapshot) -> RulePlan:
+    """스냅샷의 추천 계획 (리스너 등록 전에 만들어진 스냅샷이면 지금 계산)"""
+    plan = catalog.derived.get("weather_rules")
+    if plan is None:
+        plan = RulePlan(catalog)
+        catalog.derived["weather_rules"] = plan
+    return plan
+
+
+register_catalog_listener(_precompute)
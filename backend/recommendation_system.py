@@ -1,142 +1,207 @@
 """
 음식 추천 시스템
-- 4가지 추천 방식 (날씨 2개 + 랜덤 2개)
+- 4가지 추천 방식 (날씨 2개 + 랜덤 2개, 날씨 규칙은 recommendation_rules)
+- 사용자별 최근 추천은 다음 추천에서 제외 (recommendation_history)
+- 여러 사용자 일괄 추천 (날씨 셀별 1회 조회)
 - 챗봇 필터링 추천 (카테고리 + 재료)
 """
 
+import os
+import asyncio
 import random
 from datetime import datetime
-from sqlalchemy.orm import Session
+from typing import FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple
+from dotenv import load_dotenv
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from models import Food
+from food_catalog import CatalogFood, CatalogSnapshot, ensure_catalog
+from recommendation_rules import get_rule_plan
+from recommendation_history import get_recent_recommendations, remember_recommendations
+from weather_service import fetch_weather, weather_cell
+from character_service import current_satiety, get_or_create_characters, utc_now
+
+load_dotenv()
+
+# 일괄 추천 시 동시에 조회할 날씨 셀 수 (HTTP 연결 풀 크기 이하로)
+BATCH_WEATHER_CONCURRENCY = int(os.getenv("BATCH_WEATHER_CONCURRENCY", "20"))
 
 
 # ============================================
 # 4가지 음식 추천 시스템
 # ============================================
 
-def recommend_4_foods(db: Session, weather_condition: str, temperature: float):
+async def recommend_4_foods(
+    db: AsyncSession,
+    weather_condition: str,
+    temperature: float,
+    humidity: Optional[float] = None,
+    feels_like: Optional[float] = None,
+    user_id: Optional[str] = None,
+):
     """
     날씨 기반 + 랜덤으로 총 4개 음식 추천
-    (데이터베이스 사용 버전)
+    (메모리 카탈로그 스냅샷 사용, 카탈로그가 로드된 뒤에는 DB 조회 없음)
+    
+    날씨 → 재료/카테고리 매핑은 recommendation_rules.WEATHER_RULES 규칙 표를 따르며,
+    규칙별 후보군은 카탈로그가 바뀔 때 미리 계산되어 있어 여기서는 샘플링만 합니다.
     
     Args:
-        db: SQLAlchemy 세션 객체
+        db: 비동기 SQLAlchemy 세션 객체 (카탈로그 최초 로드용)
         weather_condition: 날씨 상태 (Rain, Snow, Clear 등)
         temperature: 온도 (섭씨)
+        humidity: 습도 (%, 습도 규칙용)
+        feels_like: 체감온도 (섭씨, 체감온도 규칙용)
+        user_id: 지정하면 이 사용자에게 최근 추천한 음식은 가능한 한 제외
     
     Returns:
         list: 추천 음식 4개 (dict 리스트)
     """
-    recommendations = []
-    
-    # ===== 추천 1: 날씨 기반 - 재료 우선 =====
-    if weather_condition in ["Rain", "Drizzle", "Thunderstorm"]:
-        # 비 오는 날 → 국물 요리
-        ingredient = "국물"
-        reason = "비 오는 날엔 따뜻한 국물이 최고!"
-    elif weather_condition == "Snow":
-        # 눈 오는 날 → 국물 요리
-        ingredient = "국물"
-        reason = "눈 오는 날엔 뜨끈한 국물!"
-    elif temperature > 28:
-        # 더운 날 → 면 요리 (시원한)
-        ingredient = "면"
-        reason = "더울 땐 시원한 면 요리!"
-    elif temperature < 10:
-        # 추운 날 → 국물 요리
-        ingredient = "국물"
-        reason = "추울 땐 따뜻한 국물!"
-    else:
-        # 보통 날씨 → 밥
-        ingredient = "밥"
-        reason = "든든하게 밥 먹자!"
-    
-    ingredient_foods = db.query(Food).filter(Food.ingredients.contains(ingredient)).all()
-    if ingredient_foods:
-        food1 = random.choice(ingredient_foods)
-        recommendations.append({
-            "name": food1.name,
-            "category": food1.category,
-            "ingredients": food1.ingredients,
-            "imageUrl": food1.image_url,
-            "description": reason,
-            "reason": reason,
-            "type": "weather_ingredient"
-        })
+    catalog = await ensure_catalog(db)
+    if user_id is None:
+        return build_recommendations(catalog, weather_condition, temperature, humidity, feels_like)
+    
+    recent = await get_recent_recommendations(user_id)
+    recommendations = build_recommendations(
+        catalog, weather_condition, temperature, humidity, feels_like, recent=recent
+    )
+    await remember_recommendations(user_id, (catalog.by_name[item["name"]].id for item in recommendations))
+    return recommendations
+
+
+def _sample_fresh(
+    catalog: CatalogSnapshot,
+    ids: Sequence[int],
+    k: int,
+    picked_ids: Set[int],
+    recent: FrozenSet[int],
+) -> List[CatalogFood]:
+    """
+    후보군에서 이미 고른 음식과 최근 추천을 빼고 k개 추출
+
+    후보군이 작아 최근 추천을 빼면 모자랄 때만 최근 추천에서 채웁니다.
+    """
+    foods = catalog.sample(ids, k, exclude=picked_ids | recent)
+    if len(foods) < k and recent:
+        chosen = picked_ids | {food.id for food in foods}
+        foods += catalog.sample(ids, k - len(foods), exclude=chosen)
+    return foods
+
+
+def build_recommendations(
+    catalog: CatalogSnapshot,
+    weather_condition: str,
+    temperature: float,
+    humidity: Optional[float] = None,
+    feels_like: Optional[float] = None,
+    recent: FrozenSet[int] = frozenset(),
+) -> List[dict]:
+    """
+    카탈로그 스냅샷에서 추천 4개 생성 (DB/네트워크 없음, 일괄 추천에서도 사용)
     
-    # ===== 추천 2: 날씨 기반 - 카테고리 우선 =====
-    if weather_condition in ["Rain", "Drizzle", "Thunderstorm", "Snow"]:
-        # 비/눈 오는 날 → 한식 (국물 요리가 많음)
-        category = "한식"
-        reason = "날씨가 안 좋을 땐 역시 한식!"
-    elif temperature > 28:
-        # 더운 날 → 일식 (차가운 메뉴가 많음)
-        category = "일식"
-        reason = "더울 땐 깔끔한 일식!"
-    elif temperature < 10:
-        # 추운 날 → 중식 (기름진 음식)
-        category = "중식"
-        reason = "추울 땐 든든한 중식!"
-    else:
-        # 보통 날씨 → 양식
-        category = "양식"
-        reason = "오늘은 양식 어때?"
-    
-    category_foods = db.query(Food).filter(Food.category == category).all()
-    if category_foods:
-        # 추천 1과 중복 방지
-        already_recommended_names = [r['name'] for r in recommendations]
-        available = [f for f in category_foods if f.name not in already_recommended_names]
-        if available:
-            food2 = random.choice(available)
-            recommendations.append({
-                "name": food2.name,
-                "category": food2.category,
-                "ingredients": food2.ingredients,
-                "imageUrl": food2.image_url,
-                "description": reason, # 👈 추천 이유를 description으로 추가
-                "reason": reason,
-                "type": "weather_category"
-            })
+    recent(최근 추천한 음식 id)는 후보군에서 집합 연산으로 제외합니다.
+    """
+    plan = get_rule_plan(catalog)
+    recommendations = []
+    picked_ids = set()
+    
+    # ===== 추천 1-2: 날씨 기반 (재료 우선 / 카테고리 우선) =====
+    rules = plan.match(weather_condition, {
+        "temperature": temperature,
+        "humidity": humidity,
+        "feels_like": feels_like,
+    })
+    for rule in rules:
+        # 앞 추천 / 최근 추천과 중복 방지
+        for food in _sample_fresh(catalog, plan.pools[rule], 1, picked_ids, recent):
+            picked_ids.add(food.id)
+            recommendations.append(food.to_recommendation(rule.reason, rule.slot))
     
     # ===== 추천 3-4: 완전 랜덤 =====
-    # 이미 추천된 음식 제외
-    already_recommended_names = [r["name"] for r in recommendations]
-    
-    query = db.query(Food)
-    if already_recommended_names:
-        query = query.filter(Food.name.notin_(already_recommended_names))
-    available_foods = query.all()
-    
-    # 추천할 랜덤 음식 개수
-    num_to_recommend = min(len(available_foods), 4 - len(recommendations))
-
-    if num_to_recommend > 0:
-        random_foods = random.sample(available_foods, num_to_recommend)
-        for food in random_foods:
-            recommendations.append({
-                "name": food.name,
-                "category": food.category,
-                "ingredients": food.ingredients,
-                "imageUrl": food.image_url,
-                "description": "이것도 맛있을 것 같아!", # 👈 추천 이유를 description으로 추가
-                "reason": "이것도 맛있을 것 같아!",
-                "type": "random"
-            })
+    # 이미 추천된 음식 / 최근 추천 제외
+    random_foods = _sample_fresh(catalog, catalog.all_ids, 4 - len(recommendations), picked_ids, recent)
+    for food in random_foods:
+        recommendations.append(food.to_recommendation("이것도 맛있을 것 같아!", "random"))
     
     return recommendations
 
 
+# ============================================
+# 일괄 추천 (푸시 알림 사전 생성 등)
+# ============================================
+
+async def recommend_batch(db: AsyncSession, targets: Iterable[Tuple[str, float, float]]) -> List[dict]:
+    """
+    여러 사용자/위치의 추천을 한 번에 생성
+    
+    - 날씨: 같은 격자 셀의 사용자끼리 묶어 셀마다 한 번만 조회 (동시 조회 수 제한)
+    - 캐릭터: user_id IN (...) 한 번으로 조회 (없으면 일괄 생성)
+    - 추천: 메모리 카탈로그에서 사용자별로 샘플링
+    
+    Args:
+        db: 비동기 SQLAlchemy 세션 객체
+        targets: (user_id, 위도, 경도) 목록
+    
+    Returns:
+        list: 입력 순서대로 {"user_id", "weather", "character", "recommendations"}
+    """
+    targets = list(targets)
+    if not targets:
+        return []
+    catalog = await ensure_catalog(db)
+    
+    # 1. 셀별 날씨 (셀마다 첫 번째 사용자의 좌표로 조회)
+    cells = {}
+    for _, lat, lon in targets:
+        cells.setdefault(weather_cell(lat, lon), (lat, lon))
+    
+    semaphore = asyncio.Semaphore(BATCH_WEATHER_CONCURRENCY)
+    
+    async def fetch(lat, lon):
+        async with semaphore:
+            return await fetch_weather(lat, lon)
+    
+    weathers = await asyncio.gather(*(fetch(lat, lon) for lat, lon in cells.values()))
+    weather_by_cell = dict(zip(cells, weathers))
+    
+    # 2. 캐릭터 일괄 조회
+    characters = await get_or_create_characters(db, (user_id for user_id, _, _ in targets))
+    
+    # 3. 사용자별 추천
+    now = utc_now()
+    results = []
+    for user_id, lat, lon in targets:
+        weather = weather_by_cell[weather_cell(lat, lon)]
+        character = characters[user_id]
+        results.append({
+            "user_id": user_id,
+            "weather": weather,
+            "character": {
+                "level": character.level,
+                "satiety": current_satiety(character, now),
+                "friendship": character.friendship,
+            },
+            "recommendations": build_recommendations(
+                catalog,
+                weather["condition"],
+                weather["temperature"],
+                weather.get("humidity"),
+                weather.get("feels_like"),
+            ),
+        })
+    return results
+
+
 # ============================================
 # 챗봇 추천 시스템 (카테고리 + 재료 필터)
 # ============================================
 
-def chatbot_filter_recommend(db: Session, category: str = None, ingredients: list = None, limit: int = 3):
+async def chatbot_filter_recommend(db: AsyncSession, category: str = None, ingredients: list = None, limit: int = 3):
     """
     카테고리와 재료로 필터링하여 추천 (DB 사용)
     
     Args:
-        db: SQLAlchemy 세션 객체
+        db: 비동기 SQLAlchemy 세션 객체
         category: 선택한 카테고리 (한식, 중식, 일식, 양식, 패스트푸드, 분식, 찜/탕)
         ingredients: 선택한 재료 리스트 (["고기", "밥"])
         limit: 추천할 음식 개수 (기본 3개)
@@ -144,18 +209,18 @@ def chatbot_filter_recommend(db: Session, category: str = None, ingredients: lis
     Returns:
         list: 추천 음식 리스트
     """
-    query = db.query(Food)
+    query = select(Food)
     
     # 1단계: 카테고리 필터
     if category:
-        query = query.filter(Food.category == category)
+        query = query.where(Food.category == category)
     
     # 2단계: 재료 필터 (선택한 재료가 모두 포함된 음식)
+    # ingredient_tags @> ARRAY[...] 한 번으로 GIN 인덱스 사용
     if ingredients:
-        for ing in ingredients:
-            query = query.filter(Food.ingredients.contains(ing))
+        query = query.where(Food.ingredient_tags.contains(list(ingredients)))
     
-    filtered_foods = query.all()
+    filtered_foods = (await db.execute(query)).scalars().all()
     
     # 추천
     if len(filtered_foods) >= limit:
@@ -0,0 +1,235 @@
+"""
+외부 API 장애 대응 (업스트림별 정책)
+- 서킷 브레이커: 연속 실패가 쌓이면 일정 시간 호출하지 않고 바로 실패 → 호출한 쪽은 캐시/기본값으로
+- 재시도: 일시적 오류(타임아웃, 연결 오류, 5xx, 429)만, 지수 백오프 + full jitter
+- 재시도 예산: 요청 수에 비례한 만큼만 재시도 / 헤지 허용 (장애 시 요청 폭주 방지)
+- 헤지 요청: 응답이 hedge_delay보다 늦으면 같은 요청을 하나 더 보내고 먼저 성공한 응답 사용
+- 마지막 정상 값 제공(stale-while-revalidate)은 TTLCache(stale_ttl)에서 처리
+"""
+
+import asyncio
+import os
+import random
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# 서킷 브레이커: 연속 실패 횟수 / 열린 뒤 다시 시도하기까지 (초)
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_TIMEOUT = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30"))
+# 재시도: 최대 시도 횟수(첫 요청 포함) / 백오프 (초)
+RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "2"))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "0.1"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "1"))
+# 재시도 예산: 요청 1건당 적립되는 재시도 수 (0.2 = 요청의 20%까지 재시도 / 헤지)
+RETRY_BUDGET_RATIO = float(os.getenv("RETRY_BUDGET_RATIO", "0.2"))
+RETRY_BUDGET_MAX = float(os.getenv("RETRY_BUDGET_MAX", "10"))
+
+
+class CircuitOpenError(Exception):
+    """서킷이 열려 있어 업스트림을 호출하지 않음"""
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    업스트림 장애로 볼 오류인지 (재시도 + 서킷 실패로 집계)
+
+    4xx는 요청 문제이고, PoolTimeout은 우리 쪽 커넥션 풀 포화라 제외합니다.
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status >= 500 or status == 429
+    if isinstance(error, httpx.PoolTimeout):
+        return False
+    return isinstance(error, httpx.TransportError)
+
+
+class CircuitBreaker:
+    """
+    closed → (연속 실패 failure_threshold회) → open → (reset_timeout 후) half_open
+    half_open에서는 요청 하나만 보내 보고, 성공하면 closed / 실패하면 다시 open
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 reset_timeout: float = CIRCUIT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_started: Optional[float] = None
+
+        # 통계
+        self.opens = 0
+        self.short_circuits = 0
+
+    def allow(self) -> bool:
+        """지금 업스트림을 호출해도 되는지"""
+        now = time.monotonic()
+        if self.state == self.OPEN:
+            if now - self.opened_at < self.reset_timeout:
+                self.short_circuits += 1
+                return False
+            self.state = self.HALF_OPEN
+            self.probe_started = None
+
+        if self.state == self.HALF_OPEN:
+            # 시험 요청은 하나만 (취소되어 결과가 안 오면 reset_timeout 후 다시 허용)
+            if self.probe_started is not None and now - self.probe_started < self.reset_timeout:
+                self.short_circuits += 1
+                return False
+            self.probe_started = now
+        return True
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.failures = 0
+        self.probe_started = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self.failures = 0
+            self.probe_started = None
+            self.opens += 1
+
+
+class RetryBudget:
+    """요청마다 ratio만큼 토큰 적립, 재시도 / 헤지 1번에 토큰 1개"""
+
+    def __init__(self, ratio: float = RETRY_BUDGET_RATIO, max_tokens: float = RETRY_BUDGET_MAX):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+
+    def deposit(self) -> None:
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class UpstreamPolicy:
+    """
+    업스트림 하나의 호출 정책 (서킷 브레이커 + 재시도 + 헤지)
+
+    Usage:
+        policy = UpstreamPolicy("kakao", hedge_delay=0.5)
+        response = await policy.call(lambda: client.get(url))
+    """
+
+    def __init__(
+        self,
+        name: str,
+        hedge_delay: float = 0.0,
+        max_attempts: int = RETRY_MAX_ATTEMPTS,
+        base_delay: float = RETRY_BASE_DELAY,
+        max_delay: float = RETRY_MAX_DELAY,
+        breaker: Optional[CircuitBreaker] = None,
+        budget: Optional[RetryBudget] = None,
+    ):
+        self.name = name
+        self.hedge_delay = hedge_delay
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker or CircuitBreaker()
+        self.budget = budget or RetryBudget()
+
+        # 통계
+        self.calls = 0
+        self.retries = 0
+        self.budget_exhausted = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    async def call(self, send: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        send()를 정책에 따라 실행 (send는 호출할 때마다 새 요청을 보내야 함)
+
+        Raises:
+            CircuitOpenError: 서킷이 열려 있을 때 (업스트림 호출 없음)
+            Exception: 재시도 후에도 실패하면 마지막 오류
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"{self.name} 서킷 열림")
+        self.calls += 1
+        self.budget.deposit()
+
+        attempt = 1
+        while True:
+            try:
+                result = await self._hedged(send)
+            except Exception as e:
+                if not is_retryable(e):
+                    # 업스트림은 응답했으므로 장애로 보지 않음
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                if attempt >= self.max_attempts or self.breaker.state == CircuitBreaker.OPEN:
+                    raise
+                if not self.budget.withdraw():
+                    self.budget_exhausted += 1
+                    raise
+                self.retries += 1
+                delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+                await asyncio.sleep(random.uniform(0, delay))
+                attempt += 1
+                continue
+
+            self.breaker.record_success()
+            return result
+
+    async def _hedged(self, send: Callable[[], Awaitable[Any]]) -> Any:
+        """hedge_delay 안에 응답이 없으면 요청을 하나 더 보내고 먼저 성공한 쪽 사용"""
+        if self.hedge_delay <= 0:
+            return await send()
+
+        first = asyncio.ensure_future(send())
+        tasks = {first}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_delay)
+            if not done and self.budget.withdraw():
+                self.hedges += 1
+                tasks.add(asyncio.ensure_future(send()))
+
+            error = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "circuit": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "circuit_opens": self.breaker.opens,
+            "short_circuits": self.breaker.short_circuits,
+            "calls": self.calls,
+            "retries": self.retries,
+            "budget_exhausted": self.budget_exhausted,
+            "retry_budget": round(self.budget.tokens, 2),
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+        }
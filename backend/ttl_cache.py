@@ -0,0 +1,167 @@
+"""
+프로세스 내 TTL + LRU 캐시
+- 만료 시간(TTL)과 최대 크기(LRU)로 메모리 사용량 제한
+- 같은 키에 대한 동시 miss는 하나의 업스트림 요청을 공유 (request coalescing)
+- stale_ttl을 주면 만료 후 그 시간 동안은 마지막 값을 바로 돌려주고 백그라운드에서 갱신
+  (stale-while-revalidate, 업스트림이 느리거나 죽어도 응답 지연 없음)
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    비동기 로더를 지원하는 TTL + LRU 캐시
+
+    Usage:
+        cache = TTLCache(ttl=600, max_size=1024)
+        value = await cache.get_or_load(key, lambda: fetch(...))
+    """
+
+    def __init__(self, ttl: float, max_size: int, stale_ttl: float = 0.0):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.stale_ttl = stale_ttl
+        # key → (만료 시각, 마지막 값 제공 종료 시각, 값)
+        self._data: "OrderedDict[Hashable, Tuple[float, float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+        # 통계
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.stale_hits = 0
+        self.refresh_errors = 0
+
+    def _entry(self, key: Hashable, now: float):
+        """(만료 시각, 값) 반환, 마지막 값 제공 기간까지 지났으면 삭제 후 None"""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+
+        expires_at, stale_until, value = entry
+        if stale_until <= now:
+            del self._data[key]
+            return None
+
+        self._data.move_to_end(key)
+        return expires_at, value
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """만료되지 않은 값 반환 (없으면 None)"""
+        now = time.monotonic()
+        entry = self._entry(key, now)
+        if entry is None or entry[0] <= now:
+            return None
+        return entry[1]
+
+    def expires_in(self, key: Hashable) -> Optional[float]:
+        """만료까지 남은 시간 (초, 없으면 None / 이미 만료된 마지막 값이면 0 이하)"""
+        entry = self._data.get(key)
+        return None if entry is None else entry[0] - time.monotonic()
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """값 저장 (크기 초과 시 가장 오래 사용하지 않은 항목 제거)"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, expires_at + self.stale_ttl, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        should_cache: Callable[[Any], bool] = lambda value: True,
+    ) -> Any:
+        """
+        캐시 조회 후 없으면 loader 실행
+
+        Args:
+            key: 캐시 키
+            loader: 값을 가져오는 비동기 함수
+            should_cache: 결과를 캐시에 저장할지 판단 (예: 에러 응답 제외)
+        """
+        now = time.monotonic()
+        entry = self._entry(key, now)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > now:
+                self.hits += 1
+                return value
+            # 만료됐지만 마지막 값 제공 기간 → 바로 반환하고 백그라운드에서 갱신
+            self.stale_hits += 1
+            self.refresh(key, loader, should_cache)
+            return value
+
+        # 이미 같은 키를 가져오는 중이면 그 결과를 기다림
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            # 별도 태스크로 실행하여 첫 요청이 취소되어도 나머지는 결과를 받도록 함
+            task = asyncio.ensure_future(self._load(key, loader, should_cache))
+            self._inflight[key] = task
+
+        return await asyncio.shield(task)
+
+    def refresh(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        should_cache: Callable[[Any], bool] = lambda value: True,
+    ) -> asyncio.Future:
+        """
+        백그라운드에서 값 갱신 (이미 가져오는 중이면 그 요청을 공유)
+
+        실패해도 기존 값은 그대로 두므로 마지막 정상 값을 계속 제공합니다.
+        갱신 결과가 필요하면 반환된 태스크를 기다리면 됩니다.
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            return task
+        task = asyncio.ensure_future(self._load(key, loader, should_cache))
+        self._inflight[key] = task
+        task.add_done_callback(self._refresh_done)
+        return task
+
+    def _refresh_done(self, task: asyncio.Future) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            self.refresh_errors += 1
+
+    async def _load(self, key, loader, should_cache) -> Any:
+        try:
+            value = await loader()
+            if should_cache(value):
+                self.set(key, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self) -> dict:
+        """캐시 통계"""
+        lookups = self.hits + self.stale_hits + self.misses + self.coalesced
+        served = self.hits + self.stale_hits + self.coalesced
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "stale_ttl": self.stale_ttl,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "refresh_errors": self.refresh_errors,
+            "hit_rate": round(served / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,217 @@
+"""
+인기 지역 날씨 미리 가져오기
+- fetch_weather 요청마다 날씨 셀을 count-min sketch로 집계하고 상위 셀만 후보로 유지
+- 주기마다 상위 셀 중 곧 만료될 날씨를 미리 갱신 → 인기 지역 요청은 OpenWeatherMap을 기다리지 않음
+- 빈도는 주기마다 감쇠시켜 최근 트래픽 기준으로 상위 셀이 바뀜
+- FastAPI lifespan에서 start() / stop()
+"""
+
+import asyncio
+import os
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from weather_service import (
+    cell_center,
+    fetch_weather_from_api,
+    register_weather_listener,
+    weather_cache,
+)
+
+load_dotenv()
+
+WEATHER_PREFETCH_ENABLED = os.getenv("WEATHER_PREFETCH_ENABLED", "true").lower() == "true"
+# 갱신 주기 (초)
+WEATHER_PREFETCH_INTERVAL = float(os.getenv("WEATHER_PREFETCH_INTERVAL", "60"))
+# 추적 / 갱신할 최대 셀 수 (OpenWeatherMap 호출 수 ≈ 셀 수 × 3600 / WEATHER_CACHE_TTL 회/시간)
+WEATHER_PREFETCH_MAX_CELLS = int(os.getenv("WEATHER_PREFETCH_MAX_CELLS", "50"))
+# 이 횟수 이상 요청된 셀만 갱신 (감쇠 후 빈도 기준)
+WEATHER_PREFETCH_MIN_REQUESTS = int(os.getenv("WEATHER_PREFETCH_MIN_REQUESTS", "3"))
+# 다음 주기 전에 만료되지 않도록 남은 시간이 (주기 + 여유) 이하이면 갱신 (초)
+WEATHER_PREFETCH_MARGIN = float(os.getenv("WEATHER_PREFETCH_MARGIN", "30"))
+# 주기마다 빈도에 곱하는 값 (0.5 = 반감)
+WEATHER_PREFETCH_DECAY = float(os.getenv("WEATHER_PREFETCH_DECAY", "0.5"))
+WEATHER_PREFETCH_CONCURRENCY = int(os.getenv("WEATHER_PREFETCH_CONCURRENCY", "5"))
+
+Cell = Tuple[int, int]
+
+
+class HotCellTracker:
+    """
+    count-min sketch 빈도 추정 + 상위 max_cells 셀 후보
+
+    셀 수와 관계없이 메모리는 depth × width 카운터 + 후보 max_cells개로 고정입니다.
+    """
+
+    def __init__(self, max_cells: int = WEATHER_PREFETCH_MAX_CELLS, width: int = 2048, depth: int = 4):
+        self.max_cells = max_cells
+        self.width = width
+        self._rows: List[List[int]] = [[0] * width for _ in range(depth)]
+        # 후보 셀 → 추정 빈도 (마지막으로 요청됐을 때)
+        self._top: Dict[Cell, int] = {}
+        # 빈도가 가장 낮은 후보 (None이면 다시 계산)
+        self._coldest: Optional[Cell] = None
+
+    def _slots(self, cell: Cell):
+        # 정수 튜플의 hash는 프로세스마다 같음
+        return [hash((seed, cell)) % self.width for seed in range(len(self._rows))]
+
+    def estimate(self, cell: Cell) -> int:
+        return min(row[slot] for row, slot in zip(self._rows, self._slots(cell)))
+
+    def record(self, cell: Cell) -> int:
+        """요청 1건 집계 후 추정 빈도 반환"""
+        count = None
+        for row, slot in zip(self._rows, self._slots(cell)):
+            row[slot] += 1
+            count = row[slot] if count is None else min(count, row[slot])
+
+        top = self._top
+        if cell in top or len(top) < self.max_cells:
+            # 새로 들어온 후보이거나 가장 낮던 후보가 늘었으면 다시 계산
+            if cell == self._coldest or cell not in top:
+                self._coldest = None
+            top[cell] = count
+            return count
+
+        if self._coldest is None:
+            self._coldest = min(top, key=top.get)
+        if count > top[self._coldest]:
+            del top[self._coldest]
+            top[cell] = count
+            self._coldest = None
+        return count
+
+    def decay(self, factor: float) -> None:
+        """모든 빈도에 factor를 곱함 (오래된 트래픽 영향 줄이기)"""
+        for row in self._rows:
+            row[:] = [int(value * factor) for value in row]
+        self._top = {cell: self.estimate(cell) for cell in self._top}
+        self._coldest = None
+
+    def hot_cells(self) -> List[Tuple[Cell, int]]:
+        """후보 셀 (빈도 높은 순)"""
+        return sorted(self._top.items(), key=lambda item: item[1], reverse=True)
+
+
+class WeatherPrefetcher:
+    """상위 셀 날씨를 만료 전에 갱신하는 백그라운드 작업"""
+
+    def __init__(
+        self,
+        interval: float = WEATHER_PREFETCH_INTERVAL,
+        max_cells: int = WEATHER_PREFETCH_MAX_CELLS,
+        min_requests: int = WEATHER_PREFETCH_MIN_REQUESTS,
+        loader: Callable[[float, float], Awaitable[dict]] = fetch_weather_from_api,
+    ):
+        self.interval = interval
+        self.min_requests = min_requests
+        self.loader = loader
+        self.tracker = HotCellTracker(max_cells)
+        self._task: Optional[asyncio.Task] = None
+        # 미리 가져온 값이 아직 캐시에 있는 셀
+        self._prefetched: set = set()
+
+        # 통계
+        self.requests = 0
+        self.cache_hits = 0
+        self.prefetch_hits = 0
+        self.cycles = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.last_cycle_ms = 0.0
+
+    def record(self, cell: Cell, hit: bool) -> None:
+        """fetch_weather 요청 집계 (register_weather_listener로 연결)"""
+        self.requests += 1
+        self.tracker.record(cell)
+        if hit:
+            self.cache_hits += 1
+            if cell in self._prefetched:
+                self.prefetch_hits += 1
+        else:
+            self._prefetched.discard(cell)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.refresh_once()
+            except Exception as e:
+                print(f"날씨 미리 가져오기 오류: {e}")
+
+    async def refresh_once(self) -> int:
+        """
+        곧 만료될 상위 셀 날씨 갱신 (한 주기)
+
+        Returns:
+            int: 갱신한 셀 수
+        """
+        started = time.perf_counter()
+        due = []
+        for cell, count in self.tracker.hot_cells():
+            if count < self.min_requests:
+                break
+            remaining = weather_cache.expires_in(cell)
+            if remaining is None or remaining <= self.interval + WEATHER_PREFETCH_MARGIN:
+                due.append(cell)
+
+        semaphore = asyncio.Semaphore(WEATHER_PREFETCH_CONCURRENCY)
+
+        async def refresh(cell):
+            async with semaphore:
+                # 캐시를 거쳐 갱신해야 같은 셀의 사용자 miss와 API 호출 하나를 공유
+                task = weather_cache.refresh(cell, lambda: self.loader(*cell_center(cell)))
+                try:
+                    await asyncio.shield(task)
+                except Exception:
+                    self.refresh_errors += 1
+                    return False
+                self._prefetched.add(cell)
+                return True
+
+        refreshed = sum(await asyncio.gather(*(refresh(cell) for cell in due)))
+        self.refreshes += refreshed
+        self.cycles += 1
+        self.tracker.decay(WEATHER_PREFETCH_DECAY)
+        self.last_cycle_ms = round((time.perf_counter() - started) * 1000, 2)
+        return refreshed
+
+    def stats(self) -> dict:
+        return {
+            "enabled": WEATHER_PREFETCH_ENABLED,
+            "interval": self.interval,
+            "max_cells": self.tracker.max_cells,
+            "requests": self.requests,
+            "cache_hit_rate": round(self.cache_hits / self.requests, 4) if self.requests else 0.0,
+            # 전체 요청 중 미리 가져온 날씨로 응답한 비율
+            "prefetch_hit_rate": round(self.prefetch_hits / self.requests, 4) if self.requests else 0.0,
+            "prefetch_hits": self.prefetch_hits,
+            "cycles": self.cycles,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "last_cycle_ms": self.last_cycle_ms,
+            "hot_cells": [
+                {"cell": list(cell), "requests": count} for cell, count in self.tracker.hot_cells()[:10]
+            ],
+        }
+
+
+weather_prefetcher = WeatherPrefetcher()
+if WEATHER_PREFETCH_ENABLED:
+    register_weather_listener(weather_prefetcher.record)
@@ -3,18 +3,65 @@
 OpenWeatherMap API 연동
 """
 
-import httpx
 import os
+from typing import Callable, List, Tuple
+
 from dotenv import load_dotenv
 
+import http_client
+from ttl_cache import TTLCache
+
 load_dotenv()
 
 OPENWEATHERMAP_API_KEY = os.getenv("OPENWEATHERMAP_API_KEY")
 
+# 날씨 캐시 설정
+# - 해상도(도 단위) 격자 셀마다 한 번만 API 호출 (0.05도 ≈ 5km)
+WEATHER_CACHE_RESOLUTION = float(os.getenv("WEATHER_CACHE_RESOLUTION", "0.05"))
+WEATHER_CACHE_TTL = float(os.getenv("WEATHER_CACHE_TTL", "600"))  # 초
+WEATHER_CACHE_MAX_SIZE = int(os.getenv("WEATHER_CACHE_MAX_SIZE", "2048"))
+# 만료 후에도 이 시간(초) 동안은 마지막 날씨를 바로 주고 백그라운드에서 갱신
+WEATHER_CACHE_STALE_TTL = float(os.getenv("WEATHER_CACHE_STALE_TTL", "1800"))
+
+weather_cache = TTLCache(
+    ttl=WEATHER_CACHE_TTL, max_size=WEATHER_CACHE_MAX_SIZE, stale_ttl=WEATHER_CACHE_STALE_TTL
+)
+
+
+# 날씨 요청마다 (셀, 캐시 적중 여부)로 호출할 함수 (미리 가져오기 등)
+_request_listeners: List[Callable[[Tuple[int, int], bool], None]] = []
+
+
+def register_weather_listener(listener: Callable[[Tuple[int, int], bool], None]) -> None:
+    """fetch_weather 요청마다 호출할 함수 등록 (요청 경로에서 실행되므로 가볍게)"""
+    if listener not in _request_listeners:
+        _request_listeners.append(listener)
+
+
+def weather_cell(lat: float, lon: float):
+    """위도/경도를 캐시 격자 셀 키로 변환"""
+    return (
+        round(lat / WEATHER_CACHE_RESOLUTION),
+        round(lon / WEATHER_CACHE_RESOLUTION),
+    )
+
+
+def cell_center(cell):
+    """격자 셀의 중심 좌표"""
+    return (
+        cell[0] * WEATHER_CACHE_RESOLUTION,
+        cell[1] * WEATHER_CACHE_RESOLUTION,
+    )
+
 
 async def fetch_weather(lat: float, lon: float):
     """
-    OpenWeatherMap API로 날씨 정보 가져오기
+    날씨 정보 가져오기 (격자 셀 단위 캐시)
+    
+    같은 셀의 요청은 TTL 동안 캐시된 값을 사용하고,
+    동시에 들어온 miss는 하나의 API 호출을 공유합니다.
+    만료 후 WEATHER_CACHE_STALE_TTL 동안은 마지막 날씨를 바로 반환하고 백그라운드에서 갱신하며,
+    캐시가 없는데 API가 실패하거나 서킷이 열려 있으면 기본값을 반환합니다.
     
     Args:
         lat: 위도
@@ -23,31 +70,20 @@ async def fetch_weather(lat: float, lon: float):
     Returns:
         dict: 날씨 정보
     """
-    url = "https://api.openweathermap.org/data/2.5/weather"
-    params = {
-        "lat": lat,
-        "lon": lon,
-        "appid": OPENWEATHERMAP_API_KEY,
-        "units": "metric",  # 섭씨
-        "lang": "kr"  # 한국어
-    }
-    
+    cell = weather_cell(lat, lon)
+    center_lat, center_lon = cell_center(cell)
+    if _request_listeners:
+        hit = weather_cache.get(cell) is not None
+        for listener in _request_listeners:
+            listener(cell, hit)
+
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params, timeout=10.0)
-            response.raise_for_status()
-            data = response.json()
-            
-            return {
-                "location": data.get("name", "Unknown"),
-                "temperature": data["main"]["temp"],
-                "condition": data["weather"][0]["main"],  # Clear, Rain, Snow 등
-                "description": data["weather"][0]["description"],
-                "humidity": data["main"]["humidity"],
-                "feels_like": data["main"]["feels_like"],
-                "is_mock": False
-            }
-    
+        weather = await weather_cache.get_or_load(
+            cell,
+            lambda: fetch_weather_from_api(center_lat, center_lon),
+        )
+        return dict(weather)
+
     except Exception as e:
         print(f"날씨 API 오류: {e}")
         # 에러 시 기본값 반환
@@ -63,6 +99,44 @@ async def fetch_weather(lat: float, lon: float):
         }
 
 
+async def fetch_weather_from_api(lat: float, lon: float):
+    """
+    OpenWeatherMap API로 날씨 정보 가져오기 (캐시 없음)
+    
+    Args:
+        lat: 위도
+        lon: 경도
+    
+    Returns:
+        dict: 날씨 정보
+    
+    Raises:
+        httpx.HTTPError: API 호출 실패 시 (타임아웃은 http_client 업스트림 설정)
+        resilience.CircuitOpenError: 연속 실패로 서킷이 열려 있을 때
+    """
+    url = "https://api.openweathermap.org/data/2.5/weather"
+    params = {
+        "lat": lat,
+        "lon": lon,
+        "appid": OPENWEATHERMAP_API_KEY,
+        "units": "metric",  # 섭씨
+        "lang": "kr"  # 한국어
+    }
+    
+    response = await http_client.get("openweathermap", url, params=params)
+    data = response.json()
+    
+    return {
+        "location": data.get("name", "Unknown"),
+        "temperature": data["main"]["temp"],
+        "condition": data["weather"][0]["main"],  # Clear, Rain, Snow 등
+        "description": data["weather"][0]["description"],
+        "humidity": data["main"]["humidity"],
+        "feels_like": data["main"]["feels_like"],
+        "is_mock": False
+    }
+
+
 # ============================================
 # 테스트 코드
 # ============================================
@@ -94,5 +168,7 @@ if __name__ == "__main__":
         print("=" * 50)
         print("테스트 완료! ✅")
         print("=" * 50)
+        
+        await http_client.shutdown_http_client()
     
     asyncio.run(test())
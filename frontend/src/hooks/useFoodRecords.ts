@@ -7,6 +7,11 @@ import type { Food, FoodRecord } from "../types"
 const API_BASE =
   import.meta.env.VITE_API_BASE_URL || "http://localhost:8000"
 
+// 도감 화면에 필요한 필드만 요청, 한 번에 최대 200개씩 (백엔드 MAX_PAGE_SIZE)
+const DIARY_FIELDS =
+  "id,food_name,category,is_recommended,created_at,photo_url"
+const DIARY_PAGE_SIZE = 200
+
 interface FoodDiaryItemApi {
   id: number
   user_id: string
@@ -18,6 +23,14 @@ interface FoodDiaryItemApi {
   place_name?: string | null
 }
 
+interface FoodDiaryPageApi {
+  user_id: string
+  total_count: number
+  records: FoodDiaryItemApi[]
+  next_cursor: string | null
+  has_more: boolean
+}
+
 export function useFoodRecords(userId: string = "default_user") {
   const [records, setRecords] = useState<FoodRecord[]>([])
   const [loading, setLoading] = useState(true)
@@ -29,15 +42,25 @@ export function useFoodRecords(userId: string = "default_user") {
         setLoading(true)
         setError(null)
 
-        // ✅ 백엔드에서 기록 목록 가져오기
-        const res = await api.get<{
-        user_id: string
-        total_count: number
-        records: FoodDiaryItemApi[]
-      }>(`/food/diary?user_id=${userId}`)
+        // ✅ 백엔드에서 기록 목록 가져오기 (next_cursor를 따라 전체 페이지)
+        const items: FoodDiaryItemApi[] = []
+        let cursor: string | null = null
+        do {
+          const params = new URLSearchParams({
+            user_id: userId,
+            limit: String(DIARY_PAGE_SIZE),
+            fields: DIARY_FIELDS,
+          })
+          if (cursor) params.set("cursor", cursor)
+
+          const res = await api.get<FoodDiaryPageApi>(`/food/diary?${params}`)
+
+          items.push(...res.records)
+          cursor = res.has_more ? res.next_cursor : null
+        } while (cursor)
 
         // ✅ 프론트에서 쓰기 편한 형태로 변환
-        const mapped: FoodRecord[] = res.records.map((item) => {
+        const mapped: FoodRecord[] = items.map((item) => {
           const food: Food = {
             id: String(item.id), // 음식 자체의 ID가 없으므로 기록 ID를 사용
             name: item.food_name,